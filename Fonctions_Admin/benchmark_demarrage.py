@@ -0,0 +1,75 @@
+"""Ce script mesure le coût du chargement des gabarits Jinja au démarrage d'un processus.
+
+Chaque mesure est faite dans un nouveau processus Python, comme lors d'un démarrage par Passenger :
+    - sans cache de bytecode (compilation de tous les gabarits depuis les sources) ;
+    - avec le cache de bytecode rempli par 'flask precompile-templates' ;
+    - en régime établi (gabarits déjà chargés en mémoire).
+
+Exemple d'utilisation :
+    python Fonctions_Admin/benchmark_demarrage.py
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Nombre de processus lancés pour chaque mesure.
+RUNS = 5
+
+# Code exécuté dans chaque processus : création de l'application sans préchargement, puis chargement de tous les
+# gabarits, deux fois (démarrage à froid puis régime établi).
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from app import create_app
+from app.template_cache import precompile_templates
+app = create_app()
+start = time.perf_counter()
+loaded, errors = precompile_templates(app)
+first = time.perf_counter() - start
+start = time.perf_counter()
+precompile_templates(app)
+steady = time.perf_counter() - start
+print(json.dumps({{'loaded': loaded, 'first': first, 'steady': steady}}))
+"""
+
+
+def run_child(cache_folder):
+    """
+    Lance un processus qui crée l'application et charge tous les gabarits.
+
+    :param cache_folder: Dossier du cache de bytecode, ou chaîne vide pour le désactiver.
+    :return: Dictionnaire des durées mesurées.
+    """
+    env = dict(os.environ, JINJA_PRELOAD_TEMPLATES='False', JINJA_BYTECODE_CACHE_FOLDER=cache_folder)
+    output = subprocess.run([sys.executable, '-c', CHILD.format(root=parent_dir)], cwd=parent_dir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values):
+    """
+    Calcule la médiane d'une liste de valeurs.
+    """
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+if __name__ == '__main__':
+    cache_folder = tempfile.mkdtemp(prefix='jinja-bench-')
+    try:
+        cold = [run_child('') for _ in range(RUNS)]
+        run_child(cache_folder)
+        warm = [run_child(cache_folder) for _ in range(RUNS)]
+    finally:
+        shutil.rmtree(cache_folder, ignore_errors=True)
+
+    print(f"Gabarits chargés : {cold[0]['loaded']}")
+    print(f"Sans cache de bytecode : {median([r['first'] for r in cold]) * 1000:.1f} ms")
+    print(f"Avec cache de bytecode : {median([r['first'] for r in warm]) * 1000:.1f} ms")
+    print(f"Régime établi         : {median([r['steady'] for r in warm]) * 1000:.1f} ms")
@@ -0,0 +1,247 @@
+"""Ce script mesure le coût des fonctions appelées à chaque affichage de page ou à chaque synchronisation.
+
+Fonctions mesurées, sur des jeux de 1 000, 10 000 et 100 000 vidéos (objets Video non enregistrés, deux publications
+par jour jusqu'à aujourd'hui) :
+    - current_month_videos, popular_videos et archived_videos (page d'accueil) ;
+    - YouTubeManager.format_date et get_video_details (synchronisation ; l'API YouTube est remplacée par des réponses
+      préparées à l'avance, seule la construction du dictionnaire est mesurée).
+
+Chaque mesure est répétée (ramasse-miettes désactivé, comme timeit) ; la médiane et le minimum sont enregistrés dans
+un fichier JSON de référence. La commande 'comparer' signale les mesures dont le minimum (moins sensible que la
+médiane à l'activité de la machine) dépasse celui de la référence de plus de la tolérance, et se termine avec le
+code 1 en cas de régression. Les références ne sont comparables que sur une même machine.
+
+Exemples d'utilisation :
+    python Fonctions_Admin/benchmark_fonctions.py mesurer --sortie cache/benchmarks/reference.json
+    python Fonctions_Admin/benchmark_fonctions.py mesurer --tailles 1000 10000 --sortie cache/benchmarks/essai.json
+    python Fonctions_Admin/benchmark_fonctions.py comparer cache/benchmarks/reference.json \
+        cache/benchmarks/essai.json --tolerance 0.1
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+
+from datetime import datetime, date, timedelta
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, parent_dir)
+
+from Fonctions_Admin.donnees_test import create_offline_app, StubYouTube
+
+# Tailles des jeux de vidéos, fichier de sortie et tolérance par défaut.
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_OUTPUT = os.path.join(parent_dir, 'cache', 'benchmarks', 'benchmark_fonctions.json')
+DEFAULT_TOLERANCE = 0.10
+
+# Durée minimale d'une répétition : les fonctions rapides sont appelées plusieurs fois par répétition.
+MIN_ROUND_TIME = 0.05
+
+
+class PreparedYouTube:
+    """
+    Client de l'API YouTube renvoyant des réponses préparées à l'avance (aucun calcul pendant la mesure).
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def videos(self):
+        return self
+
+    def list(self, part=None, id=None):
+        return self
+
+    def execute(self):
+        return self.responses[self.current]
+
+
+def make_videos(size, seed=0):
+    """
+    Crée size objets Video (non enregistrés), publiés à raison de deux par jour environ jusqu'à aujourd'hui.
+
+    :return: Liste de Video.
+    """
+    from app.Models.videos import Video
+
+    rng = random.Random(seed)
+    today = date.today()
+    videos = []
+    for index in range(size):
+        videos.append(Video(video_id=f'vid{index:07d}', title=f'Vidéo {index}',
+                            published_at=today - timedelta(days=index // 2),
+                            view_count=int(rng.paretovariate(1.2) * 200), like_count=rng.randrange(500),
+                            comment_count=rng.randrange(30), tags=['bricolage', 'jardin']))
+    return videos
+
+
+def build_cases(sizes, seed=0):
+    """
+    Prépare les fonctions à mesurer pour chaque taille.
+
+    :return: Liste de tuples (nom, taille, fonction sans argument).
+    """
+    from app.utils_videos import current_month_videos, popular_videos, archived_videos
+    from app.videos import YouTubeManager
+
+    cases = []
+    for size in sizes:
+        videos = make_videos(size, seed)
+        cases.append(('current_month_videos', size, lambda videos=videos: current_month_videos(videos)))
+        cases.append(('popular_videos', size, lambda videos=videos: popular_videos(videos)))
+        cases.append(('archived_videos', size, lambda videos=videos: archived_videos(videos)))
+
+        start = datetime(2024, 6, 30, 18, 0, 0)
+        dates = [(start - timedelta(hours=index * 7)).strftime('%Y-%m-%dT%H:%M:%SZ') for index in range(size)]
+
+        def format_dates(dates=dates):
+            for published_at in dates:
+                YouTubeManager.format_date(published_at)
+
+        cases.append(('format_date', size, format_dates))
+
+        stub = StubYouTube(size, seed)
+        client = PreparedYouTube({f'vid{index:07d}': {'items': [stub.video(index)]} for index in range(size)})
+        manager = YouTubeManager.__new__(YouTubeManager)
+        manager.youtube = client
+        ids = list(client.responses)
+
+        def video_details(manager=manager, client=client, ids=ids):
+            for video_id in ids:
+                client.current = video_id
+                manager.get_video_details(video_id)
+
+        cases.append(('get_video_details', size, video_details))
+    return cases
+
+
+def measure(function, repeat):
+    """
+    Mesure une fonction : repeat répétitions d'au moins MIN_ROUND_TIME secondes.
+
+    :return: Dictionnaire (median, min en secondes par appel, calls : appels par répétition, repeat).
+    """
+    # Étalonnage : nombre d'appels nécessaires pour atteindre la durée minimale d'une répétition.
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        if time.perf_counter() - start >= MIN_ROUND_TIME or calls >= 1000:
+            break
+        calls *= 2
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(calls):
+                function()
+            timings.append((time.perf_counter() - start) / calls)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {'median': statistics.median(timings), 'min': min(timings), 'calls': calls, 'repeat': repeat}
+
+
+def run(sizes, repeat, names=None):
+    """
+    Mesure toutes les fonctions pour toutes les tailles.
+
+    :return: Dictionnaire prêt à être enregistré en JSON (machine, date et résultats par 'fonction[taille]').
+    """
+    app = create_offline_app()
+    logging.getLogger().setLevel(logging.ERROR)
+    results = {}
+    with app.app_context():
+        for name, size, function in build_cases(sizes):
+            if names and name not in names:
+                continue
+            result = results[f'{name}[{size}]'] = measure(function, repeat)
+            print(f"{name + f'[{size}]':<32} médiane {result['median'] * 1000:>10.3f} ms   "
+                  f"min {result['min'] * 1000:>10.3f} ms")
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(reference, current, tolerance):
+    """
+    Compare deux fichiers de mesures.
+
+    :param reference: Mesures de référence.
+    :param current: Nouvelles mesures.
+    :param tolerance: Augmentation relative tolérée du minimum (0.1 pour 10 %).
+    :return: Liste des mesures en régression.
+    """
+    regressions = []
+    print(f"{'Mesure':<32} {'référence ms':>13} {'actuel ms':>11} {'écart':>8}")
+    for key in sorted(reference['results'].keys() & current['results'].keys()):
+        before = reference['results'][key]['min']
+        after = current['results'][key]['min']
+        ratio = after / before - 1 if before else 0.0
+        regression = ratio > tolerance
+        if regression:
+            regressions.append(key)
+        print(f"{key:<32} {before * 1000:>13.3f} {after * 1000:>11.3f} {ratio:>+8.1%}"
+              f"{'  RÉGRESSION' if regression else ''}")
+    for key in sorted(reference['results'].keys() ^ current['results'].keys()):
+        print(f"{key:<32} absente de l'un des deux fichiers")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mesure des fonctions de filtrage et de synchronisation des vidéos.")
+    commands = parser.add_subparsers(dest='commande', required=True)
+
+    run_parser = commands.add_parser('mesurer', help="Mesure les fonctions et enregistre les résultats.")
+    run_parser.add_argument('--tailles', type=int, nargs='+', default=DEFAULT_SIZES, help="Nombres de vidéos.")
+    run_parser.add_argument('--repetitions', type=int, default=7, help="Répétitions de chaque mesure.")
+    run_parser.add_argument('--fonctions', nargs='*', help="Fonctions à mesurer (par défaut : toutes).")
+    run_parser.add_argument('--sortie', default=DEFAULT_OUTPUT, help="Fichier JSON des résultats.")
+    run_parser.add_argument('--reference', help="Fichier de référence à comparer aux nouvelles mesures.")
+    run_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Tolérance (0.1 = 10 %%).")
+
+    compare_parser = commands.add_parser('comparer', help="Compare deux fichiers de mesures.")
+    compare_parser.add_argument('reference', help="Fichier de référence.")
+    compare_parser.add_argument('actuel', help="Nouvelles mesures.")
+    compare_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Tolérance (0.1 = 10 %%).")
+    return parser.parse_args()
+
+
+def load(path):
+    """
+    Lit un fichier de mesures.
+    """
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.commande == 'mesurer':
+        current = run(args.tailles, args.repetitions, args.fonctions)
+        os.makedirs(os.path.dirname(os.path.abspath(args.sortie)), exist_ok=True)
+        with open(args.sortie, 'w', encoding='utf-8') as file:
+            json.dump(current, file, indent=2)
+        print(f"Mesures enregistrées dans {args.sortie}")
+        reference = load(args.reference) if args.reference else None
+        tolerance = args.tolerance
+    else:
+        reference, current, tolerance = load(args.reference), load(args.actuel), args.tolerance
+
+    if reference is not None and compare(reference, current, tolerance):
+        sys.exit(1)
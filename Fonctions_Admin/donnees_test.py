@@ -0,0 +1,264 @@
+"""Ce module crée une application hors ligne et la remplit de données synthétiques, pour les mesures de performance.
+
+    - create_offline_app() : application complète (routes de main.py comprises) sur la base indiquée (par défaut une
+      base SQLite temporaire), avec tous les fichiers de cache dans un dossier temporaire, sans envoi de courriels
+      (Flask-Mail en mode suppress) ni jeton CSRF ;
+    - StubYouTube : remplace le client de l'API YouTube et produit des vidéos déterministes (titres, dates, tags,
+      durées et statistiques) ;
+    - generate() : passe ces vidéos par la synchronisation réelle (save_videos_to_db puis les calculs de la tâche
+      planifiée), puis crée les sujets du forum, les commentaires et les réponses.
+
+Les utilisateurs et les « likes » ne sont pas générés : les modèles User, CommentLikeVideo et CommentLikeSubject ne
+sont utilisés par aucune route et leurs relations ne peuvent pas être configurées (clés étrangères absentes des
+modèles de commentaires).
+
+Exemple d'utilisation :
+    from Fonctions_Admin.donnees_test import create_offline_app, generate
+    app = create_offline_app()
+    generate(app, videos=1000, subjects=50, comments=5, replies=2)
+"""
+import os
+import sys
+import random
+import tempfile
+import threading
+
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, parent_dir)
+
+# Vocabulaire des titres et des tags générés.
+SUBJECTS = ['tondeuse', 'perceuse', 'débroussailleuse', 'tronçonneuse', 'souffleur', 'taille-haie', 'motoculteur',
+            'scie sauteuse', 'ponceuse', 'visseuse', 'compresseur', 'nettoyeur haute pression']
+ACTIONS = ['Réparer', 'Entretenir', 'Démonter', 'Affûter', 'Régler', 'Diagnostiquer', 'Remplacer le moteur de',
+           'Changer la courroie de', 'Nettoyer le carburateur de', 'Remonter']
+TAGS = ['bricolage', 'jardin', 'réparation', 'entretien', 'moteur', 'électrique', 'thermique', 'batterie', 'atelier',
+        'tutoriel', 'astuce', 'outillage', 'débutant', 'expert', 'sécurité']
+WORDS = ['bonjour', 'merci', 'pour', 'cette', 'vidéo', 'très', 'claire', 'mon', 'moteur', 'ne', 'démarre', 'plus',
+         'après', 'hiver', 'faut-il', 'changer', 'la', 'bougie', 'ou', 'le', 'filtre', 'à', 'air', 'super', 'astuce']
+
+# Date de publication de la vidéo la plus récente ; les autres remontent dans le temps.
+LATEST = datetime(2024, 6, 30, 18, 0, 0)
+
+
+class _StubRequest:
+    """
+    Requête de l'API simulée : execute() renvoie la réponse préparée.
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class StubYouTube:
+    """
+    Client simulé de l'API YouTube Data v3 (méthodes search().list() et videos().list() utilisées par YouTubeManager).
+
+    La vidéo d'indice i a pour identifiant 'vid{i:07d}' ; ses données ne dépendent que de i et de la graine.
+    """
+
+    def __init__(self, count, seed=0, thumbnail_base=None):
+        """
+        :param count: Nombre de vidéos de la chaîne.
+        :param seed: Graine des données générées.
+        :param thumbnail_base: URL du serveur de miniatures simulé, ou None pour n'en déclarer aucune (l'URL par
+                               défaut de YouTube est alors utilisée).
+        """
+        self.count = count
+        self.seed = seed
+        self.thumbnail_base = thumbnail_base
+
+    def search(self):
+        return self
+
+    def videos(self):
+        return self
+
+    def list(self, part=None, id=None, pageToken=None, maxResults=50, **kwargs):
+        if id is not None:
+            return _StubRequest({'items': [self.video(int(id[3:]))]})
+        start = int(pageToken or 0)
+        end = min(start + maxResults, self.count)
+        items = [{'id': {'kind': 'youtube#video', 'videoId': f'vid{index:07d}'}} for index in range(start, end)]
+        return _StubRequest({'items': items, 'nextPageToken': str(end) if end < self.count else None})
+
+    def video(self, index):
+        """
+        Construit la ressource 'video' de l'API pour la vidéo d'indice index.
+        """
+        rng = random.Random(self.seed * 1_000_003 + index)
+        published = LATEST - timedelta(days=index * 3 // 2, minutes=rng.randrange(1440))
+        minutes, seconds = rng.randrange(1, 45), rng.randrange(60)
+        views = int(rng.paretovariate(1.2) * 200)
+        snippet = {
+            'title': f'{rng.choice(ACTIONS)} {rng.choice(SUBJECTS)} n°{index}',
+            'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'tags': rng.sample(TAGS, rng.randrange(2, 6)),
+            'thumbnails': {},
+        }
+        if self.thumbnail_base:
+            snippet['thumbnails'] = {'standard': {'url': f'{self.thumbnail_base}/sddefault.jpg'}}
+        return {
+            'id': f'vid{index:07d}',
+            'snippet': snippet,
+            'contentDetails': {'duration': f'PT{minutes}M{seconds}S'},
+            'statistics': {'viewCount': str(views), 'likeCount': str(views // rng.randrange(15, 40)),
+                           'commentCount': str(rng.randrange(0, 30))},
+        }
+
+
+def sentence(rng, words=12):
+    """
+    Produit une phrase aléatoire.
+    """
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randrange(3, words))).capitalize() + '.'
+
+
+def create_offline_app(database_uri=None, folder=None, cache=True):
+    """
+    Crée l'application (main.app) pour une exécution hors ligne.
+
+    Doit être appelée avant tout import de main : la configuration est lue à la création de l'application.
+
+    :param database_uri: URI SQLAlchemy (SQLite, MySQL, PostgreSQL ; 'sqlite://' pour une base en mémoire) ; par
+                         défaut une base SQLite dans folder.
+    :param folder: Dossier des bases, caches, index et journaux ; par défaut un dossier temporaire.
+    :param cache: False pour désactiver le cache des pages et des fragments de gabarits.
+    :return: Instance de l'application Flask.
+    """
+    folder = folder or tempfile.mkdtemp(prefix='tititechnique-')
+    os.environ.setdefault('SECRET_KEY', 'hors-ligne')
+    os.environ.setdefault('MAIL_PORT', '25')
+    os.environ.setdefault('MAIL_DEFAULT_SENDER', 'hors-ligne@example.com')
+
+    from config.config import Config
+    Config.SQLALCHEMY_DATABASE_URI = database_uri or f"sqlite:///{os.path.join(folder, 'donnees.sqlite3')}"
+    Config.WTF_CSRF_ENABLED = False
+    Config.LOG_FILE = os.path.join(folder, 'fichier.log')
+    Config.LOG_REQUESTS = False
+    Config.CACHE_PATH = os.path.join(folder, 'views.sqlite3')
+    Config.CACHE_LOCK_FOLDER = os.path.join(folder, 'locks')
+    Config.FRAGMENT_CACHE_PATH = os.path.join(folder, 'fragments.sqlite3')
+    Config.SEARCH_INDEX_PATH = os.path.join(folder, 'search.sqlite3')
+    Config.SITEMAP_FOLDER = os.path.join(folder, 'sitemap')
+    Config.THUMBNAIL_FOLDER = os.path.join(folder, 'thumbnails')
+    Config.PROFILER_FOLDER = os.path.join(folder, 'profiles')
+    if not cache:
+        Config.CACHE_BACKEND = 'null'
+        Config.FRAGMENT_CACHE_BACKEND = 'null'
+
+    from main import app
+
+    # Aucun courriel n'est envoyé (Flask-Mail lit MAIL_SUPPRESS_SEND avant le chargement de la configuration).
+    app.extensions['mail'].suppress = True
+    return app
+
+
+def generate(app, videos=1000, subjects=50, comments=5, replies=2, seed=0, thumbnails=False):
+    """
+    Crée le schéma et remplit la base de données. Un nouvel appel complète la base : les vidéos existantes sont mises
+    à jour, les nouvelles vidéos et les nouveaux sujets reçoivent des commentaires, les autres restent inchangés.
+
+    :param app: Instance de l'application Flask.
+    :param videos: Nombre total de vidéos.
+    :param subjects: Nombre de sujets du forum ajoutés.
+    :param comments: Nombre moyen de commentaires par sujet et par vidéo.
+    :param replies: Nombre moyen de réponses par commentaire.
+    :param seed: Graine des données générées.
+    :param thumbnails: True pour copier les miniatures depuis un serveur d'images local (lent au-delà de quelques
+                       milliers de vidéos).
+    :return: Dictionnaire du nombre de lignes créées par table (nombre total de vidéos).
+    """
+    from app.Models import db
+    from app.Models.videos import Video
+    from app.Models.subject_forum import SubjectForum
+    from app.Models.comment_subject import CommentSubject
+    from app.Models.comment_video import CommentVideo
+    from app.Models.reply_subject import ReplySubject
+    from app.Models.reply_video import ReplyVideo
+    from app.videos import YouTubeManager, save_videos_to_db
+    from app.search import sync_index
+    from app.tag_index import sync_tags
+    from app.related_videos import compute_related_videos
+    from app.video_stats import capture_snapshot, downsample_stats
+    from app.ranking import compute_rankings
+    from app.conditional import mark_synced
+    from app.thumbnails import sync_thumbnails
+    from app.database import create_schema
+
+    rng = random.Random(seed)
+    server = None
+    with app.app_context():
+        create_schema()
+        last_video_id = db.session.query(db.func.max(Video.id)).scalar() or 0
+
+        # Synchronisation réelle des vidéos, avec le client YouTube simulé.
+        thumbnail_base = None
+        if thumbnails:
+            from Fonctions_Admin.verif_miniatures import StubHandler
+            server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            thumbnail_base = f'http://127.0.0.1:{server.server_port}'
+        manager = YouTubeManager.__new__(YouTubeManager)
+        manager.youtube = StubYouTube(videos, seed, thumbnail_base)
+        manager.channel_id = 'chaine-simulee'
+        try:
+            save_videos_to_db(manager.get_all_videos())
+            if thumbnails:
+                sync_thumbnails()
+        finally:
+            if server is not None:
+                server.shutdown()
+        capture_snapshot()
+        downsample_stats()
+        compute_rankings()
+
+        # Forum : sujets, commentaires et réponses (pour les nouveaux sujets et les nouvelles vidéos uniquement).
+        new_subjects = [SubjectForum(nom=f'Sujet {index} : {rng.choice(SUBJECTS)}'[:50],
+                                     author=f'auteur{rng.randrange(100)}') for index in range(subjects)]
+        db.session.add_all(new_subjects)
+        db.session.flush()
+        subject_ids = [subject.id for subject in new_subjects]
+        video_ids = [video_id for video_id, in db.session.query(Video.id).filter(Video.id > last_video_id)]
+
+        def add_comments(model, key, parent_ids):
+            added = []
+            for parent_id in parent_ids:
+                for _ in range(rng.randrange(comments * 2 + 1)):
+                    comment = model(comment_content=sentence(rng, 30), **{key: parent_id},
+                                    comment_date=LATEST - timedelta(minutes=rng.randrange(500000)))
+                    db.session.add(comment)
+                    added.append(comment)
+            db.session.flush()
+            return added
+
+        def add_replies(model, comment_list):
+            count = 0
+            for comment in comment_list:
+                for _ in range(rng.randrange(replies * 2 + 1)):
+                    db.session.add(model(reply_content=sentence(rng), comment_id=comment.id,
+                                         reply_date=comment.comment_date + timedelta(hours=rng.randrange(1, 72))))
+                    count += 1
+            return count
+
+        subject_comments = add_comments(CommentSubject, 'subject_id', subject_ids)
+        video_comments = add_comments(CommentVideo, 'video_id', video_ids)
+        subject_replies = add_replies(ReplySubject, subject_comments)
+        video_replies = add_replies(ReplyVideo, video_comments)
+        db.session.commit()
+
+        # Index de recherche, tags normalisés et vidéos similaires, comme après une synchronisation.
+        sync_index()
+        sync_tags()
+        compute_related_videos()
+        mark_synced()
+
+        return {'video': Video.query.count(), 'subject_forum': len(subject_ids),
+                'comment_subject': len(subject_comments), 'comment_video': len(video_comments),
+                'reply_subject': subject_replies, 'reply_video': video_replies}
@@ -0,0 +1,311 @@
+"""Ce script vérifie le nombre de requêtes SQL et d'objets chargés par chaque route, à deux volumes de données.
+
+Une application hors ligne (voir donnees_test.py, caches des pages et des fragments désactivés) est remplie avec
+--petit vidéos, puis chaque route des blueprints (frontend, user, admin, chat, functional, auth) et de main.py est
+appelée sous query_budget() ; la base est ensuite complétée jusqu'à --grand vidéos et les routes appelées de nouveau.
+
+Pour chaque route, BUDGETS déclare le nombre maximal de requêtes SQL et d'objets ORM chargés (lignes matérialisées,
+comptées par app.memory_diagnostics). Le script échoue (code 1) si :
+    - une route dépasse son budget à l'un des deux volumes ;
+    - le nombre de requêtes SQL ou d'objets chargés d'une route augmente avec le volume de données ;
+    - une route n'a ni budget ni motif d'exclusion (SKIPPED) : toute nouvelle route doit déclarer son budget.
+
+Le nombre de requêtes SQL de chaque route est toujours borné. Seules les routes qui affichent une table entière
+(listes à paginer) ont un budget d'objets à None : leur nombre d'objets chargés croît avec les données et est
+signalé « proportionnels » à chaque exécution, sans faire échouer le script.
+
+Exemples d'utilisation :
+    python Fonctions_Admin/verif_budgets_requetes.py
+    python Fonctions_Admin/verif_budgets_requetes.py --petit 100 --grand 2000
+    python Fonctions_Admin/verif_budgets_requetes.py --releve
+"""
+import os
+import sys
+import logging
+import argparse
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, parent_dir)
+
+from Fonctions_Admin.donnees_test import create_offline_app, generate
+
+# Blueprints dont toutes les routes doivent avoir un budget (les routes sans blueprint de main.py aussi).
+BLUEPRINTS = ('frontend', 'user', 'admin', 'chat', 'functional', 'auth', None)
+
+# Routes appelées, dans l'ordre (les suppressions en dernier) : route, méthode, URL et données (fonctions des
+# identifiants présents en base), accès administrateur et codes HTTP attendus. Les pages lues portent sur les
+# premières lignes de chaque table, identiques aux deux volumes ; les écritures et suppressions sur les dernières.
+ROUTES = [
+    ('landing_page', 'GET', lambda ids: '/', None, False, (200,)),
+    ('favicon', 'GET', lambda ids: '/favicon.ico', None, False, (200,)),
+    ('sitemap', 'GET', lambda ids: '/sitemap.xml', None, False, (200,)),
+    ('sitemap_page', 'GET', lambda ids: '/sitemap-1.xml', None, False, (200, 404)),
+    ('frontend.show_videos', 'GET', lambda ids: '/frontend/acces-videos', None, False, (200,)),
+    ('frontend.show_archived_videos', 'GET', lambda ids: f"/frontend/video/archives/{ids['archive']}", None, False,
+     (200,)),
+    ('frontend.display_video', 'GET', lambda ids: f"/frontend/affichage-video/{ids['video']}", None, False, (200,)),
+    ('frontend.video_stats', 'GET', lambda ids: f"/frontend/api/videos/{ids['video']}/statistiques", None, False,
+     (200,)),
+    ('frontend.video_facets', 'GET', lambda ids: '/frontend/api/videos/facettes?tag=jardin', None, False, (200,)),
+    ('frontend.video_tag_cloud', 'GET', lambda ids: '/frontend/api/videos/nuage-tags', None, False, (200,)),
+    ('frontend.search_results', 'GET', lambda ids: '/frontend/recherche?q=tondeuse', None, False, (200,)),
+    ('frontend.show_popular_videos', 'GET', lambda ids: '/frontend/popular_videos', None, False, (200,)),
+    ('frontend.thumbnail_file', 'GET', lambda ids: '/frontend/miniatures/absente-320.webp', None, False, (404,)),
+    ('frontend.forum', 'GET', lambda ids: '/frontend/acces-forum', None, False, (200,)),
+    ('frontend.forum_subject', 'GET', lambda ids: f"/frontend/acces-sujet-forum/{ids['subject']}", None, False,
+     (200,)),
+    ('functional.politique', 'GET', lambda ids: '/functional/Politique-de-confidentialite', None, False, (200,)),
+    ('functional.mentions', 'GET', lambda ids: '/functional/mentions-legales', None, False, (200,)),
+    ('functional.informations', 'GET', lambda ids: '/functional/informations', None, False, (200,)),
+    ('auth.admin_connection', 'GET', lambda ids: '/auth/authentification-administrateur', None, False, (200,)),
+    ('auth.login_admin', 'GET', lambda ids: '/auth/connexion-administrateur', None, False, (200,)),
+    ('chat.ask_user_visio', 'GET', lambda ids: '/chat/demande-visio', None, False, (200,)),
+    ('chat.send_visio', 'POST', lambda ids: '/chat/Envoi-demande-visio',
+     lambda ids: {'email': 'visiteur@example.com'}, False, (200, 302)),
+    ('user.add_subject_forum', 'POST', lambda ids: '/user/forum/creation-sujet',
+     lambda ids: {'nom': 'Sujet du contrôle des budgets'}, False, (200,)),
+    ('user.comment_subject', 'POST', lambda ids: '/user/forum/commentaires-sujet',
+     lambda ids: {'subject_id': ids['last_subject'], 'comment_content': 'Commentaire du contrôle'}, False, (302,)),
+    ('user.comment_video', 'POST', lambda ids: '/user/commentaires-video',
+     lambda ids: {'video_id': ids['last_video'], 'comment_content': 'Commentaire du contrôle'}, False, (302,)),
+    ('user.reply_form_subject', 'GET', lambda ids: f"/user/comment{ids['comment_subject']}/reply_form_subject", None,
+     False, (200,)),
+    ('user.comment_replies_subject', 'POST', lambda ids: f"/user/comment{ids['last_comment_subject']}/reply_subject",
+     lambda ids: {'reply_content': 'Réponse du contrôle', 'comment_id': ids['last_comment_subject']}, False,
+     (200, 302)),
+    ('user.reply_form_video', 'GET', lambda ids: f"/user/comment{ids['comment_video']}/reply_form_video", None,
+     False, (200,)),
+    ('user.comment_replies_video', 'POST', lambda ids: f"/user/comment_replies_video/{ids['last_comment_video']}",
+     lambda ids: {'reply_content': 'Réponse du contrôle', 'comment_id': ids['last_comment_video']}, False,
+     (200, 302)),
+    ('admin.back_end', 'GET', lambda ids: '/admin/backend', None, True, (200,)),
+    ('admin.cache_statistics', 'GET', lambda ids: '/admin/backend/statistiques-cache', None, True, (200,)),
+    ('admin.metrics', 'GET', lambda ids: '/admin/backend/metriques', None, True, (200,)),
+    ('admin.profiles', 'GET', lambda ids: '/admin/backend/profils', None, True, (200,)),
+    ('admin.profile_file', 'GET', lambda ids: '/admin/backend/profils/absent.folded', None, True, (404,)),
+    ('admin.memory', 'GET', lambda ids: '/admin/backend/memoire', None, True, (200,)),
+    ('admin.videos_list', 'GET', lambda ids: '/admin/backend/liste-vidéos', None, True, (200,)),
+    ('admin.list_subject_forum', 'GET', lambda ids: '/admin/backend/liste-sujets-forum', None, True, (200,)),
+    ('admin.add_subject_forum_back', 'POST', lambda ids: '/admin/backend/ajouter-sujet',
+     lambda ids: {'nom': 'Sujet administrateur'}, True, (200, 302)),
+    ('admin.list_comments_forum', 'GET', lambda ids: '/admin/backend/liste-commentaire-forum', None, True, (200,)),
+    ('admin.list_comments_video', 'GET', lambda ids: '/admin/backend/liste-commentaire-video', None, True, (200,)),
+    ('chat.send_user_link', 'POST', lambda ids: f"/chat/envoi-lien-utilisateur/{ids['last_visio']}",
+     lambda ids: {'visio_link': 'https://visio.example.com/salle'}, True, (302,)),
+    ('admin.suppress_video_comment', 'POST', lambda ids: f"/admin/backend/supprimer-commentaires-video/"
+                                                         f"{ids['last_comment_video']}", None, True, (302,)),
+    ('admin.suppress_subject_comment', 'POST', lambda ids: f"/admin/backend/supprimer-commentaires-sujets/"
+                                                           f"{ids['last_comment_subject']}", None, True, (302,)),
+    ('admin.suppress_subject', 'POST', lambda ids: f"/admin/backend/supprimer_sujet/{ids['last_subject']}", None,
+     True, (302,)),
+    ('admin.suppress_visio', 'POST', lambda ids: f"/admin/backend/supprimer-demande-visio/{ids['last_visio']}", None,
+     True, (302,)),
+    ('auth.logout_admin', 'GET', lambda ids: '/auth/backend/déconnexion-administrateur', None, True, (302,)),
+]
+
+# Routes non appelées, avec leur motif.
+SKIPPED = {
+    'static': "fichiers statiques, sans base de données",
+    'chat.chat_video_session_admin': "appel de l'API Whereby (réseau)",
+    'admin.visio_display': "appel de l'API Whereby (réseau) ; le gabarit lit Visio.date, absent du modèle",
+}
+
+# Budgets : route -> (requêtes SQL, objets ORM chargés). Le nombre de requêtes est toujours borné ; un nombre
+# d'objets à None croît avec les données (liste complète d'une table) : la croissance est signalée sans faire
+# échouer le contrôle.
+BUDGETS = {
+    # Pages publiques.
+    'landing_page': (2, None),
+    'favicon': (0, 0),
+    'sitemap': (5, 0),
+    'sitemap_page': (2, 0),
+    'frontend.show_videos': (5, None),
+    'frontend.show_archived_videos': (1, None),
+    'frontend.display_video': (5, 30),
+    'frontend.video_stats': (2, 2),
+    'frontend.video_facets': (0, 0),
+    'frontend.video_tag_cloud': (0, 0),
+    'frontend.search_results': (0, 0),
+    'frontend.show_popular_videos': (1, 50),
+    'frontend.thumbnail_file': (0, 0),
+    'frontend.forum': (1, None),
+    'frontend.forum_subject': (4, 25),
+    'functional.politique': (0, 0),
+    'functional.mentions': (0, 0),
+    'functional.informations': (0, 0),
+    'auth.admin_connection': (0, 0),
+    'auth.login_admin': (0, 0),
+    'auth.logout_admin': (0, 0),
+
+    # Formulaires des visiteurs.
+    'chat.ask_user_visio': (0, 0),
+    'chat.send_visio': (1, 0),
+    'user.add_subject_forum': (3, None),
+    'user.comment_subject': (2, 0),
+    'user.comment_video': (2, 0),
+    'user.reply_form_subject': (1, 1),
+    'user.comment_replies_subject': (4, 2),
+    'user.reply_form_video': (1, 1),
+    'user.comment_replies_video': (4, 2),
+
+    # Administration. Les listes de vidéos et de commentaires chargent toute la table (à paginer).
+    'admin.back_end': (1, 0),
+    'admin.cache_statistics': (0, 0),
+    'admin.metrics': (0, 0),
+    'admin.profiles': (0, 0),
+    'admin.profile_file': (0, 0),
+    'admin.memory': (0, 0),
+    'admin.videos_list': (1, None),
+    'admin.list_subject_forum': (1, 0),
+    'admin.add_subject_forum_back': (3, 0),
+    'admin.list_comments_forum': (1, None),
+    'admin.list_comments_video': (1, None),
+    'chat.send_user_link': (1, 1),
+    'admin.suppress_video_comment': (4, 2),
+    'admin.suppress_subject_comment': (4, 2),
+    'admin.suppress_subject': (3, 1),
+    'admin.suppress_visio': (2, 1),
+}
+
+
+def sample_ids(app):
+    """
+    Renvoie les premiers et derniers identifiants de chaque table utilisée dans les URL, et le mois d'archives le plus
+    ancien.
+    """
+    from app.Models import db
+    from app.Models.videos import Video
+    from app.Models.visio import Visio
+    from app.Models.subject_forum import SubjectForum
+    from app.Models.comment_subject import CommentSubject
+    from app.Models.comment_video import CommentVideo
+    from app.utils_videos import MONTH_NAMES
+
+    ids = {}
+    with app.app_context():
+        for name, model in (('video', Video), ('subject', SubjectForum), ('visio', Visio),
+                            ('comment_subject', CommentSubject), ('comment_video', CommentVideo)):
+            first, last = db.session.query(db.func.min(model.id), db.func.max(model.id)).one()
+            ids[name], ids[f'last_{name}'] = first or 0, last or 0
+        published_at = db.session.query(db.func.min(Video.published_at)).scalar()
+        ids['archive'] = f"{MONTH_NAMES[published_at.month]} {published_at.year}" if published_at else 'Janvier 2024'
+        db.session.remove()
+    return ids
+
+
+def measure_routes(app):
+    """
+    Appelle chaque route et compte ses requêtes SQL et les objets ORM chargés.
+
+    :return: Dictionnaire {route: (requêtes SQL, objets chargés, code HTTP attendu ou non, message d'erreur)}.
+    """
+    from app.query_monitor import query_budget, QueryBudgetExceeded
+    from app.memory_diagnostics import identity_map_stats
+
+    results = {}
+    client = app.test_client()
+    for endpoint, method, url, data, admin, expected in ROUTES:
+        ids = sample_ids(app)
+        with client.session_transaction() as session:
+            if admin:
+                session['role'] = 'Admin'
+            else:
+                session.pop('role', None)
+
+        # Route sans budget : mesurée sans limite, puis signalée par check().
+        budget = BUDGETS.get(endpoint, (float('inf'), None))[0]
+        error = None
+        status = None
+        try:
+            with query_budget(budget, endpoint) as statements:
+                response = client.open(url(ids), method=method, data=data(ids) if data else None)
+                status = response.status_code
+                response.close()
+        except QueryBudgetExceeded as e:
+            error = str(e)
+        except Exception as e:
+            # Les exceptions des routes sont propagées (PROPAGATE_EXCEPTIONS) : la route est en erreur.
+            error = f"{endpoint} : {e.__class__.__name__} : {e}"
+
+        loaded = next((stats['loaded'] for stats in identity_map_stats() if stats['endpoint'] == endpoint), 0)
+        results[endpoint] = (len(statements), loaded, status in expected, error)
+    return results
+
+
+def check(small, large):
+    """
+    Compare les mesures aux budgets et entre les deux volumes.
+
+    :return: Liste des problèmes trouvés.
+    """
+    problems = []
+    print(f"{'Route':<34} {'SQL':>9} {'objets':>13}  budget")
+    for endpoint, _, _, _, _, _ in ROUTES:
+        queries_small, loaded_small, ok_small, error_small = small[endpoint]
+        queries_large, loaded_large, ok_large, error_large = large[endpoint]
+        max_queries, max_loaded = BUDGETS.get(endpoint, (None, None))
+        status = []
+        if endpoint not in BUDGETS:
+            problems.append(f"{endpoint} : aucun budget déclaré")
+            status.append('SANS BUDGET')
+        if not (ok_small and ok_large):
+            problems.append(f"{endpoint} : code HTTP inattendu")
+            status.append('CODE HTTP')
+        for scale, error in (('petit', error_small), ('grand', error_large)):
+            if error:
+                problems.append(f"{scale} volume : {error}")
+                label = 'SQL' if 'requêtes SQL pour un budget' in error else 'ERREUR'
+                if label not in status:
+                    status.append(label)
+        if max_loaded is not None and max(loaded_small, loaded_large) > max_loaded:
+            problems.append(f"{endpoint} : {max(loaded_small, loaded_large)} objets chargés pour un budget de "
+                            f"{max_loaded}")
+            status.append('OBJETS')
+        if queries_large > queries_small:
+            problems.append(f"{endpoint} : {queries_small} puis {queries_large} requêtes SQL, le nombre de requêtes "
+                            f"croît avec les données")
+            status.append('SQL CROISSANT')
+        if loaded_large > loaded_small:
+            if max_loaded is None and endpoint in BUDGETS:
+                status.append('objets proportionnels')
+            else:
+                problems.append(f"{endpoint} : {loaded_small} puis {loaded_large} objets chargés, le nombre d'objets "
+                                f"croît avec les données")
+                status.append('OBJETS CROISSANTS')
+        budget = f"{max_queries} / {'N' if max_loaded is None else max_loaded}" if endpoint in BUDGETS else '-'
+        print(f"{endpoint:<34} {queries_small:>4}{queries_large:>5} {loaded_small:>6}{loaded_large:>7}  {budget:<10} "
+              f"{' '.join(status) or 'OK'}")
+    return problems
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Contrôle des requêtes SQL et des objets chargés par route.")
+    parser.add_argument('--petit', type=int, default=50, help="Nombre de vidéos du petit volume.")
+    parser.add_argument('--grand', type=int, default=500, help="Nombre de vidéos du grand volume.")
+    parser.add_argument('--releve', action='store_true', help="Affiche les mesures sans échouer.")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = create_offline_app(cache=False)
+    logging.getLogger().setLevel(logging.ERROR)
+
+    # Toute route des blueprints contrôlés doit être appelée ou explicitement exclue.
+    called = {route[0] for route in ROUTES}
+    missing = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+                     if (rule.endpoint.rpartition('.')[0] or None) in BLUEPRINTS
+                     and rule.endpoint not in called and rule.endpoint not in SKIPPED)
+
+    # Le volume de chaque table suit le nombre de vidéos (un sujet du forum pour dix vidéos).
+    generate(app, videos=args.petit, subjects=max(args.petit // 10, 1))
+    small = measure_routes(app)
+    generate(app, videos=args.grand, subjects=max((args.grand - args.petit) // 10, 1))
+    large = measure_routes(app)
+
+    problems = check(small, large) + [f"{endpoint} : route ni appelée ni exclue" for endpoint in missing]
+    for problem in problems:
+        print(f"ÉCHEC {problem}")
+    if problems and not args.releve:
+        sys.exit(1)
@@ -0,0 +1,105 @@
+"""Ce script vérifie la chaîne de traitement des miniatures sans accès à YouTube.
+
+Un petit serveur HTTP local sert une fausse miniature 4:3 à bandes noires (comme 'sddefault.jpg' de YouTube) ;
+le script la télécharge avec fetch_thumbnail() dans un dossier temporaire, puis contrôle :
+    - les largeurs produites (jamais agrandies) et le format 16:9 des fichiers WebP ;
+    - le nom des fichiers (empreinte du contenu) et la réutilisation des fichiers existants ;
+    - l'erreur levée pour une miniature introuvable.
+
+Exemple d'utilisation :
+    python Fonctions_Admin/verif_miniatures.py
+"""
+import io
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageDraw
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, parent_dir)
+
+from app.thumbnails import fetch_thumbnail, thumbnail_filename, FILENAME_PATTERN
+
+
+def fake_thumbnail(width=640, height=480):
+    """
+    Crée une image JPEG 4:3 contenant une image 16:9 entourée de bandes noires.
+
+    :return: Contenu JPEG.
+    """
+    image = Image.new('RGB', (width, height), 'black')
+    band = (height - width * 9 // 16) // 2
+    ImageDraw.Draw(image).rectangle((0, band, width - 1, height - band - 1), fill=(255, 140, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serveur de miniatures : '/sddefault.jpg' renvoie la fausse miniature, tout autre chemin une erreur 404.
+    """
+
+    content = fake_thumbnail()
+
+    def do_GET(self):
+        if self.path != '/sddefault.jpg':
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(self.content)))
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, *args):
+        pass
+
+
+def check(condition, message):
+    """
+    Affiche le résultat d'une vérification et arrête le script en cas d'échec.
+    """
+    print(f"{'OK ' if condition else 'ÉCHEC'} {message}")
+    if not condition:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    folder = tempfile.mkdtemp(prefix='miniatures-')
+
+    try:
+        digest, widths = fetch_thumbnail(f'{base_url}/sddefault.jpg', folder, (320, 480, 640, 1280))
+        check(widths == [320, 480, 640], f"largeurs produites sans agrandissement : {widths}")
+        for width in widths:
+            name = thumbnail_filename(digest, width)
+            check(FILENAME_PATTERN.match(name) is not None, f"nom de fichier servi par la route : {name}")
+            with Image.open(os.path.join(folder, name)) as image:
+                check(image.format == 'WEBP' and image.size == (width, width * 9 // 16),
+                      f"{name} : {image.format} {image.size[0]} x {image.size[1]}")
+                # Les bandes noires ont été supprimées : le haut de l'image est orange.
+                red, green, _ = image.convert('RGB').getpixel((width // 2, 1))
+                check(red > 200 and green > 100, f"{name} : bandes noires supprimées")
+
+        files = sorted(os.listdir(folder))
+        again = fetch_thumbnail(f'{base_url}/sddefault.jpg', folder, (320, 480, 640, 1280))
+        check(again == (digest, widths) and sorted(os.listdir(folder)) == files,
+              "même contenu : fichiers existants réutilisés")
+
+        try:
+            fetch_thumbnail(f'{base_url}/absente.jpg', folder, (320,))
+            check(False, "miniature introuvable : erreur levée")
+        except Exception as e:
+            check(True, f"miniature introuvable : erreur levée ({e.__class__.__name__})")
+    finally:
+        server.shutdown()
+        shutil.rmtree(folder, ignore_errors=True)
@@ -0,0 +1,80 @@
+"""Ce script vérifie que le sitemap ne liste que des pages publiques valides, sans serveur.
+
+Une application hors ligne (voir donnees_test.py) est remplie de données synthétiques, puis chaque URL du sitemap
+est appelée ; le script échoue (code 1) si une URL :
+    - ne répond pas 200 ;
+    - est interdite par une règle Disallow de robots.txt (préfixe de chemin, ou '/*?*' pour les paramètres).
+
+Exemple d'utilisation :
+    python Fonctions_Admin/verif_sitemap.py
+"""
+import os
+import sys
+import logging
+
+from urllib.parse import urlsplit
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, parent_dir)
+
+from Fonctions_Admin.donnees_test import create_offline_app, generate
+from Fonctions_Admin.verif_miniatures import check
+
+
+def disallowed_rules(path):
+    """
+    Lit les règles Disallow de robots.txt (commentaires retirés).
+
+    :param path: Chemin du fichier robots.txt.
+    :return: Liste des chemins interdits.
+    """
+    rules = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            field, _, value = line.split('#', 1)[0].partition(':')
+            if field.strip().lower() == 'disallow' and value.strip():
+                rules.append(value.strip())
+    return rules
+
+
+def is_disallowed(url, rules):
+    """
+    Indique si une URL est interdite par l'une des règles.
+
+    :param url: URL absolue.
+    :param rules: Règles Disallow.
+    :return: Règle correspondante, ou None.
+    """
+    parts = urlsplit(url)
+    for rule in rules:
+        if rule == '/*?*':
+            if parts.query:
+                return rule
+        elif parts.path.startswith(rule):
+            return rule
+    return None
+
+
+if __name__ == '__main__':
+    logging.disable(logging.WARNING)
+    app = create_offline_app(cache=False)
+    generate(app, videos=60, subjects=5, comments=2, replies=1, seed=3)
+
+    from app.sitemap import iter_sitemap_entries
+
+    with app.test_request_context():
+        urls = [loc for loc, _ in iter_sitemap_entries()]
+    check(urls, f"{len(urls)} URL(s) dans le sitemap")
+
+    rules = disallowed_rules(os.path.join(parent_dir, 'robots.txt'))
+    client = app.test_client()
+    failures = 0
+    for url in urls:
+        parts = urlsplit(url)
+        status = client.get(parts.path, query_string=parts.query).status_code
+        rule = is_disallowed(url, rules)
+        if status != 200 or rule:
+            failures += 1
+            print(f"ÉCHEC {url} : code {status}" + (f", interdite par 'Disallow: {rule}'" if rule else ''))
+    check(not failures, "toutes les URL répondent 200 et sont autorisées par robots.txt")
\ No newline at end of file
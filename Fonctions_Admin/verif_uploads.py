@@ -0,0 +1,104 @@
+"""Ce script vérifie l'enregistrement des fichiers téléchargés (app/uploads.py) sans serveur.
+
+Des fichiers sont construits en mémoire puis passés à save_upload() dans un dossier temporaire ; le script contrôle :
+    - l'enregistrement des images, PDF et documents Word valides sous le nom de leur empreinte, et les miniatures
+      des images produites en arrière-plan ;
+    - la déduplication de deux envois identiques ;
+    - le refus d'un contenu qui ne correspond pas à l'extension (PNG nommé .pdf, PDF nommé .jpg) ;
+    - le refus d'une archive ZIP quelconque nommée .docx ;
+    - le refus d'un fichier vide, d'une extension interdite et d'un fichier trop volumineux.
+
+Exemple d'utilisation :
+    python Fonctions_Admin/verif_uploads.py
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+
+from flask import Flask
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Chemin absolu du répertoire parent (racine du projet).
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, parent_dir)
+
+from app.uploads import save_upload, IMAGE_WIDTHS
+from Fonctions_Admin.verif_miniatures import check
+
+
+def image_bytes(kind):
+    """
+    Crée une petite image PNG ou JPEG.
+    """
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), (255, 140, 0)).save(buffer, 'PNG' if kind == 'png' else 'JPEG')
+    return buffer.getvalue()
+
+
+def zip_bytes(names):
+    """
+    Crée une archive ZIP contenant les fichiers indiqués.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name in names:
+            archive.writestr(name, 'contenu')
+    return buffer.getvalue()
+
+
+def upload(content, filename, max_size=None):
+    """
+    Enregistre un fichier construit en mémoire.
+
+    :return: Chemin relatif du fichier, ou nom de l'exception levée.
+    """
+    try:
+        return save_upload(FileStorage(io.BytesIO(content), filename=filename), max_size=max_size)
+    except (ValueError, RequestEntityTooLarge) as e:
+        return e.__class__.__name__
+
+
+if __name__ == '__main__':
+    folder = tempfile.mkdtemp(prefix='uploads-')
+    app = Flask(__name__)
+    app.config.update(UPLOAD_FOLDER=folder, MAX_CONTENT_LENGTH=1024 * 1024)
+
+    docx = zip_bytes(['[Content_Types].xml', 'word/document.xml'])
+    pdf = b'%PDF-1.4\n%%EOF\n'
+    try:
+        with app.app_context():
+            for content, filename, kind in ((image_bytes('png'), 'photo.png', 'png'),
+                                            (image_bytes('jpg'), 'photo.jpeg', 'jpg'),
+                                            (pdf, 'document.pdf', 'pdf'),
+                                            (docx, 'lettre.docx', 'docx')):
+                path = upload(content, filename)
+                check(path.endswith(f'.{kind}') and os.path.exists(os.path.join(folder, path)),
+                      f"{filename} enregistré : {path}")
+                if kind in ('png', 'jpg'):
+                    root, ext = os.path.splitext(os.path.join(folder, path))
+                    expected = [f'{root}_{width}{ext}' for width in IMAGE_WIDTHS]
+                    # Redimensionnement en arrière-plan : attente de quelques secondes au plus.
+                    deadline = time.monotonic() + 5
+                    while not all(map(os.path.exists, expected)) and time.monotonic() < deadline:
+                        time.sleep(0.05)
+                    check(all(map(os.path.exists, expected)), f"{filename} : miniatures {IMAGE_WIDTHS} produites")
+
+            check(upload(pdf, 'copie.pdf') == upload(pdf, 'document.pdf'), "même contenu : un seul fichier")
+            check(upload(image_bytes('png'), 'faux.pdf') == 'ValueError', "PNG nommé .pdf refusé")
+            check(upload(pdf, 'faux.jpg') == 'ValueError', "PDF nommé .jpg refusé")
+            check(upload(zip_bytes(['script.sh']), 'archive.docx') == 'ValueError', "archive ZIP nommée .docx refusée")
+            check(upload(docx, 'lettre.pdf') == 'ValueError', "document Word nommé .pdf refusé")
+            check(upload(b'', 'vide.pdf') == 'ValueError', "fichier vide refusé")
+            check(upload(pdf, 'script.exe') == 'ValueError', "extension interdite refusée")
+            check(upload(pdf + b'0' * 2048, 'gros.pdf', max_size=1024) == 'RequestEntityTooLarge',
+                  "fichier trop volumineux refusé")
+            check(not [name for name in os.listdir(folder) if name.startswith('.upload-')],
+                  "aucun fichier temporaire restant")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
@@ -8,13 +8,15 @@ from datetime import datetime
 
 from app.Admin import admin_bp
 
-from flask import render_template, url_for, redirect, flash
+from flask import render_template, url_for, redirect, flash, jsonify, current_app, send_from_directory, abort
 
 from markupsafe import escape
 
+from sqlalchemy.orm import joinedload, load_only
+
 from app.Models import db
 from app.Models.forms import  SuppressSubject, NewSubjectForumForm, \
-SuppressCommentSubjectForm, SuppressCommentVideoAdminForm, FormSuppressVisio, UserLink
+SuppressCommentSubjectForm, SuppressCommentVideoAdminForm, FormSuppressVisio, UserLink, MemoryDiagnosticsForm
 
 from app.Models.admin import Admin
 from app.Models.subject_forum import SubjectForum
@@ -24,7 +26,13 @@ from app.Models.comment_video import CommentVideo
 from app.Models.visio import Visio
 
 from app.extensions import create_whereby_meeting_admin
+from app.search import index_subject, remove_document, KIND_SUBJECT, KIND_COMMENT_SUBJECT, KIND_COMMENT_VIDEO
 from app.decorators import admin_required
+from app.cache import cache_stats
+from app.metrics import metrics_text
+from app.profiler import list_captures, profile_token, profiler_folder, CAPTURE_PATTERN, PROFILE_HEADER, PROFILE_ARG
+from app.memory_diagnostics import start_tracing, stop_tracing, take_snapshot, tracing_status, top_allocations, \
+    snapshot_diff, identity_map_stats, orm_object_counts, rss_history, current_rss
 
 
 # Route permettant d'accéder au backend.
@@ -47,6 +55,103 @@ def back_end():
     return render_template("backend/backend.html", admin=admin, logged_in=True)
 
 
+# Route permettant de consulter les statistiques du cache des pages.
+@admin_bp.route('/backend/statistiques-cache')
+@admin_required
+def cache_statistics():
+    """
+    Renvoie les statistiques du cache des pages au format JSON.
+
+    Returns:
+        Response: JSON contenant le stockage utilisé, le nombre d'entrées, et les succès, échecs, écritures et
+                  invalidations du processus courant.
+    """
+    return jsonify(cache_stats())
+
+
+# Route permettant de consulter les mesures de performance des requêtes.
+@admin_bp.route('/backend/metriques')
+@admin_required
+def metrics():
+    """
+    Renvoie les mesures des requêtes du processus courant au format texte de Prometheus : temps de réponse par route
+    (histogramme), nombre de requêtes par code HTTP, temps SQL, nombre de requêtes SQL, temps de rendu des gabarits,
+    et fonctionnement du pool de connexions à la base de données.
+
+    Returns:
+        Response: Texte au format d'exposition Prometheus.
+    """
+    return current_app.response_class(metrics_text(current_app), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Route permettant de consulter les profils des requêtes.
+@admin_bp.route('/backend/profils')
+@admin_required
+def profiles():
+    """
+    Affiche la liste des profils de requêtes enregistrés et un jeton permettant de profiler une requête à la demande.
+
+    Returns:
+        Response: Le rendu du modèle HTML 'backend/profiles.html'.
+    """
+    return render_template('backend/profiles.html', captures=list_captures(), token=profile_token(),
+                           header=PROFILE_HEADER, arg=PROFILE_ARG,
+                           token_max_age=current_app.config.get('PROFILER_TOKEN_MAX_AGE', 3600) // 60)
+
+
+# Route permettant de télécharger un profil de requête.
+@admin_bp.route('/backend/profils/<name>')
+@admin_required
+def profile_file(name):
+    """
+    Renvoie un profil enregistré : piles agrégées (.folded) ou statistiques cProfile (.pstats).
+
+    Args:
+        name (str): Nom du fichier.
+
+    Returns:
+        Response: Fichier à télécharger.
+    """
+    if not CAPTURE_PATTERN.match(name):
+        abort(404)
+    return send_from_directory(profiler_folder(), name, as_attachment=True)
+
+
+# Route permettant de diagnostiquer la consommation mémoire du processus.
+@admin_bp.route('/backend/memoire', methods=['GET', 'POST'])
+@admin_required
+def memory():
+    """
+    Affiche les diagnostics mémoire du processus courant : RSS et son historique, objets chargés et taille de
+    l'identity map de la session par route, objets ORM vivants par modèle et, si tracemalloc est démarré, principales lignes d'allocation
+    et différence entre les deux derniers instantanés. Le formulaire démarre ou arrête tracemalloc et prend un
+    instantané.
+
+    Returns:
+        Response: Le rendu du modèle HTML 'backend/memory.html', ou une redirection vers cette page après une action.
+    """
+    form = MemoryDiagnosticsForm()
+
+    if form.validate_on_submit():
+        action = form.action.data
+        if action == 'start':
+            start_tracing(current_app.config.get('MEMORY_TRACE_FRAMES', 10))
+            flash("Le suivi des allocations est démarré.")
+        elif action == 'stop':
+            stop_tracing()
+            flash("Le suivi des allocations est arrêté.")
+        elif take_snapshot(current_app.config.get('MEMORY_MAX_SNAPSHOTS', 5)) is None:
+            flash("Le suivi des allocations doit être démarré avant de prendre un instantané.", 'error')
+        else:
+            flash("Instantané enregistré.")
+        return redirect(url_for('admin.memory'))
+
+    limit = current_app.config.get('MEMORY_TOP_ALLOCATIONS', 20)
+    return render_template('backend/memory.html', form=form, rss=current_rss(), rss_history=rss_history(),
+                           status=tracing_status(), allocations=top_allocations(limit), diff=snapshot_diff(limit),
+                           identity_maps=identity_map_stats(), objects=orm_object_counts())
+
+
 # Route permettant d'afficher la liste de toutes les vidéos.
 @admin_bp.route('/backend/liste-vidéos')
 @admin_required
@@ -133,6 +238,9 @@ def add_subject_forum_back():
         db.session.add(subject_forum)
         db.session.commit()
 
+        # Indexation du sujet pour la recherche.
+        index_subject(subject_forum)
+
     subjects = db.session.query(SubjectForum.id, SubjectForum.nom, SubjectForum.author).all()
 
     subject_data = [
@@ -175,6 +283,8 @@ def suppress_subject(id):
         db.session.delete(subject)
         # Validation de l'action.
         db.session.commit()
+        # Retrait du sujet de l'index de recherche.
+        remove_document(KIND_SUBJECT, id)
         flash("Le sujet a été supprimé avec succès." + " " + datetime.now().strftime(" le %d-%m-%Y à %H:%M:%S"))
     else:
         # Message d'erreur si le sujet n'est pas trouvé.
@@ -204,8 +314,9 @@ def list_comments_forum():
     # Instanciation du formulaire
     suppressform = SuppressCommentSubjectForm()
     
-    # Récupération de tous les commentaires.
-    comments = CommentSubject.query.all()
+    # Récupération de tous les commentaires, avec le nom de leur sujet dans la même requête.
+    comments = CommentSubject.query.options(
+        joinedload(CommentSubject.subject).load_only(SubjectForum.id, SubjectForum.nom)).all()
     
     return render_template('backend/users_subject_comments.html', comments=comments, suppressform=suppressform)
 
@@ -236,6 +347,8 @@ def suppress_subject_comment(id):
         db.session.delete(comment)
         # Validation de l'action.
         db.session.commit()
+        # Retrait du commentaire de l'index de recherche.
+        remove_document(KIND_COMMENT_SUBJECT, id)
         flash("Le commentaire du forum a été supprimé avec succès." + " "
               + datetime.now().strftime(" le %d-%m-%Y à %H:%M:%S"))
     else:
@@ -265,8 +378,9 @@ def list_comments_video():
     # instanciation du formulaire.
     suppressform = SuppressCommentVideoAdminForm()
     
-    # Récupération de ltous les commentaires de la section vidéo.
-    comments = CommentVideo.query.all()
+    # Récupération de tous les commentaires de la section vidéo, avec le titre de leur vidéo dans la même requête.
+    comments = CommentVideo.query.options(
+        joinedload(CommentVideo.video).load_only(Video.id, Video.title)).all()
     
     return render_template('backend/users_video_comments.html', suppressform=suppressform, comments=comments)
 
@@ -300,6 +414,9 @@ def suppress_video_comment(id):
     db.session.delete(comment)
     db.session.commit()
 
+    # Retrait du commentaire de l'index de recherche.
+    remove_document(KIND_COMMENT_VIDEO, id)
+
     flash(f"Le commentaire a été supprimé avec succès le {datetime.now().strftime('%d-%m-%Y à %H:%M:%S')}", 'success')
     
     # Fermeture de la session.
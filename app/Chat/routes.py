@@ -4,7 +4,7 @@ Code permettant de gérer les routes concernant la vision du blog.
 
 from app.Chat import chat_bp
 
-from flask import render_template, flash, redirect, url_for
+from flask import render_template, flash, redirect, url_for, current_app
 
 from app import db
 
@@ -142,7 +142,7 @@ def chat_video_session_admin():
 
     if admin_room_url:
         # Log pour vérifier le lien récupéré.
-        print("Admin Host Room URL:", admin_room_url)
+        current_app.logger.debug("Lien de la salle de l'administrateur généré.")
 
         # Rendu du template avec le lien admin.
         return render_template('chat/chat_session_admin.html', room_url=admin_room_url)
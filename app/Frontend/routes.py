@@ -3,6 +3,8 @@ Code permettant de définir les routes concernant les fonctions des utilisateurs
 """
 import os
 
+from datetime import date
+
 from app.Frontend import frontend_bp
 
 from flask import abort
@@ -16,10 +18,20 @@ from app.Models.videos import Video
 
 from app.Models.comment_video import CommentVideo
 
-from flask import render_template, request
+from flask import render_template, request, jsonify, current_app, send_from_directory
+from sqlalchemy.orm import selectinload, joinedload
 
 from app.utils_videos import get_videos_from_db, archived_videos, popular_videos
 
+from app.search import search
+from app.tag_index import get_tag_index
+from app.related_videos import get_related_videos
+from app.video_stats import get_video_curve
+from app.ranking import get_ranked_videos
+from app.thumbnails import thumbnail_folder, FILENAME_PATTERN
+from app.cache import cached_view
+from app.conditional import conditional_view, video_list_version, video_page_version, subject_page_version
+
 YOUTUBE_API = os.getenv('YOUTUBE_API')
 ID_CHANNEL = os.getenv('ID_CHANNEL')
 
@@ -30,6 +42,7 @@ load_dotenv()
 
 # Route permettant d'accéder au forum du blog.
 @frontend_bp.route('/acces-forum')
+@cached_view(tags=('subject_forum',))
 def forum():
     """
     Route permettant d'accéder à la page du forum du blog.
@@ -49,6 +62,8 @@ def forum():
 
 # Route pour visualiser le sujet de discussion sur un sujet en particulier.
 @frontend_bp.route('/acces-sujet-forum/<int:subject_id>', methods=['GET', 'POST'])
+@conditional_view(subject_page_version)
+@cached_view(tags=('subject_forum', 'comment_subject', 'reply_subject', 'likes_comment_subject', 'user'))
 def forum_subject(subject_id):
     """
     Route permettant d'accéder à un sujet spécifique du forum.
@@ -74,7 +89,8 @@ def forum_subject(subject_id):
         abort(404)
 
     # Récupération des commentaires associés à ce sujet.
-    comment_subject = CommentSubject.query.filter_by(subject_id=subject_id).all()
+    comment_subject = CommentSubject.query.filter_by(subject_id=subject_id) \
+        .options(selectinload(CommentSubject.replies)).all()
 
     return render_template("frontend/subject_forum.html", subject=subject, subject_id=subject_id,
                            comment_subject=comment_subject, formcomment=formcomment)
@@ -82,6 +98,8 @@ def forum_subject(subject_id):
 
 # Route permettant d'afficher toutes les vidéos de la chaîne Tititechnique avec pagination.
 @frontend_bp.route('/acces-videos')
+@conditional_view(video_list_version)
+@cached_view(tags=('video', 'tag', 'video_tag', 'video_thumbnail'))
 def show_videos():
     """
     Affiche toutes les vidéos de la chaîne Tititechnique avec pagination.
@@ -100,7 +118,25 @@ def show_videos():
     # Nombre de vidéos par page.
     per_page = 9
     # Récupération du numéro de page, par défaut 1.
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    # Tag sélectionné depuis le nuage de tags, optionnel.
+    tag = request.args.get('tag', type=str)
+
+    # Index des facettes pour le nuage de tags et le filtrage.
+    tag_index = get_tag_index()
+    tag_cloud = tag_index.tag_cloud()
+
+    if tag:
+        # Filtrage par tag à partir de l'index, seule la page affichée est lue en base.
+        mask = tag_index.filter(tags=[tag])
+        ids = tag_index.ids(mask, offset=(page - 1) * per_page, limit=per_page)
+        videos_by_id = {video.id: video
+                        for video in Video.query.options(joinedload(Video.thumbnail)).filter(Video.id.in_(ids))}
+        paginated_videos = [videos_by_id[video_id] for video_id in ids if video_id in videos_by_id]
+        total_pages = (mask.bit_count() + per_page - 1) // per_page
+
+        return render_template('frontend/videos.html', videos=paginated_videos, page=page,
+                               total_pages=total_pages, tag=tag, tag_cloud=tag_cloud)
 
     # Création d'une instance de YouTubeManager.
     videos = get_videos_from_db()
@@ -113,7 +149,91 @@ def show_videos():
     # Calcul du nombre total de pages.
     total_pages = (len(videos) + per_page - 1) // per_page
 
-    return render_template('frontend/videos.html', videos=paginated_videos, page=page,total_pages=total_pages)
+    return render_template('frontend/videos.html', videos=paginated_videos, page=page, total_pages=total_pages,
+                           tag=None, tag_cloud=tag_cloud)
+
+
+# Route renvoyant les facettes des vidéos (tags, mois, popularité) au format JSON.
+@frontend_bp.route('/api/videos/facettes')
+def video_facets():
+    """
+    Filtre les vidéos par tags, mois et popularité, et renvoie le nombre de vidéos pour chaque facette.
+
+    Les critères se combinent (intersection) : '?tag=jardin&tag=potager&mois=2024-05&popularite=populaire'.
+    Le calcul se fait entièrement dans l'index en mémoire, sans requête à la base de données.
+
+    :return: JSON contenant le nombre total de vidéos retenues, les identifiants de la page demandée
+             et les facettes.
+    """
+    # Nombre de vidéos par page.
+    per_page = min(max(request.args.get('par_page', 9, type=int), 1), 100)
+    # Récupération du numéro de page, par défaut 1.
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    tag_index = get_tag_index()
+    mask = tag_index.filter(
+        tags=request.args.getlist('tag'),
+        month=request.args.get('mois'),
+        popularity=request.args.get('popularite')
+    )
+
+    return jsonify({
+        'total': mask.bit_count(),
+        'video_ids': tag_index.ids(mask, offset=(page - 1) * per_page, limit=per_page),
+        'facets': tag_index.facets(mask),
+    })
+
+
+# Route permettant de récupérer le nuage de tags au format JSON.
+@frontend_bp.route('/api/videos/nuage-tags')
+def video_tag_cloud():
+    """
+    Renvoie le nuage des tags les plus utilisés, avec un niveau de taille pour l'affichage.
+
+    :return: JSON contenant la liste des tags.
+    """
+    return jsonify(get_tag_index().tag_cloud())
+
+
+# Route renvoyant l'historique des statistiques d'une vidéo au format JSON.
+@frontend_bp.route('/api/videos/<int:id>/statistiques')
+def video_stats(id):
+    """
+    Renvoie la courbe des vues, likes et commentaires d'une vidéo.
+
+    Le paramètre optionnel '?depuis=YYYY-MM-DD' limite la courbe aux dates postérieures.
+
+    :param id: Identifiant de la vidéo.
+    :return: JSON contenant la liste des points de la courbe.
+    """
+    video = Video.query.get_or_404(id)
+    since = request.args.get('depuis', type=date.fromisoformat)
+
+    return jsonify({
+        'video_id': video.id,
+        'title': video.title,
+        'curve': get_video_curve(video.id, since=since),
+    })
+
+
+# Route servant les miniatures des vidéos conservées localement.
+@frontend_bp.route('/miniatures/<filename>')
+def thumbnail_file(filename):
+    """
+    Sert une miniature WebP. Le nom du fichier contient l'empreinte de son contenu : il ne change jamais et peut être
+    conservé un an par les navigateurs et les proxys.
+
+    :param filename: Nom du fichier ('<empreinte>-<largeur>.webp').
+    :return: Fichier WebP.
+    """
+    if not FILENAME_PATTERN.match(filename):
+        abort(404)
+
+    response = send_from_directory(thumbnail_folder(), filename, mimetype='image/webp',
+                                   max_age=current_app.config['THUMBNAIL_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 # Route permettant de récupérer les vidéos populaires.
@@ -122,23 +242,19 @@ def show_popular_videos():
     """
     Affiche les vidéos populaires.
 
-    Cette route récupère toutes les vidéos disponibles dans la base de données, puis filtre et affiche celles qui sont
-    considérées comme populaires en utilisant une fonction dédiée.
+    Cette route lit les premières vidéos du classement configuré par POPULAR_RANKING, précalculé après chaque
+    synchronisation, en une seule requête. Tant que le classement n'a pas été calculé, les vidéos de plus de 3000 vues
+    sont affichées.
 
-    :return: Le template HTML 'popular_videos.html' rendu avec la liste des vidéos populaires.
-
-    Description:
-        - Récupère toutes les vidéos de la base de données en utilisant la fonction `get_videos_from_db`.
-        - Filtre ces vidéos pour obtenir uniquement celles considérées comme populaires en utilisant la fonction
-          `popular_videos`.
-        - Rend le template 'popular_videos.html' avec les vidéos populaires récupérées.
+    :return: Le template HTML 'frontend/popular_videos.html' rendu avec la liste des vidéos populaires.
     """
-    # Récupération des vidéos de la base de données.
-    videos = get_videos_from_db()
-    # Récupération des vidéos populaires avec la fonction popular_videos().
-    popular = popular_videos(videos)
+    # Récupération des vidéos du classement précalculé.
+    popular = get_ranked_videos(current_app.config['POPULAR_RANKING'])
+    if not popular:
+        # Classement pas encore calculé : filtrage sur le nombre de vues.
+        popular = popular_videos(get_videos_from_db())
 
-    return render_template('popular_videos.html', videos=popular)
+    return render_template('frontend/popular_videos.html', videos=popular)
 
 
 # Route permettant d'afficher les vidéos archivées.
@@ -185,8 +301,34 @@ def show_archived_videos(month_year):
                            )
 
 
+# Route permettant de rechercher dans les vidéos, les sujets et les commentaires du blog.
+@frontend_bp.route('/recherche')
+def search_results():
+    """
+    Recherche plein texte dans les titres et tags des vidéos, les sujets du forum et les commentaires.
+
+    Les résultats sont classés par pertinence et paginés.
+
+    :return: Le template HTML 'frontend/search.html' rendu avec la recherche, les résultats et la page actuelle.
+    """
+    # Nombre de résultats par page.
+    per_page = 20
+    # Récupération de la recherche et du numéro de page, par défaut 1.
+    query = request.args.get('q', '', type=str).strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    # Un résultat supplémentaire est demandé pour savoir s'il existe une page suivante.
+    results = search(query, limit=per_page + 1, offset=(page - 1) * per_page) if query else []
+    has_next = len(results) > per_page
+
+    return render_template('frontend/search.html', query=query, results=results[:per_page], page=page,
+                           has_next=has_next)
+
+
 # Route permettant de visualiser une vidéo en particulier afin de laisser un commentaire.
 @frontend_bp.route('/affichage-video/<int:video_id>', methods=['GET', 'POST'])
+@conditional_view(video_page_version)
+@cached_view(tags=('video', 'comment_video', 'reply_video', 'likes_comment_video', 'related_video', 'user'))
 def display_video(video_id):
     """
     Route permettant d'accéder à une vidéo particulière du blog.
@@ -212,10 +354,15 @@ def display_video(video_id):
         abort(404)
 
     # Récupération des commentaires associés à cette vidéo.
-    comment_video = CommentVideo.query.filter_by(video_id=video_id).all()
+    comment_video = CommentVideo.query.filter_by(video_id=video_id) \
+        .options(selectinload(CommentVideo.replies)).all()
+
+    # Récupération des vidéos similaires précalculées.
+    related_videos = get_related_videos(video_id)
 
     return render_template("frontend/video.html", video=video, video_id=video_id,
-                           comment_video=comment_video, formcommentvideo=formcommentvideo)
+                           comment_video=comment_video, formcommentvideo=formcommentvideo,
+                           related_videos=related_videos)
             
 
 
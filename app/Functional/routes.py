@@ -9,6 +9,10 @@ from flask import render_template, session
 from flask_login import current_user
 
 from app.Functional import functional_bp
+from app.cache import cached_view
+
+# Durée de vie (en secondes) des pages statiques en cache.
+STATIC_PAGE_TIMEOUT = 24 * 3600
 
 
 # Fonction qui gère les utilisateurs anonymes.
@@ -24,6 +28,7 @@ def generate_unique_id():
 
 #  Route permettant d'accéder à la politique de confidentialité.
 @functional_bp.route("/Politique-de-confidentialite")
+@cached_view(timeout=STATIC_PAGE_TIMEOUT)
 def politique():
     """
     Accès à la Politique de confidentialité du blog.
@@ -31,11 +36,12 @@ def politique():
     Returns:
         Template HTML de la page de politique de confidentialité du blog.
     """
-    return render_template("Functional/politique.html")
+    return render_template("functional/politique.html")
 
 
 #  Route permettant d'accéder aux mentions légales.
 @functional_bp.route("/mentions-legales")
+@cached_view(timeout=STATIC_PAGE_TIMEOUT)
 def mentions():
     """
     Accès aux Mentions légales du blog.
@@ -48,6 +54,7 @@ def mentions():
 
 #  Route permettant d'accéder aux informations de l'administrateur.
 @functional_bp.route("/informations")
+@cached_view(timeout=STATIC_PAGE_TIMEOUT)
 def informations():
     """
     Accès aux informations de l'administrateur.
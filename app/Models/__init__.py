@@ -1,6 +1,6 @@
 """
 Déclaration de la base de données pour le blog de TitiTechnique.
-Base de données PostGreSQL.
+Base de données SQLite, MySQL ou PostgreSQL (voir app/database.py).
 
 Cette instance 'db' permet de représenter la connexion à la base de données et
 avec les tables de données définies par les modèles SQLAlchemy.
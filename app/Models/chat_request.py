@@ -6,9 +6,6 @@ from . import db
 
 from datetime import datetime
 
-# Utilisation de JSON pour PostgreSQL.
-from sqlalchemy.dialects.postgresql import JSON
-
 
 class ChatRequest(db.Model):
     """
@@ -36,7 +33,7 @@ class ChatRequest(db.Model):
     heure = db.Column(db.Time(), nullable=False)
     attachment = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(20), nullable=False, default='en attente')
-    admin_choices = db.Column(JSON, nullable=True)  # Stocke les créneaux comme liste de strings ou datetimes
+    admin_choices = db.Column(db.JSON, nullable=True)  # Stocke les créneaux comme liste de strings ou datetimes
     user_choice = db.Column(db.DateTime(timezone=True), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
 
@@ -9,7 +9,7 @@ from app.Models.admin import Admin
 
 from wtforms import StringField, PasswordField, SubmitField, HiddenField, EmailField, DateField, FileField, \
     TextAreaField
-from wtforms.validators import DataRequired, Length, ValidationError, Email, EqualTo
+from wtforms.validators import DataRequired, Length, ValidationError, Email, EqualTo, AnyOf
 
 
 # Formulaire permettant la connexion administrateur.
@@ -534,4 +534,23 @@ class UserLink(FlaskForm):
 
     # Token de sécurité.
     csrf_token = HiddenField()    
-    
\ No newline at end of file
+    
+
+
+# Formulaire permettant de piloter les diagnostics mémoire depuis le backend.
+class MemoryDiagnosticsForm(FlaskForm):
+    """
+    Formulaire des actions de diagnostic mémoire : démarrer ou arrêter tracemalloc, prendre un instantané.
+    """
+
+    # Action demandée ('start', 'stop' ou 'snapshot').
+    action = HiddenField(
+        "action",
+        validators=[DataRequired(), AnyOf(['start', 'stop', 'snapshot'])]
+    )
+    # Token de sécurité.
+    csrf_token = HiddenField()
+    # Bouton de soumission.
+    submit = SubmitField(
+        "Valider"
+    )
@@ -0,0 +1,35 @@
+"""
+Classe permettant de stocker les vidéos similaires précalculées.
+"""
+
+from . import db
+
+
+# Modèle de la classe RelatedVideo.
+class RelatedVideo(db.Model):
+    """
+    Modèle de données représentant une vidéo similaire à une autre, calculée après chaque synchronisation.
+
+    Attributes:
+        video_id (int): Identifiant de la vidéo affichée (clé primaire).
+        rank (int): Rang de la vidéo similaire, 1 pour la plus proche (clé primaire).
+        related_id (int): Identifiant de la vidéo similaire.
+        score (float): Similarité cosinus entre les deux vidéos.
+    """
+
+    __tablename__ = "related_video"
+    __table_args__ = {"extend_existing": True}
+
+    video_id = db.Column(db.Integer, db.ForeignKey("video.id", ondelete="CASCADE"), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    related_id = db.Column(db.Integer, db.ForeignKey("video.id", ondelete="CASCADE"), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        """
+        Représentation en chaîne de caractères de l'objet RelatedVideo.
+
+        Returns:
+            str: Chaîne représentant l'objet RelatedVideo.
+        """
+        return f"RelatedVideo(video_id={self.video_id}, rank={self.rank}, related_id={self.related_id})"
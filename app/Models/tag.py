@@ -0,0 +1,45 @@
+"""
+Classes permettant de normaliser les tags des vidéos.
+"""
+
+from . import db
+
+
+# Table de liaison entre les vidéos et les tags.
+video_tag = db.Table(
+    "video_tag",
+    db.Column("video_id", db.Integer, db.ForeignKey("video.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("tag_id", db.Integer, db.ForeignKey("tag.id", ondelete="CASCADE"), primary_key=True),
+    db.Index("ix_video_tag_tag_id", "tag_id"),
+    extend_existing=True
+)
+
+
+# Modèle de la classe Tag.
+class Tag(db.Model):
+    """
+    Modèle de données représentant un tag de vidéo.
+
+    Attributes:
+        id (int): Identifiant unique du tag.
+        name (str): Nom affiché du tag (minuscules, sans espaces superflus, accents conservés) ; deux tags ne
+            diffèrent jamais que par leurs accents (voir app.tag_index.tag_key).
+    """
+
+    __tablename__ = "tag"
+    __table_args__ = {"extend_existing": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+    # Relation avec les vidéos portant ce tag.
+    videos = db.relationship('Video', secondary=video_tag, lazy='dynamic')
+
+    def __repr__(self):
+        """
+        Représentation en chaîne de caractères de l'objet Tag.
+
+        Returns:
+            str: Chaîne représentant l'objet Tag.
+        """
+        return f"Tag(name='{self.name}')"
@@ -0,0 +1,35 @@
+"""
+Classe permettant de stocker les classements de vidéos précalculés.
+"""
+
+from . import db
+
+
+# Modèle de la classe VideoRanking.
+class VideoRanking(db.Model):
+    """
+    Modèle de données représentant la position d'une vidéo dans un classement, calculé après chaque synchronisation.
+
+    Attributes:
+        ranking (str): Nom du classement (clé primaire).
+        rank (int): Position de la vidéo, 1 pour la première (clé primaire).
+        video_id (int): Identifiant de la vidéo classée.
+        score (float): Score de la vidéo dans ce classement.
+    """
+
+    __tablename__ = "video_ranking"
+    __table_args__ = {"extend_existing": True}
+
+    ranking = db.Column(db.String(50), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    video_id = db.Column(db.Integer, db.ForeignKey("video.id", ondelete="CASCADE"), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        """
+        Représentation en chaîne de caractères de l'objet VideoRanking.
+
+        Returns:
+            str: Chaîne représentant l'objet VideoRanking.
+        """
+        return f"VideoRanking(ranking='{self.ranking}', rank={self.rank}, video_id={self.video_id})"
@@ -0,0 +1,46 @@
+"""
+Classe permettant de conserver l'historique des statistiques des vidéos.
+"""
+
+from . import db
+
+
+# Modèle de la classe VideoStat.
+class VideoStat(db.Model):
+    """
+    Modèle de données représentant l'évolution des statistiques d'une vidéo sur une période (jour, semaine ou mois).
+
+    Seules les variations sont stockées : la somme des lignes d'une vidéo jusqu'à une date donne ses compteurs à
+    cette date. Les lignes anciennes sont regroupées par semaine puis par mois sans perte sur les totaux.
+
+    Attributes:
+        video_id (int): Identifiant de la vidéo (clé primaire).
+        day (date): Premier jour de la période (clé primaire).
+        period (int): Durée de la période : 1 (jour), 7 (semaine) ou 30 (mois).
+        views (int): Variation du nombre de vues sur la période.
+        likes (int): Variation du nombre de likes sur la période.
+        comments (int): Variation du nombre de commentaires sur la période.
+    """
+
+    __tablename__ = "video_stat"
+    __table_args__ = (
+        db.Index("ix_video_stat_period_day", "period", "day"),
+        {"extend_existing": True}
+    )
+
+    video_id = db.Column(db.Integer, db.ForeignKey("video.id", ondelete="CASCADE"), primary_key=True,
+                         autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    period = db.Column(db.SmallInteger, nullable=False, default=1)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    likes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """
+        Représentation en chaîne de caractères de l'objet VideoStat.
+
+        Returns:
+            str: Chaîne représentant l'objet VideoStat.
+        """
+        return f"VideoStat(video_id={self.video_id}, day='{self.day}', period={self.period}, views={self.views})"
@@ -0,0 +1,48 @@
+"""
+Classe permettant de stocker les miniatures des vidéos conservées localement.
+"""
+
+from . import db
+
+
+# Modèle de la classe VideoThumbnail.
+class VideoThumbnail(db.Model):
+    """
+    Modèle de données représentant la miniature d'une vidéo, téléchargée et réencodée en WebP à la synchronisation.
+
+    Les fichiers sont nommés d'après l'empreinte du contenu téléchargé ('<digest>-<largeur>.webp') : une nouvelle
+    miniature produit de nouveaux noms de fichiers, qui peuvent donc être mis en cache sans limite par les navigateurs.
+
+    Attributes:
+        video_id (int): Identifiant de la vidéo (clé primaire).
+        source_url (str): URL de la miniature téléchargée (Video.embed_url au moment du téléchargement).
+        digest (str): Empreinte SHA-256 (tronquée) du fichier téléchargé.
+        widths (str): Largeurs disponibles, séparées par des virgules (ex. '320,480,640').
+    """
+
+    __tablename__ = "video_thumbnail"
+    __table_args__ = {"extend_existing": True}
+
+    video_id = db.Column(db.Integer, db.ForeignKey("video.id", ondelete="CASCADE"), primary_key=True)
+    source_url = db.Column(db.String(255), nullable=False)
+    digest = db.Column(db.String(32), nullable=False)
+    widths = db.Column(db.String(64), nullable=False)
+
+    @property
+    def width_list(self):
+        """
+        Largeurs disponibles, par ordre croissant.
+
+        Returns:
+            list: Liste d'entiers.
+        """
+        return sorted(int(width) for width in self.widths.split(',') if width)
+
+    def __repr__(self):
+        """
+        Représentation en chaîne de caractères de l'objet VideoThumbnail.
+
+        Returns:
+            str: Chaîne représentant l'objet VideoThumbnail.
+        """
+        return f"VideoThumbnail(video_id={self.video_id}, digest='{self.digest}', widths='{self.widths}')"
@@ -3,6 +3,9 @@ Code permettant de sauvegarder les données des videos.
 """
 from . import db
 
+# Miniature publiée par YouTube pour toute vidéo, utilisée si aucune URL n'a été enregistrée à la synchronisation.
+DEFAULT_THUMBNAIL_URL = 'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg'
+
 
 class Video(db.Model):
     """
@@ -12,12 +15,16 @@ class Video(db.Model):
         id (int): Identifiant unique de la vidéo.
         video_id (str): Identifiant de la vidéo sur YouTube.
         title (str): Titre de la vidéo.
-        embed_url (str): URL pour intégrer la vidéo.
+        embed_url (str): URL de la miniature de la vidéo, enregistrée à la synchronisation.
         published_at (date): Date de publication de la vidéo.
+        published_at_display (str): Date de publication formatée pour l'affichage (ex. '05 janvier 2024').
+        duration (int): Durée de la vidéo en secondes.
+        duration_display (str): Durée formatée pour l'affichage (ex. '4:13' ou '1:02:03').
         view_count (int): Nombre de vues.
         like_count (int): Nombre de likes.
         comment_count (int): Nombre de commentaires.
         tags (str): Tags associés à la vidéo.
+        thumbnail (VideoThumbnail): Miniature conservée localement, ou None.
     """
 
     __tablename__ = "video"
@@ -28,6 +35,10 @@ class Video(db.Model):
     title = db.Column(db.String(255))
     embed_url = db.Column(db.String(255))
     published_at = db.Column(db.Date)
+    # Champs d'affichage calculés à la synchronisation plutôt qu'à chaque rendu.
+    published_at_display = db.Column(db.String(32))
+    duration = db.Column(db.Integer)
+    duration_display = db.Column(db.String(16))
     view_count = db.Column(db.Integer)
     like_count = db.Column(db.Integer)
     comment_count = db.Column(db.Integer)
@@ -36,6 +47,20 @@ class Video(db.Model):
     # Relation avec les commentaires.
     comments_video = db.relationship('CommentVideo', back_populates='video', cascade='all, delete-orphan')
 
+    # Miniature conservée localement, chargée à la demande : les listes qui affichent les cartes des vidéos la
+    # chargent avec joinedload(Video.thumbnail).
+    thumbnail = db.relationship('VideoThumbnail', uselist=False, passive_deletes=True)
+
+    @property
+    def thumbnail_url(self):
+        """
+        URL de la miniature affichée à la place du lecteur YouTube tant que la vidéo n'est pas lancée.
+
+        Returns:
+            str: URL de la miniature.
+        """
+        return self.embed_url or DEFAULT_THUMBNAIL_URL.format(video_id=self.video_id)
+
     def __repr__(self):
         """
         Représentation en chaîne de caractères de l'objet Video.
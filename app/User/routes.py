@@ -21,6 +21,8 @@ from app.Models.reply_video import ReplyVideo
 
 from app.Models.forms import ReplySubjectForm, CommentVideoForm, ReplyVideoForm, NewSubjectForumForm
 
+from app.search import index_subject, index_comment_subject, index_comment_video
+
 # Route permettant de créer un sujet pour le forum.
 @user_bp.route("/forum/creation-sujet", methods=['GET', 'POST'])
 def add_subject_forum():
@@ -40,6 +42,9 @@ def add_subject_forum():
     # Enregistrement du sujet dan la base de données.
     db.session.add(subject_forum)
     db.session.commit()
+
+    # Indexation du sujet pour la recherche.
+    index_subject(subject_forum)
     
     # Fermeture de la base de données.
     db.session.close()
@@ -76,6 +81,9 @@ def comment_subject():
     # Ajouter le nouveau commentaire à la base de données.
     db.session.add(new_comment)
     db.session.commit()
+
+    # Indexation du commentaire pour la recherche.
+    index_comment_subject(new_comment)
     
     # Fermeture de la session.
     db.session.close()
@@ -188,6 +196,9 @@ def comment_video():
         # Ajout du nouveau commentaire à la base de données.
         db.session.add(new_comment)
         db.session.commit()
+
+        # Indexation du commentaire pour la recherche.
+        index_comment_video(new_comment)
         
         # Fermeture de la base de données.
         db.session.close()
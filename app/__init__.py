@@ -3,7 +3,6 @@ Fichier d'initialisation de l'application.py Blog TitiTechnique.
 """
 import os
 import secrets
-import logging
 import atexit
 import config.config
 
@@ -75,6 +74,10 @@ def create_app():
     from app.Mail import mail_bp
     app.register_blueprint(mail_bp, url_prefix='/mail')
 
+    # Enregistrement des routes du sitemap à la racine du site.
+    from app.sitemap import register_sitemap
+    register_sitemap(app)
+
     # Configuration du mailing Flask.
     app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
     app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT'))
@@ -103,7 +106,10 @@ def create_app():
     # Propagation des erreurs aux gestionnaires d'erreurs des Blueprints.
     app.config['PROPAGATE_EXCEPTIONS'] = True
 
-    # Chargement de la configuration de l'environnement.
+    # Configuration de l'environnement de l'application.py.
+    app.config.from_object(Config)
+
+    # Chargement de la configuration de l'environnement (après la configuration de base, qu'elle complète).
     if os.environ.get("FLASK_ENV") == "development":
         app.config.from_object(config.config.DevelopmentConfig)
     elif os.environ.get("FLASK_ENV") == "testing":
@@ -111,11 +117,12 @@ def create_app():
     else:
         app.config.from_object(config.config.ProductConfig)
 
-    # Configuration de l'environnement de l'application.py.
-    app.config.from_object(Config)
-
     app.config["SESSION_COOKIE_SECURE"] = True
 
+    # Configuration de la journalisation (file d'attente, fichier JSON tournant, identifiant des requêtes).
+    from app.logging_config import init_logging
+    init_logging(app)
+
     # Configuration de la durée de vie des cookies de session.
     app.permanent_session_lifetime = timedelta(days=1)
 
@@ -127,17 +134,42 @@ def create_app():
     app.config['serializer'] = URLSafeTimedSerializer(app.config['SECRET_KEY'])
     app.config['SECURITY_PASSWORD_SALT'] = os.getenv('SECURITY_PASSWORD_SALT')
 
-    # Initialisation de la base de données.
-    db.init_app(app)
+    # Initialisation de la base de données (SQLite, MySQL ou PostgreSQL selon DATABASE_URL).
+    from app.database import init_database
+    init_database(app)
     # Instanciation de flask-Migrate.
     Migrate(app, db)
 
+    # Mesures des temps de réponse, du temps SQL et du rendu des gabarits de chaque requête.
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    # Journal des requêtes SQL lentes et détection des requêtes répétées (N+1).
+    from app.query_monitor import init_query_monitor
+    init_query_monitor(app)
+
+    # Profilage des requêtes tirées au sort ou demandées avec un jeton signé.
+    from app.profiler import init_profiler
+    init_profiler(app)
+
+    # Taille de l'identity map de la session par route et historique de la mémoire résidente du processus.
+    from app.memory_diagnostics import init_memory_diagnostics
+    init_memory_diagnostics(app)
+
+    # Initialisation du cache des pages et de son invalidation après chaque commit.
+    from app.cache import init_cache
+    init_cache(app)
+
+    # Balise {% cache %} des gabarits et stockage des fragments.
+    from app.fragment_cache import init_fragment_cache
+    init_fragment_cache(app)
+
     # Pour les réponses JSON concerne l'encodage.
     app.config['JSON_AS_ASCII'] = False
 
     # Configurations pour les dossiers des téléchargements.
     app.config['UPLOAD_FOLDER'] = os.path.join(os.path.expanduser('~'), 'Downloads')
-    print(f"UPLOAD_FOLDER: {app.config['UPLOAD_FOLDER']}")
+    app.logger.debug("Dossier des téléchargements : %s", app.config['UPLOAD_FOLDER'])
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
     # Lancement du processus apscheduler.
@@ -175,10 +207,8 @@ def create_app():
         # Si aucun n'est trouvé, retourne None.
         return None
 
-    # Configuration de la journalisation.
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
-    handler = logging.FileHandler("fichier.log")
-    handler.setLevel(logging.DEBUG)
-    app.logger.addHandler(handler)
+    # Cache du bytecode des gabarits, commande 'flask precompile-templates' et préchargement des gabarits.
+    from app.template_cache import init_template_cache
+    init_template_cache(app)
 
     return app
@@ -0,0 +1,548 @@
+"""
+Code permettant de mettre en cache les pages publiques du blog.
+
+Le stockage est choisi par la configuration CACHE_BACKEND :
+    - 'memory' : cache LRU propre à chaque processus (cachetools) ;
+    - 'sqlite' : fichier SQLite partagé par tous les processus (CACHE_PATH), sans service externe ;
+    - 'null' : cache désactivé.
+
+Le décorateur cached_view met en cache le rendu d'une route GET sous une clé calculée à partir de l'URL (ou d'une
+fonction de clé) et lui associe des tags, qui sont des noms de tables. Après chaque commit, les tables modifiées
+par la session (objets ajoutés, modifiés ou supprimés, et requêtes INSERT, UPDATE ou DELETE) invalident toutes
+les pages portant le tag correspondant.
+
+Le jeton CSRF propre à chaque session est remplacé dans la page stockée par un marqueur, puis réinséré pour chaque
+visiteur : les formulaires des pages en cache restent valides.
+"""
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+
+from functools import wraps
+from itertools import chain
+from urllib.parse import urlencode
+
+from cachetools import LRUCache
+from flask import current_app, request, g, make_response, has_app_context
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.single_flight import flight_lock
+
+logger = logging.getLogger(__name__)
+
+# Marqueur remplaçant le jeton CSRF dans les pages stockées.
+CSRF_PLACEHOLDER = '__CACHED_CSRF_TOKEN__'
+
+# Clé des tables modifiées dans Session.info, en attente du commit.
+PENDING_TABLES = 'cache_pending_tables'
+
+# Nombre d'écritures entre deux nettoyages du cache SQLite (entrées expirées et taille maximale).
+SQLITE_PURGE_EVERY = 200
+
+
+class CacheStats:
+    """
+    Compteurs d'utilisation du cache du processus courant.
+
+    Attributes:
+        hits (int): Nombre de lectures ayant trouvé une entrée valide.
+        misses (int): Nombre de lectures sans entrée valide.
+        sets (int): Nombre d'entrées écrites.
+        invalidations (int): Nombre d'invalidations par tags.
+        stale (int): Nombre de pages périmées servies pendant leur recalcul.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.invalidations = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1):
+        """
+        Incrémente un compteur.
+
+        :param name: Nom du compteur.
+        :param value: Valeur ajoutée.
+        """
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        """
+        Renvoie les compteurs et le taux de succès.
+
+        :return: Dictionnaire des compteurs.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'sets': self.sets,
+            'invalidations': self.invalidations,
+            'stale': self.stale,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class _TaggedLRU(LRUCache):
+    """
+    Cache LRU qui retire les clés évincées de l'index des tags.
+    """
+
+    def __init__(self, maxsize, tag_index):
+        super().__init__(maxsize)
+        self._tag_index = tag_index
+
+    def popitem(self):
+        key, (_, _, tags) = super().popitem()
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+        return key, (None, None, tags)
+
+
+class MemoryCache:
+    """
+    Cache LRU en mémoire, propre au processus, avec une durée de vie par entrée.
+
+    Attributes:
+        name (str): Nom du stockage.
+        stats (CacheStats): Compteurs d'utilisation.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_entries=1024):
+        self._tags = {}
+        self._entries = _TaggedLRU(max_entries, self._tags)
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key):
+        """
+        Lit une entrée.
+
+        :param key: Clé de l'entrée.
+        :return: Valeur, ou None si l'entrée est absente ou expirée.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+        self.stats.incr('misses' if entry is None else 'hits')
+        return None if entry is None else entry[1]
+
+    def set(self, key, value, timeout, tags=()):
+        """
+        Écrit une entrée.
+
+        :param key: Clé de l'entrée.
+        :param value: Valeur (tout objet Python).
+        :param timeout: Durée de vie en secondes.
+        :param tags: Tags permettant d'invalider l'entrée.
+        """
+        with self._lock:
+            self._entries[key] = (time.time() + timeout, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        self.stats.incr('sets')
+
+    def delete(self, key):
+        """
+        Supprime une entrée.
+
+        :param key: Clé de l'entrée.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_tags(self, tags):
+        """
+        Supprime toutes les entrées portant au moins un des tags.
+
+        :param tags: Tags invalidés.
+        """
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._entries.pop(key, None)
+        self.stats.incr('invalidations')
+
+    def clear(self):
+        """
+        Vide le cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Cache stocké dans un fichier SQLite, partagé par tous les processus d'un même serveur.
+
+    Attributes:
+        name (str): Nom du stockage.
+        path (str): Chemin du fichier SQLite.
+        max_entries (int): Nombre maximal d'entrées conservées.
+        stats (CacheStats): Compteurs d'utilisation du processus courant.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._writes = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entry (
+                    key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS cache_tag (
+                    tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_cache_entry_expires ON cache_entry (expires);
+            """)
+
+    def _connection(self):
+        """
+        Renvoie la connexion SQLite du thread courant (les connexions ne sont pas partagées entre threads).
+
+        :return: Connexion sqlite3.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """
+        Lit une entrée.
+
+        :param key: Clé de l'entrée.
+        :return: Valeur, ou None si l'entrée est absente ou expirée.
+        """
+        row = self._connection().execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND expires >= ?', (key, time.time())
+        ).fetchone()
+        self.stats.incr('misses' if row is None else 'hits')
+        return None if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout, tags=()):
+        """
+        Écrit une entrée.
+
+        :param key: Clé de l'entrée.
+        :param value: Valeur sérialisable avec pickle.
+        :param timeout: Durée de vie en secondes.
+        :param tags: Tags permettant d'invalider l'entrée.
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('INSERT OR REPLACE INTO cache_entry (key, value, expires) VALUES (?, ?, ?)',
+                               (key, data, time.time() + timeout))
+            connection.executemany('INSERT OR IGNORE INTO cache_tag (tag, key) VALUES (?, ?)',
+                                   [(tag, key) for tag in tags])
+        self.stats.incr('sets')
+
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            self.purge()
+
+    def delete(self, key):
+        """
+        Supprime une entrée.
+
+        :param key: Clé de l'entrée.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+            connection.execute('DELETE FROM cache_tag WHERE key = ?', (key,))
+
+    def invalidate_tags(self, tags):
+        """
+        Supprime toutes les entrées portant au moins un des tags, pour tous les processus.
+
+        :param tags: Tags invalidés.
+        """
+        tags = list(tags)
+        if not tags:
+            return
+        marks = ', '.join('?' * len(tags))
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(f'DELETE FROM cache_entry WHERE key IN '
+                               f'(SELECT key FROM cache_tag WHERE tag IN ({marks}))', tags)
+            connection.execute(f'DELETE FROM cache_tag WHERE tag IN ({marks})', tags)
+        self.stats.incr('invalidations')
+
+    def purge(self):
+        """
+        Supprime les entrées expirées, les plus anciennes au-delà de max_entries, et les tags orphelins.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM cache_entry WHERE expires < ?', (time.time(),))
+            connection.execute('DELETE FROM cache_entry WHERE key IN (SELECT key FROM cache_entry '
+                               'ORDER BY expires DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+            connection.execute('DELETE FROM cache_tag WHERE key NOT IN (SELECT key FROM cache_entry)')
+
+    def clear(self):
+        """
+        Vide le cache.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM cache_entry')
+            connection.execute('DELETE FROM cache_tag')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+
+
+def create_cache(config, prefix='CACHE', root_path=None):
+    """
+    Instancie le stockage du cache choisi dans la configuration.
+
+    :param config: Configuration de l'application.
+    :param prefix: Préfixe des clés de configuration (<prefix>_BACKEND, <prefix>_PATH, <prefix>_MAX_ENTRIES).
+    :param root_path: Dossier depuis lequel résoudre un <prefix>_PATH relatif (racine de l'application) ; à défaut,
+                      le dossier courant.
+    :return: Instance de MemoryCache ou SQLiteCache, ou None si le cache est désactivé.
+    """
+    backend = config.get(f'{prefix}_BACKEND', 'memory')
+    if backend == 'memory':
+        return MemoryCache(config.get(f'{prefix}_MAX_ENTRIES', 1024))
+    if backend == 'sqlite':
+        path = config[f'{prefix}_PATH']
+        if root_path is not None and not os.path.isabs(path):
+            path = os.path.join(root_path, path)
+        return SQLiteCache(path, config.get(f'{prefix}_MAX_ENTRIES', 10000))
+    if backend in (None, 'null'):
+        return None
+    raise ValueError(f"Stockage de cache inconnu : {backend}")
+
+
+def get_cache():
+    """
+    Renvoie le cache de l'application courante.
+
+    :return: Instance du stockage, ou None si le cache est désactivé.
+    """
+    return current_app.extensions.get('cache')
+
+
+def init_cache(app):
+    """
+    Initialise le cache de l'application et l'invalidation automatique après chaque commit.
+
+    :param app: Instance de l'application Flask.
+    """
+    app.extensions['cache'] = create_cache(app.config, root_path=app.root_path)
+
+    if not event.contains(Session, 'after_commit', _invalidate_after_commit):
+        event.listen(Session, 'after_flush', _collect_flushed_tables)
+        event.listen(Session, 'do_orm_execute', _collect_executed_tables)
+        event.listen(Session, 'after_commit', _invalidate_after_commit)
+        event.listen(Session, 'after_rollback', _forget_pending_tables)
+
+
+def _collect_flushed_tables(session, flush_context):
+    """
+    Mémorise les tables des objets ajoutés, modifiés ou supprimés lors d'un flush.
+    """
+    tables = session.info.setdefault(PENDING_TABLES, set())
+    for instance in chain(session.new, session.dirty, session.deleted):
+        table = getattr(instance, '__table__', None)
+        if table is not None:
+            tables.add(table.name)
+
+
+def _collect_executed_tables(state):
+    """
+    Mémorise la table visée par une requête INSERT, UPDATE ou DELETE exécutée par la session.
+    """
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, 'table', None)
+        name = getattr(table, 'name', None)
+        if name:
+            state.session.info.setdefault(PENDING_TABLES, set()).add(name)
+
+
+def _invalidate_after_commit(session):
+    """
+    Invalide les pages en cache portant le nom d'une table modifiée par la transaction validée.
+    """
+    tables = session.info.pop(PENDING_TABLES, None)
+    if not tables or not has_app_context():
+        return
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        cache.invalidate_tags(tables)
+    except Exception as e:
+        logger.error("Erreur lors de l'invalidation du cache (%s) : %s", ', '.join(sorted(tables)), e)
+
+
+def _forget_pending_tables(session):
+    """
+    Oublie les tables modifiées par une transaction annulée.
+    """
+    session.info.pop(PENDING_TABLES, None)
+
+
+def default_cache_key():
+    """
+    Calcule la clé de cache de la requête courante : chemin et paramètres triés.
+
+    :return: Clé de cache.
+    """
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f'view:{request.path}?{query}'
+
+
+def cached_view(timeout=None, tags=(), key=None, unless=None):
+    """
+    Décorateur mettant en cache le rendu d'une route GET.
+
+    Seules les réponses 200 sont stockées (corps, statut et type MIME, sans les en-têtes propres au visiteur). Un
+    seul appelant, tous processus confondus, calcule une page absente ou périmée (voir app/single_flight.py) : les
+    autres attendent le résultat, ou reçoivent la version périmée pendant son recalcul.
+
+    Exemple :
+        @frontend_bp.route('/acces-forum')
+        @cached_view(timeout=300, tags=('subject_forum',))
+        def forum(): ...
+
+    :param timeout: Durée de vie en secondes, par défaut CACHE_DEFAULT_TIMEOUT.
+    :param tags: Noms des tables dont la modification invalide la page.
+    :param key: Fonction optionnelle recevant les arguments de la route et renvoyant la clé de cache.
+    :param unless: Fonction optionnelle sans argument ; si elle renvoie True, le cache est ignoré.
+    :return: Décorateur.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_view(*args, **kwargs):
+            cache = get_cache()
+            if cache is None or request.method != 'GET' or (unless is not None and unless()):
+                return view(*args, **kwargs)
+
+            cache_key = key(*args, **kwargs) if key is not None else default_cache_key()
+            try:
+                cached = cache.get(cache_key)
+            except Exception as e:
+                logger.error("Erreur lors de la lecture du cache : %s", e)
+                return view(*args, **kwargs)
+
+            if cached is not None:
+                if cached[0] >= time.time():
+                    return _cached_response(cached)
+
+                # Entrée périmée : un seul appelant la recalcule, les autres la servent en attendant.
+                with flight_lock(cache_key, blocking=False) as acquired:
+                    if not acquired:
+                        cache.stats.incr('stale')
+                        return _cached_response(cached)
+                    return _render_and_store(cache, cache_key, view, args, kwargs, timeout, tags)
+
+            # Entrée absente : le premier appelant calcule, les autres attendent puis relisent le cache.
+            with flight_lock(cache_key, timeout=current_app.config.get('CACHE_LOCK_TIMEOUT', 10)) as acquired:
+                if acquired:
+                    cached = cache.get(cache_key)
+                    if cached is not None:
+                        return _cached_response(cached)
+                return _render_and_store(cache, cache_key, view, args, kwargs, timeout, tags)
+
+        return decorated_view
+    return decorator
+
+
+def _cached_response(cached):
+    """
+    Reconstruit la réponse d'une page en cache, avec le jeton CSRF de la session courante.
+
+    :param cached: Entrée du cache (fraîche jusqu'à, corps, statut, type MIME).
+    :return: Réponse Flask.
+    """
+    _, body, status, mimetype = cached
+    if CSRF_PLACEHOLDER in body:
+        body = body.replace(CSRF_PLACEHOLDER, generate_csrf())
+    return current_app.response_class(body, status=status, mimetype=mimetype)
+
+
+def _render_and_store(cache, cache_key, view, args, kwargs, timeout, tags):
+    """
+    Exécute la route et stocke son rendu s'il peut être mis en cache.
+
+    L'entrée est conservée CACHE_STALE_TIMEOUT secondes après sa péremption, pour être servie pendant son recalcul.
+
+    :return: Réponse Flask.
+    """
+    response = make_response(view(*args, **kwargs))
+    if response.status_code == 200 and not response.direct_passthrough:
+        body = response.get_data(as_text=True)
+        token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if token:
+            body = body.replace(token, CSRF_PLACEHOLDER)
+        timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        try:
+            cache.set(cache_key, (time.time() + timeout, body, response.status_code, response.mimetype),
+                      timeout + current_app.config.get('CACHE_STALE_TIMEOUT', 60), tags)
+        except Exception as e:
+            logger.error("Erreur lors de l'écriture du cache : %s", e)
+    return response
+
+
+def _backend_stats(cache):
+    """
+    Renvoie les statistiques d'un stockage.
+
+    :param cache: Instance du stockage, ou None.
+    :return: Dictionnaire (stockage, nombre d'entrées et compteurs du processus courant).
+    """
+    if cache is None:
+        return {'backend': 'null'}
+    return dict(backend=cache.name, entries=len(cache), **cache.stats.as_dict())
+
+
+def cache_stats():
+    """
+    Renvoie les statistiques du cache des pages et du cache des fragments de gabarits de l'application courante.
+
+    :return: Dictionnaire (stockage, nombre d'entrées et compteurs du processus courant), avec les statistiques des
+             fragments sous la clé 'fragments'.
+    """
+    stats = _backend_stats(get_cache())
+    stats['fragments'] = _backend_stats(current_app.extensions.get('fragment_cache'))
+    return stats
@@ -0,0 +1,231 @@
+"""
+Code permettant de répondre aux requêtes conditionnelles (If-None-Match, If-Modified-Since) par un 304.
+
+Chaque page concernée déclare une fonction de version peu coûteuse (date de la dernière synchronisation des
+vidéos, nombre et date du dernier commentaire d'une discussion...). L'ETag est calculé à partir de cette version,
+des gabarits déployés et d'un sel propre au visiteur (utilisateur connecté et secret CSRF de la session, qui
+apparaissent dans la page). Si le client possède déjà cette version, la réponse 304 est envoyée avant toute lecture
+du cache ou rendu de gabarit.
+"""
+import os
+import hashlib
+import datetime
+
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+from sqlalchemy import func
+
+from app.Models import db
+from app.Models.comment_video import CommentVideo
+from app.Models.comment_subject import CommentSubject
+from app.Models.reply_video import ReplyVideo
+from app.Models.reply_subject import ReplySubject
+
+# Fichier dont la date de modification est celle de la dernière synchronisation, si SYNC_STAMP_PATH est absent
+# (relatif à la racine de l'application).
+DEFAULT_SYNC_STAMP_PATH = os.path.join('cache', 'last_sync')
+
+_template_stamp = None
+
+
+def _sync_stamp_path():
+    """
+    Renvoie le chemin du fichier marquant la dernière synchronisation (SYNC_STAMP_PATH, relatif à la racine de
+    l'application).
+
+    :return: Chemin absolu du fichier.
+    """
+    path = current_app.config.get('SYNC_STAMP_PATH', DEFAULT_SYNC_STAMP_PATH)
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.root_path, path)
+    return path
+
+
+def mark_synced():
+    """
+    Enregistre la date de la synchronisation qui vient de se terminer (date de modification d'un fichier, visible
+    par tous les processus).
+    """
+    path = _sync_stamp_path()
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'a'):
+        os.utime(path)
+
+
+def last_sync_time():
+    """
+    Renvoie la date de la dernière synchronisation des vidéos.
+
+    :return: datetime (UTC), ou None si aucune synchronisation n'a été enregistrée.
+    """
+    try:
+        mtime = os.stat(_sync_stamp_path()).st_mtime
+    except OSError:
+        return None
+    return datetime.datetime.fromtimestamp(int(mtime), datetime.timezone.utc)
+
+
+def template_stamp():
+    """
+    Renvoie la date de modification la plus récente des gabarits, calculée une seule fois par processus : un
+    déploiement qui modifie les gabarits change donc tous les ETags.
+
+    :return: Entier (secondes).
+    """
+    global _template_stamp
+    if _template_stamp is None:
+        latest = 0
+        for folder in getattr(current_app.jinja_loader, 'searchpath', []):
+            for root, _, files in os.walk(folder):
+                for name in files:
+                    latest = max(latest, int(os.stat(os.path.join(root, name)).st_mtime))
+        _template_stamp = latest
+    return _template_stamp
+
+
+def _visitor_salt():
+    """
+    Calcule le sel propre au visiteur : les pages contiennent son identité et le jeton CSRF de sa session.
+
+    :return: Chaîne de caractères.
+    """
+    field = current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')
+    return f"{current_user.get_id() or ''}:{session.get(field, '')}"
+
+
+def _as_utc(value):
+    """
+    Convertit une date en datetime UTC (les dates sans fuseau sont considérées en UTC).
+
+    :param value: date, datetime ou None.
+    :return: datetime UTC, ou None.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time.min)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def _etag(stamp):
+    """
+    Calcule l'ETag de la page demandée pour une version donnée.
+
+    :param stamp: Version renvoyée par la fonction de version de la route.
+    :return: Chaîne hexadécimale.
+    """
+    seed = repr((request.endpoint, request.full_path, stamp, template_stamp(), _visitor_salt()))
+    return hashlib.sha1(seed.encode('utf-8')).hexdigest()
+
+
+def latest(*values):
+    """
+    Renvoie la plus récente des dates fournies, en ignorant les valeurs absentes.
+
+    :return: datetime UTC, ou None.
+    """
+    values = [_as_utc(value) for value in values if value is not None]
+    return max(values) if values else None
+
+
+def video_list_version():
+    """
+    Version des listes de vidéos : elles ne changent qu'à la synchronisation.
+
+    :return: Tuple (version, date de dernière modification).
+    """
+    synced = last_sync_time()
+    return synced and synced.timestamp(), synced
+
+
+def video_page_version(video_id):
+    """
+    Version de la page d'une vidéo : dernière synchronisation, nombre et date des commentaires et des réponses
+    (une seule requête d'agrégation).
+
+    :param video_id: Identifiant de la vidéo.
+    :return: Tuple (version, date de dernière modification).
+    """
+    comments, last_comment, replies, last_reply = db.session.query(
+        func.count(func.distinct(CommentVideo.id)), func.max(CommentVideo.comment_date),
+        func.count(ReplyVideo.id), func.max(ReplyVideo.reply_date)
+    ).outerjoin(ReplyVideo, ReplyVideo.comment_id == CommentVideo.id) \
+        .filter(CommentVideo.video_id == video_id).one()
+    synced = last_sync_time()
+    version = (synced and synced.timestamp(), comments, str(last_comment), replies, str(last_reply))
+    return version, latest(synced, last_comment, last_reply)
+
+
+def subject_page_version(subject_id):
+    """
+    Version de la page d'un sujet du forum : nombre et date des commentaires et des réponses (une seule requête
+    d'agrégation).
+
+    :param subject_id: Identifiant du sujet.
+    :return: Tuple (version, date de dernière modification).
+    """
+    comments, last_comment, replies, last_reply = db.session.query(
+        func.count(func.distinct(CommentSubject.id)), func.max(CommentSubject.comment_date),
+        func.count(ReplySubject.id), func.max(ReplySubject.reply_date)
+    ).outerjoin(ReplySubject, ReplySubject.comment_id == CommentSubject.id) \
+        .filter(CommentSubject.subject_id == subject_id).one()
+    version = (comments, str(last_comment), replies, str(last_reply))
+    return version, latest(last_comment, last_reply)
+
+
+def conditional_view(version):
+    """
+    Décorateur ajoutant ETag et Last-Modified à une route GET, et répondant 304 si le client a déjà la page.
+
+    À placer au-dessus de cached_view : la version est vérifiée avant la lecture du cache et le rendu.
+
+    Exemple :
+        @frontend_bp.route('/affichage-video/<int:video_id>')
+        @conditional_view(video_page_version)
+        @cached_view(tags=('video', 'comment_video'))
+        def display_video(video_id): ...
+
+    :param version: Fonction recevant les arguments de la route et renvoyant (version, date de dernière
+                    modification). Une version None désactive le traitement conditionnel.
+    :return: Décorateur.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_view(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            stamp, last_modified = version(*args, **kwargs)
+            if stamp is None:
+                return view(*args, **kwargs)
+
+            etag = _etag(stamp)
+            not_modified = etag in request.if_none_match
+            if not request.if_none_match and last_modified is not None and request.if_modified_since:
+                not_modified = last_modified.replace(microsecond=0) <= request.if_modified_since
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Le rendu a pu créer le secret CSRF de la session : le sel est recalculé.
+                etag = _etag(stamp)
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Le navigateur conserve la page mais la revalide à chaque visite (elle contient un jeton de session).
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+
+        return decorated_view
+    return decorator
@@ -0,0 +1,381 @@
+"""
+Code permettant de faire fonctionner l'application sur SQLite, MySQL (MariaDB) ou PostgreSQL.
+
+L'URI de la base est lue dans la variable d'environnement DATABASE_URL (voir config/config.py), obligatoire en
+production (MySQL) ; à défaut, SQLite en développement et SQLite en mémoire pour les tests. Ce module :
+    - normalise l'URI (préfixe 'postgres://' des hébergeurs remplacé par 'postgresql://') ;
+    - règle les connexions SQLite comme une base de production : clés étrangères vérifiées, journal WAL et
+      attente des verrous pour les fichiers ;
+    - crée les tables manquantes et ajoute aux tables existantes les colonnes ajoutées depuis aux modèles
+      (create_schema()), avec la commande 'flask init-db' et automatiquement au démarrage pour une base SQLite en
+      mémoire, vide à chaque processus ;
+    - configure le pool de connexions (taille, débordement, attente maximale, recyclage, ping avant utilisation,
+      délai de connexion), en mesure le fonctionnement (attente pour obtenir une connexion, connexions ouvertes,
+      fermées et invalidées, exposées par la route admin.metrics) et ouvre ses premières connexions au démarrage du
+      processus, pour que les premières requêtes ne paient pas l'établissement de la connexion (TCP, TLS,
+      authentification MySQL).
+"""
+import os
+import time
+import weakref
+import logging
+import threading
+
+from bisect import bisect_left
+
+import click
+from sqlalchemy import event, inspect, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateColumn
+
+from app.Models import db
+
+logger = logging.getLogger(__name__)
+
+# Bornes (en secondes) de l'histogramme du temps d'obtention d'une connexion.
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Moteurs dont le pool est vidé dans un processus créé par fork (références faibles : un moteur abandonné par un
+# autre appel de create_app() n'est pas conservé).
+_fork_engines = weakref.WeakSet()
+_fork_hook = {'registered': False}
+
+
+def normalize_database_uri(uri):
+    """
+    Normalise une URI de base de données.
+
+    :param uri: URI SQLAlchemy ou URL fournie par un hébergeur.
+    :return: URI utilisable par SQLAlchemy.
+    """
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def is_memory_database(uri):
+    """
+    Indique si l'URI désigne une base SQLite en mémoire.
+    """
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """
+    Règle chaque nouvelle connexion SQLite (événement 'connect' du moteur).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    if cursor.execute('PRAGMA database_list').fetchone()[2]:
+        # Base dans un fichier : lectures simultanées pendant les écritures (processus et threads du serveur).
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+
+class PoolMetrics:
+    """
+    Mesures du pool de connexions d'un moteur, partagées entre les threads du processus.
+    """
+
+    def __init__(self, engine, buckets=CHECKOUT_BUCKETS):
+        self.engine = engine
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.checkout_buckets = [0] * (len(self.buckets) + 1)
+        self.checkout_sum = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.opened = 0
+        self.closed = 0
+        self.invalidated = 0
+
+    def observe_checkout(self, duration):
+        """
+        Enregistre le temps d'obtention d'une connexion (attente du pool, ping et ouverture éventuelle).
+
+        :param duration: Durée en secondes.
+        """
+        index = bisect_left(self.buckets, duration)
+        with self._lock:
+            self.checkout_buckets[index] += 1
+            self.checkout_sum += duration
+            self.checkouts += 1
+
+    def observe_timeout(self):
+        """
+        Enregistre une attente abandonnée (aucune connexion libérée dans le délai DATABASE_POOL_TIMEOUT).
+        """
+        with self._lock:
+            self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.opened += 1
+
+    def _on_close(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.closed += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated += 1
+
+    def listen(self):
+        """
+        Abonne les mesures aux événements du pool (conservés lorsque le pool est recréé).
+        """
+        event.listen(self.engine, 'connect', self._on_connect)
+        event.listen(self.engine, 'close', self._on_close)
+        event.listen(self.engine, 'invalidate', self._on_invalidate)
+
+    def render(self, prefix):
+        """
+        Produit les mesures au format texte de Prometheus (version 0.0.4).
+
+        :param prefix: Préfixe des métriques.
+        :return: Chaîne de caractères.
+        """
+        pool = self.engine.pool
+        with self._lock:
+            buckets = list(self.checkout_buckets)
+            checkout_sum, checkouts, timeouts = self.checkout_sum, self.checkouts, self.timeouts
+            opened, closed, invalidated = self.opened, self.closed, self.invalidated
+
+        lines = [f'# HELP {prefix}_db_pool_checkout_seconds Temps d\'obtention d\'une connexion du pool.',
+                 f'# TYPE {prefix}_db_pool_checkout_seconds histogram']
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), buckets):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{prefix}_db_pool_checkout_seconds_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f'{prefix}_db_pool_checkout_seconds_sum {checkout_sum:.6f}')
+        lines.append(f'{prefix}_db_pool_checkout_seconds_count {checkouts}')
+
+        for name, value, description in (
+                ('checkout_timeouts', timeouts, "Attentes d'une connexion abandonnées (délai dépassé)."),
+                ('connections_opened', opened, 'Connexions ouvertes vers la base de données.'),
+                ('connections_closed', closed, 'Connexions fermées (recyclage, débordement, arrêt).'),
+                ('connections_invalidated', invalidated, 'Connexions invalidées (coupure détectée, ping échoué).')):
+            lines += [f'# HELP {prefix}_db_pool_{name}_total {description}',
+                      f'# TYPE {prefix}_db_pool_{name}_total counter',
+                      f'{prefix}_db_pool_{name}_total {value}']
+
+        if isinstance(pool, QueuePool):
+            for name, value, description in (
+                    ('size', pool.size(), 'Taille du pool (connexions conservées).'),
+                    ('checked_out', pool.checkedout(), 'Connexions en cours d\'utilisation.'),
+                    ('checked_in', pool.checkedin(), 'Connexions libres dans le pool.'),
+                    ('overflow', pool.overflow(), 'Connexions en débordement (négatif : places encore libres).')):
+                lines += [f'# HELP {prefix}_db_pool_{name} {description}',
+                          f'# TYPE {prefix}_db_pool_{name} gauge',
+                          f'{prefix}_db_pool_{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    Pool de connexions mesurant le temps d'obtention de chaque connexion.
+    """
+
+    metrics = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.observe_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.observe_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options(config, uri):
+    """
+    Construit les options du moteur SQLAlchemy à partir de la configuration (DATABASE_POOL_*).
+
+    :param config: Configuration de l'application.
+    :param uri: URI de la base de données.
+    :return: Dictionnaire des options de create_engine().
+    """
+    if is_memory_database(uri):
+        # Une base en mémoire n'a qu'une connexion (StaticPool, imposé par Flask-SQLAlchemy).
+        return {}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config.get('DATABASE_POOL_SIZE', 5),
+        'max_overflow': config.get('DATABASE_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DATABASE_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('DATABASE_POOL_RECYCLE', -1),
+        'pool_pre_ping': config.get('DATABASE_POOL_PRE_PING', True),
+        # Connexion la plus récemment rendue réutilisée en premier : les connexions en trop vieillissent et sont
+        # recyclées au lieu d'être toutes gardées ouvertes.
+        'pool_use_lifo': True,
+    }
+    connect_timeout = config.get('DATABASE_CONNECT_TIMEOUT')
+    if connect_timeout and make_url(uri).get_backend_name() in ('mysql', 'mariadb', 'postgresql'):
+        options['connect_args'] = {'connect_timeout': connect_timeout}
+    return options
+
+
+def warm_pool(engine, count):
+    """
+    Ouvre count connexions puis les rend au pool.
+
+    :param engine: Moteur SQLAlchemy.
+    :param count: Nombre de connexions à ouvrir (au plus la taille du pool).
+    :return: Nombre de connexions ouvertes.
+    """
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    except exc.SQLAlchemyError as e:
+        logger.warning("Préchauffage du pool de connexions interrompu : %s", e)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def add_missing_columns(tables):
+    """
+    Ajoute aux tables existantes les colonnes déclarées par les modèles et absentes de la base (ALTER TABLE ... ADD
+    COLUMN), dans un contexte d'application.
+
+    db.create_all() ne modifie jamais une table existante et le dépôt n'a pas de migrations : sans cette étape, toute
+    requête sur un modèle auquel une colonne a été ajoutée échouerait sur la base de production. L'opération est
+    idempotente. Une colonne obligatoire sans valeur par défaut côté serveur n'est pas ajoutée (les lignes
+    existantes n'auraient pas de valeur) : elle est signalée et doit être ajoutée à la main.
+
+    :param tables: Noms des tables existantes à compléter.
+    :return: Liste des colonnes ajoutées ('table.colonne').
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.warning("Colonne obligatoire %s.%s absente de la base : à ajouter à la main.",
+                                   table.name, column.name)
+                    continue
+                connection.exec_driver_sql(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                                           f"{CreateColumn(column).compile(dialect=engine.dialect)}")
+                added.append(f"{table.name}.{column.name}")
+    if added:
+        logger.info("%s colonne(s) ajoutée(s) : %s", len(added), ', '.join(added))
+    return added
+
+
+def create_schema():
+    """
+    Crée les tables et les index manquants, et ajoute aux tables existantes leurs colonnes manquantes, sur toute base
+    gérée par SQLAlchemy (dans un contexte d'application).
+
+    :return: Tuple (liste triée des tables créées, liste des colonnes ajoutées).
+    """
+    existing = set(inspect(db.engine).get_table_names())
+    db.create_all()
+    created = sorted(set(inspect(db.engine).get_table_names()) - existing)
+    if created:
+        logger.info("%s table(s) créée(s) : %s", len(created), ', '.join(created))
+    return created, add_missing_columns(existing)
+
+
+def _dispose_after_fork():
+    """
+    Oublie, dans le processus enfant créé par fork, les connexions héritées du parent (sans les fermer : elles
+    appartiennent toujours au parent).
+    """
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
+
+def dispose_after_fork(engine):
+    """
+    Fait vider le pool d'un moteur dans chaque processus créé par fork (workers Passenger ou Gunicorn).
+
+    Le hook de fork n'est enregistré qu'une fois par processus ; il n'existe pas sous Windows (pas de fork).
+
+    :param engine: Moteur SQLAlchemy.
+    """
+    if not hasattr(os, 'register_at_fork'):
+        return
+    if not _fork_hook['registered']:
+        os.register_at_fork(after_in_child=_dispose_after_fork)
+        _fork_hook['registered'] = True
+    _fork_engines.add(engine)
+
+
+def init_database(app):
+    """
+    Initialise la base de données de l'application : URI, pool de connexions et ses mesures, réglages SQLite,
+    commande 'flask init-db', création du schéma d'une base en mémoire et préchauffage du pool.
+
+    Doit être appelée à la place de db.init_app(app).
+
+    :param app: Instance de l'application Flask.
+    :raises RuntimeError: Si aucune base n'est configurée (DATABASE_URL absente en production).
+    """
+    if not app.config.get('SQLALCHEMY_DATABASE_URI'):
+        # Sans cette vérification, l'application démarrerait sur une base vide que la synchronisation remplirait.
+        raise RuntimeError("La variable d'environnement DATABASE_URL n'est pas définie : elle est obligatoire hors "
+                           "développement (FLASK_ENV=development) et tests (FLASK_ENV=testing).")
+    uri = app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    # Les options déclarées explicitement dans SQLALCHEMY_ENGINE_OPTIONS l'emportent sur celles du pool.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config, uri),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    db.init_app(app)
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _configure_sqlite)
+        logger.info("Base de données : %s", engine.url.render_as_string(hide_password=True))
+
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            metrics = app.extensions['db_pool'] = PoolMetrics(engine)
+            metrics.listen()
+            engine.pool.metrics = metrics
+            # Un processus créé par fork ne doit pas réutiliser les connexions de son parent.
+            dispose_after_fork(engine)
+
+        if is_memory_database(uri):
+            create_schema()
+
+        warmup = min(app.config.get('DATABASE_POOL_WARMUP', 0), app.config.get('DATABASE_POOL_SIZE', 5))
+        if warmup > 0 and isinstance(engine.pool, QueuePool):
+            start = time.perf_counter()
+            opened = warm_pool(engine, warmup)
+            logger.info("%s connexion(s) ouverte(s) au démarrage en %.3f s.", opened, time.perf_counter() - start)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """
+        Crée les tables manquantes de la base de données configurée (DATABASE_URL) et ajoute les colonnes manquantes
+        des tables existantes. À lancer à chaque déploiement, avant de redémarrer l'application.
+        """
+        start = time.perf_counter()
+        created, added = create_schema()
+        click.echo(f"{len(created)} table(s) créée(s) et {len(added)} colonne(s) ajoutée(s) en "
+                   f"{time.perf_counter() - start:.2f} s.")
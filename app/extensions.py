@@ -3,6 +3,7 @@ Code source qui permet d'initialiser les extensions.
 """
 
 import os
+import logging
 import requests
 
 from dotenv import load_dotenv
@@ -10,6 +11,8 @@ from dotenv import load_dotenv
 # Chargement des variables d'environnement depuis .env.
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Fonctions vérifiant les extensions des imports.
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx'}
 
@@ -56,24 +59,21 @@ def create_whereby_meeting_admin():
         response = requests.post(API_URL, headers=headers, json=data)
         response.raise_for_status()  # Pour attraper les erreurs HTTP (comme 400, 401, etc.)
 
-        # Afficher les détails de la réponse pour le debug.
-        print("Status code:", response.status_code)
         # Analyse la réponse en JSON.
         data = response.json()
-        print("Room URL:", data.get("roomUrl"))
-        print("Host room URL:", data.get("hostRoomUrl"))
+        # Détails de la réponse pour le debug.
+        logger.debug("Salle Whereby créée (code %s) : %s", response.status_code, data.get("roomUrl"))
 
         # Renvoie l'URL de la salle pour l'hôte.
         return data.get("hostRoomUrl")
 
     except requests.exceptions.HTTPError as http_err:
-        # Affichage de l'erreur HTTP spécifique et la réponse complète pour le debug.
-        print(f"Erreur HTTP: {http_err}")
-        # Affichage de la réponse de l'API pour comprendre l'erreur.
-        print(f"Réponse complète: {response.text}")
+        # Journalisation de l'erreur HTTP et de la réponse de l'API pour comprendre l'erreur.
+        logger.error("Erreur HTTP lors de la création de la salle Whereby : %s ; réponse : %s", http_err,
+                     response.text)
         return None
     except Exception as err:
-        # Affichage des autres erreurs générales.
-        print(f"Erreur: {err}")
+        # Journalisation des autres erreurs générales.
+        logger.exception("Erreur lors de la création de la salle Whereby : %s", err)
         return None
 
@@ -0,0 +1,142 @@
+"""
+Code permettant de mettre en cache des fragments de gabarits Jinja avec la balise {% cache %}.
+
+Exemple :
+    {% for video in videos %}
+        {% cache ['video-card', video], 3600 %}
+            ... carte de la vidéo ...
+        {% endcache %}
+    {% endfor %}
+
+La clé est une expression quelconque : les objets SQLAlchemy y sont remplacés par leur version (nom de la table et
+valeurs de toutes leurs colonnes), si bien qu'un fragment n'est réutilisé que tant que les objets dont il dépend
+n'ont pas changé. Aucune invalidation n'est donc nécessaire et un cache propre à chaque processus suffit
+(configuration FRAGMENT_CACHE_BACKEND, 'memory' par défaut).
+
+Un fragment stocké est servi à tous les visiteurs : il ne doit contenir aucune donnée propre au visiteur. Seuls
+quelques cas sont détectés, le cache est alors ignoré (fragment rendu mais pas stocké) :
+    - visiteur connecté (current_user.is_authenticated) : ni lecture ni écriture du cache ;
+    - session modifiée pendant le rendu du fragment (messages flash lus, valeur écrite) ;
+    - jeton CSRF de la requête présent dans le fragment.
+Toute autre donnée propre au visiteur (valeur lue dans la session ou dans g, adresse IP, paramètres de la requête
+absents de la clé) n'est pas détectée : elle doit être placée hors de la balise {% cache %} ou ajoutée à la clé.
+"""
+import hashlib
+import logging
+
+from flask import current_app, g, session, has_request_context
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.cache import create_cache
+
+logger = logging.getLogger(__name__)
+
+# Durée de vie par défaut (en secondes) d'un fragment.
+FRAGMENT_DEFAULT_TIMEOUT = 3600
+
+# Noms des colonnes de chaque table, utilisés pour calculer la version d'un objet.
+_column_keys = {}
+
+
+def version_stamp(value):
+    """
+    Remplace récursivement les objets SQLAlchemy d'une clé de fragment par leur version.
+
+    Les valeurs déjà chargées sont lues directement dans l'objet ; les autres passent par l'attribut (et sont
+    chargées si nécessaire), pour qu'un objet expiré ne produise jamais une version vide.
+
+    :param value: Partie de clé (objet SQLAlchemy, liste, tuple ou valeur simple).
+    :return: Valeur utilisable dans repr() de manière stable.
+    """
+    table = getattr(value, '__table__', None)
+    if table is not None:
+        keys = _column_keys.get(table)
+        if keys is None:
+            keys = _column_keys[table] = tuple(column.key for column in table.columns)
+        loaded = value.__dict__
+        return (table.name,) + tuple(loaded[key] if key in loaded else getattr(value, key, None) for key in keys)
+    if isinstance(value, (list, tuple)):
+        return tuple(version_stamp(item) for item in value)
+    return value
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Extension Jinja ajoutant la balise {% cache clé[, durée] %} ... {% endcache %}.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        """
+        Analyse la balise : une clé, une durée de vie optionnelle, puis le corps jusqu'à {% endcache %}.
+        """
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        timeout = parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+
+        # Le nom du gabarit et la ligne distinguent deux fragments ayant la même clé.
+        location = nodes.Const(f'{parser.name}:{lineno}')
+        return nodes.CallBlock(self.call_method('_render_fragment', [location, key, timeout]), [], [], body) \
+            .set_lineno(lineno)
+
+    def _render_fragment(self, location, key, timeout, caller):
+        """
+        Renvoie le fragment depuis le cache, ou le rend et le stocke.
+
+        :param location: Gabarit et ligne de la balise.
+        :param key: Clé du fragment.
+        :param timeout: Durée de vie en secondes, ou None.
+        :param caller: Fonction rendant le corps de la balise.
+        :return: Markup du fragment.
+        """
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is None or not has_request_context() or current_user.is_authenticated:
+            return caller()
+
+        seed = repr((location, version_stamp(key)))
+        cache_key = 'fragment:' + hashlib.sha1(seed.encode('utf-8')).hexdigest()
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.error("Erreur lors de la lecture du cache des fragments : %s", e)
+            return caller()
+        if cached is not None:
+            return Markup(cached)
+
+        # Session marquée non modifiée pendant le rendu, pour savoir si le fragment la lit (messages flash) ou l'écrit.
+        modified = session.modified
+        session.modified = False
+        try:
+            rendered = caller()
+        finally:
+            touched = session.modified
+            session.modified = modified or touched
+        if touched:
+            logger.debug("Fragment %s non mis en cache : la session a été modifiée pendant son rendu.", location)
+            return rendered
+
+        token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if token and token in rendered:
+            logger.warning("Fragment %s non mis en cache : il contient un jeton CSRF.", location)
+            return rendered
+        try:
+            cache.set(cache_key, str(rendered),
+                      timeout or current_app.config.get('FRAGMENT_CACHE_DEFAULT_TIMEOUT', FRAGMENT_DEFAULT_TIMEOUT))
+        except Exception as e:
+            logger.error("Erreur lors de l'écriture du cache des fragments : %s", e)
+        return rendered
+
+
+def init_fragment_cache(app):
+    """
+    Ajoute la balise {% cache %} à l'environnement Jinja de l'application et crée le stockage des fragments.
+
+    :param app: Instance de l'application Flask.
+    """
+    app.extensions['fragment_cache'] = create_cache(app.config, prefix='FRAGMENT_CACHE', root_path=app.root_path)
+    app.jinja_env.add_extension(FragmentCacheExtension)
@@ -0,0 +1,171 @@
+"""
+Code permettant de configurer la journalisation de l'application sans bloquer les requêtes.
+
+Les journaux sont déposés dans une file (QueueHandler) par le thread qui les émet ; un thread dédié
+(QueueListener) les écrit ensuite dans un fichier (LOG_FILE, une ligne JSON par message, relatif à la racine de
+l'application) et sur la sortie d'erreur. Chaque ligne émise pendant une requête HTTP porte l'identifiant de la requête (en-tête X-Request-ID reçu,
+ou généré et renvoyé dans la réponse), sa méthode, son chemin et sa route ; la fin de chaque requête est journalisée
+avec son code de réponse et sa durée.
+
+Tous les processus du serveur (workers Passenger) écrivent dans le même fichier : aucun ne le fait tourner lui-même,
+ce qui écraserait les archives des autres. La rotation est confiée à logrotate ; WatchedFileHandler rouvre le fichier
+dès qu'il a été déplacé. Exemple de configuration (/etc/logrotate.d/tititechnique) :
+
+    /chemin/du/site/fichier.log {
+        weekly
+        rotate 5
+        compress
+        delaycompress
+        missingok
+        notifempty
+    }
+"""
+import os
+import copy
+import json
+import time
+import uuid
+import queue
+import atexit
+import logging
+import datetime
+
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from flask import g, request, has_request_context
+
+logger = logging.getLogger(__name__)
+
+# Format des lignes écrites sur la sortie d'erreur.
+CONSOLE_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+
+# Attributs standard d'un LogRecord, exclus des champs supplémentaires du JSON.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Ajoute aux messages émis pendant une requête HTTP l'identifiant, la méthode, le chemin et la route de celle-ci.
+
+    Le filtre est appliqué par le QueueHandler, dans le thread de la requête : le contexte Flask n'est plus
+    disponible au moment de l'écriture.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+        return True
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler conservant l'exception à part du message (champ 'exception' du JSON).
+    """
+
+    def prepare(self, record):
+        # Le message est calculé dans le thread émetteur : ses arguments peuvent changer après l'appel.
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formate un message en une ligne JSON (date, niveau, logger, message, contexte de la requête, exception et
+    champs passés par extra=).
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+            .isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _stop_listener():
+    """
+    Vide la file et arrête le thread d'écriture des journaux.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logging(app):
+    """
+    Configure la journalisation : file d'attente, fichier JSON, sortie d'erreur, identifiant et durée des requêtes.
+
+    :param app: Instance de l'application Flask.
+    """
+    global _listener
+    _stop_listener()
+
+    path = app.config.get('LOG_FILE', 'fichier.log')
+    if not os.path.isabs(path):
+        path = os.path.join(app.root_path, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    file_handler = WatchedFileHandler(path, encoding='utf-8')
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = RecordQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    # Les journaux de l'application (app.logger) et des modules remontent au logger racine.
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    app.logger.handlers.clear()
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.unregister(_stop_listener)
+    atexit.register(_stop_listener)
+
+    if not app.config.get('LOG_REQUESTS', True):
+        return
+
+    @app.before_request
+    def start_request_log():
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex[:16]
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        start = g.get('request_start')
+        if start is not None:
+            response.headers['X-Request-ID'] = g.request_id
+            # Chemin sans la chaîne de requête : elle peut contenir le jeton _profil ou les termes d'une recherche.
+            logger.info("%s %s %s", request.method, request.path, response.status_code,
+                        extra={'status': response.status_code,
+                               'duration_ms': round((time.perf_counter() - start) * 1000, 2)})
+        return response
@@ -0,0 +1,272 @@
+"""
+Code permettant de diagnostiquer la consommation mémoire des processus du serveur.
+
+- tracemalloc, démarré et arrêté à la demande depuis la page admin.memory : instantanés (les
+  MEMORY_MAX_SNAPSHOTS derniers), principales lignes d'allocation et différence entre deux instantanés ;
+- objets ORM chargés par chaque requête et taille maximale atteinte par l'identity map de la session (dernière
+  valeur et maximum par route) ;
+- nombre d'objets ORM vivants par modèle (parcours du ramasse-miettes, à la demande uniquement) ;
+- mémoire résidente (RSS) du processus, relevée au plus une fois par MEMORY_RSS_INTERVAL secondes (Linux, macOS ;
+  non relevée sous Windows, où le module resource n'existe pas).
+
+Toutes les mesures sont propres au processus qui répond à la requête.
+"""
+import gc
+import os
+import time
+import threading
+import datetime
+import tracemalloc
+
+from collections import deque
+
+try:
+    import resource
+except ImportError:
+    # Windows : mémoire résidente non disponible.
+    resource = None
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.Models import db
+
+# Nombre de relevés de RSS conservés (24 h à un relevé par minute).
+RSS_HISTORY_SIZE = 1440
+
+_lock = threading.Lock()
+_snapshots = deque()
+_rss_history = deque(maxlen=RSS_HISTORY_SIZE)
+_identity_maps = {}
+_local = threading.local()
+_state = {'last_rss': 0.0}
+
+
+def current_rss():
+    """
+    Renvoie la mémoire résidente actuelle du processus (/proc/self/statm sous Linux, sinon le maximum atteint).
+
+    :return: Nombre d'octets, ou None si la mesure n'est pas disponible (Windows).
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return None
+        # ru_maxrss est en kilo-octets sous Linux et en octets sous macOS.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def record_rss(interval=60):
+    """
+    Ajoute un relevé de RSS à l'historique si le précédent date de plus de interval secondes.
+
+    :param interval: Intervalle minimal entre deux relevés, en secondes.
+    """
+    now = time.time()
+    if now - _state['last_rss'] < interval:
+        return
+    _state['last_rss'] = now
+    rss = current_rss()
+    if rss is not None:
+        _rss_history.append((now, rss))
+
+
+def rss_history():
+    """
+    Renvoie l'historique des relevés de RSS, du plus récent au plus ancien.
+
+    :return: Liste de tuples (datetime, octets).
+    """
+    return [(datetime.datetime.fromtimestamp(taken), value) for taken, value in reversed(_rss_history)]
+
+
+class _RequestObjects:
+    """
+    Objets ORM chargés pendant la requête HTTP en cours.
+    """
+
+    __slots__ = ('loaded', 'peak')
+
+    def __init__(self):
+        self.loaded = 0
+        self.peak = 0
+
+
+def _loaded_as_persistent(session, instance):
+    """
+    Compte un objet chargé depuis la base et relève la taille de l'identity map (elle ne garde que des références
+    faibles : à la fin de la requête, elle est déjà vidée des objets qui ne sont plus utilisés).
+    """
+    objects = getattr(_local, 'objects', None)
+    if objects is not None:
+        objects.loaded += 1
+        size = len(session.identity_map)
+        if size > objects.peak:
+            objects.peak = size
+
+
+def record_identity_map(endpoint, loaded, peak):
+    """
+    Enregistre les objets ORM chargés par une requête.
+
+    :param endpoint: Route de la requête.
+    :param loaded: Nombre d'objets chargés depuis la base.
+    :param peak: Taille maximale atteinte par l'identity map.
+    """
+    with _lock:
+        stats = _identity_maps.get(endpoint)
+        if stats is None:
+            stats = _identity_maps[endpoint] = {'loaded': 0, 'peak': 0, 'max_loaded': 0, 'max_peak': 0,
+                                                'requests': 0}
+        stats['loaded'] = loaded
+        stats['peak'] = peak
+        stats['max_loaded'] = max(stats['max_loaded'], loaded)
+        stats['max_peak'] = max(stats['max_peak'], peak)
+        stats['requests'] += 1
+
+
+def identity_map_stats():
+    """
+    Renvoie les objets ORM chargés par route, de la route la plus gourmande à la moins gourmande.
+
+    :return: Liste de dictionnaires (endpoint, loaded et peak pour la dernière requête, max_loaded et max_peak,
+             requests).
+    """
+    with _lock:
+        items = [dict(stats, endpoint=endpoint) for endpoint, stats in _identity_maps.items()]
+    return sorted(items, key=lambda stats: -stats['max_peak'])
+
+
+def orm_object_counts():
+    """
+    Compte les instances vivantes de chaque modèle SQLAlchemy (parcours de tous les objets du ramasse-miettes :
+    plusieurs dizaines de millisecondes, à n'appeler qu'à la demande).
+
+    :return: Liste de tuples (modèle, nombre), du plus nombreux au moins nombreux.
+    """
+    classes = {mapper.class_: mapper.class_.__name__ for mapper in db.Model.registry.mappers}
+    counts = {}
+    for obj in gc.get_objects():
+        name = classes.get(type(obj))
+        if name is not None:
+            counts[name] = counts.get(name, 0) + 1
+    return sorted(counts.items(), key=lambda item: -item[1])
+
+
+def start_tracing(frames=10):
+    """
+    Démarre tracemalloc (sans effet s'il est déjà démarré).
+
+    :param frames: Nombre de lignes de pile conservées par allocation.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing():
+    """
+    Arrête tracemalloc et oublie les instantanés (ils ne sont comparables qu'au sein d'une même trace).
+    """
+    tracemalloc.stop()
+    _snapshots.clear()
+
+
+def take_snapshot(max_snapshots=5):
+    """
+    Prend un instantané des allocations (hors allocations de tracemalloc lui-même).
+
+    :param max_snapshots: Nombre d'instantanés conservés.
+    :return: Tuple (timestamp, instantané), ou None si tracemalloc n'est pas démarré.
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ))
+    with _lock:
+        _snapshots.append((time.time(), snapshot))
+        while len(_snapshots) > max(max_snapshots, 2):
+            _snapshots.popleft()
+        return _snapshots[-1]
+
+
+def _format_stat(stat):
+    """
+    Convertit une statistique tracemalloc en dictionnaire affichable.
+    """
+    frame = stat.traceback[0]
+    return {
+        'location': f'{frame.filename}:{frame.lineno}',
+        'size': stat.size,
+        'count': stat.count,
+        'size_diff': getattr(stat, 'size_diff', None),
+        'count_diff': getattr(stat, 'count_diff', None),
+    }
+
+
+def top_allocations(limit=20):
+    """
+    Renvoie les lignes de code ayant alloué le plus de mémoire dans le dernier instantané.
+
+    :param limit: Nombre de lignes renvoyées.
+    :return: Liste de dictionnaires (location, size, count).
+    """
+    if not _snapshots:
+        return []
+    return [_format_stat(stat) for stat in _snapshots[-1][1].statistics('lineno')[:limit]]
+
+
+def snapshot_diff(limit=20):
+    """
+    Compare les deux derniers instantanés : lignes dont les allocations ont le plus augmenté.
+
+    :param limit: Nombre de lignes renvoyées.
+    :return: Liste de dictionnaires (location, size, count, size_diff, count_diff), vide s'il y a moins de deux
+             instantanés.
+    """
+    if len(_snapshots) < 2:
+        return []
+    stats = _snapshots[-1][1].compare_to(_snapshots[-2][1], 'lineno')
+    return [_format_stat(stat) for stat in stats[:limit]]
+
+
+def tracing_status():
+    """
+    Renvoie l'état de tracemalloc.
+
+    :return: Dictionnaire (pid, tracing, current, peak, snapshots : liste des dates des instantanés).
+    """
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {'pid': os.getpid(), 'tracing': tracemalloc.is_tracing(), 'current': current, 'peak': peak,
+            'snapshots': [taken for taken, _ in _snapshots]}
+
+
+def init_memory_diagnostics(app):
+    """
+    Compte les objets ORM chargés par chaque requête et relève périodiquement la RSS.
+
+    :param app: Instance de l'application Flask.
+    """
+    if not app.config.get('MEMORY_DIAGNOSTICS_ENABLED', True):
+        return
+    interval = app.config.get('MEMORY_RSS_INTERVAL', 60)
+
+    if not event.contains(Session, 'loaded_as_persistent', _loaded_as_persistent):
+        event.listen(Session, 'loaded_as_persistent', _loaded_as_persistent)
+
+    @app.before_request
+    def start_memory_diagnostics():
+        _local.objects = _RequestObjects()
+
+    @app.teardown_request
+    def record_memory(error=None):
+        objects = getattr(_local, 'objects', None)
+        _local.objects = None
+        if objects is not None:
+            record_identity_map(request.endpoint or 'inconnu', objects.loaded, objects.peak)
+        record_rss(interval)
@@ -0,0 +1,278 @@
+"""
+Code permettant de mesurer les performances de chaque requête HTTP.
+
+Pour chaque route sont agrégés, dans le processus courant : un histogramme des temps de réponse, le nombre de
+requêtes par méthode et code HTTP, le temps passé dans la base de données, le nombre de requêtes SQL et le temps de
+rendu des gabarits. Ces mesures sont exposées au format texte de Prometheus par la route admin.metrics et, en
+mode debug (ou avec METRICS_SERVER_TIMING), résumées dans l'en-tête Server-Timing de chaque réponse (visible dans
+l'onglet Réseau du navigateur).
+
+Les mesures d'une requête sont conservées dans une variable locale au thread : les événements SQLAlchemy n'ont
+donc besoin d'aucun contexte Flask, et les requêtes SQL hors requête HTTP (tâches planifiées) sont ignorées. La
+durée des requêtes SQL est mesurée une seule fois, par les listeners de app/query_monitor.py (on_query()).
+"""
+import time
+import threading
+
+from bisect import bisect_left
+
+from flask import request, template_rendered, before_render_template
+
+from app.query_monitor import on_query
+
+# Bornes (en secondes) de l'histogramme des temps de réponse, si METRICS_LATENCY_BUCKETS est absent.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Préfixe des métriques exposées.
+METRIC_PREFIX = 'tititechnique'
+
+_local = threading.local()
+
+
+class RequestTiming:
+    """
+    Mesures de la requête HTTP en cours.
+    """
+
+    __slots__ = ('start', 'db_time', 'queries', 'template_time', 'template_start', 'status')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.template_start = None
+        self.status = None
+
+
+class _EndpointStats:
+    """
+    Mesures agrégées d'une route.
+    """
+
+    __slots__ = ('buckets', 'latency_sum', 'count', 'db_time', 'queries', 'template_time', 'statuses')
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.latency_sum = 0.0
+        self.count = 0
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """
+    Agrégation des mesures des requêtes par route, partagée entre les threads du processus.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def observe(self, endpoint, method, status, duration, db_time=0.0, queries=0, template_time=0.0):
+        """
+        Enregistre les mesures d'une requête terminée.
+
+        :param endpoint: Nom de la route.
+        :param method: Méthode HTTP.
+        :param status: Code HTTP de la réponse.
+        :param duration: Temps de réponse en secondes.
+        :param db_time: Temps passé dans la base de données, en secondes.
+        :param queries: Nombre de requêtes SQL.
+        :param template_time: Temps de rendu des gabarits, en secondes.
+        """
+        index = bisect_left(self.buckets, duration)
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats(len(self.buckets) + 1)
+            stats.buckets[index] += 1
+            stats.latency_sum += duration
+            stats.count += 1
+            stats.db_time += db_time
+            stats.queries += queries
+            stats.template_time += template_time
+            key = (method, status)
+            stats.statuses[key] = stats.statuses.get(key, 0) + 1
+
+    def snapshot(self):
+        """
+        Copie les mesures agrégées (pour les lire sans bloquer les requêtes en cours).
+
+        :return: Dictionnaire {route: _EndpointStats}.
+        """
+        with self._lock:
+            copies = {}
+            for endpoint, stats in self._endpoints.items():
+                copy = _EndpointStats(0)
+                copy.buckets = list(stats.buckets)
+                copy.statuses = dict(stats.statuses)
+                for name in ('latency_sum', 'count', 'db_time', 'queries', 'template_time'):
+                    setattr(copy, name, getattr(stats, name))
+                copies[endpoint] = copy
+            return copies
+
+    def render(self):
+        """
+        Produit les mesures au format texte de Prometheus (version 0.0.4).
+
+        :return: Chaîne de caractères.
+        """
+        endpoints = sorted(self.snapshot().items())
+        prefix = METRIC_PREFIX
+        lines = [
+            f'# HELP {prefix}_process_start_time_seconds Date de démarrage du processus.',
+            f'# TYPE {prefix}_process_start_time_seconds gauge',
+            f'{prefix}_process_start_time_seconds {self.started:.3f}',
+            f'# HELP {prefix}_http_requests_total Requêtes HTTP par route, méthode et code de réponse.',
+            f'# TYPE {prefix}_http_requests_total counter',
+        ]
+        for endpoint, stats in endpoints:
+            for (method, status), count in sorted(stats.statuses.items()):
+                labels = f'endpoint="{_escape(endpoint)}",method="{method}",status="{status}"'
+                lines.append(f'{prefix}_http_requests_total{{{labels}}} {count}')
+
+        lines += [f'# HELP {prefix}_http_request_duration_seconds Temps de réponse par route.',
+                  f'# TYPE {prefix}_http_request_duration_seconds histogram']
+        for endpoint, stats in endpoints:
+            label = f'endpoint="{_escape(endpoint)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), stats.buckets):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{prefix}_http_request_duration_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_http_request_duration_seconds_sum{{{label}}} {stats.latency_sum:.6f}')
+            lines.append(f'{prefix}_http_request_duration_seconds_count{{{label}}} {stats.count}')
+
+        for name, attribute, description in (
+                ('db_seconds', 'db_time', 'Temps passé dans la base de données par route.'),
+                ('db_queries', 'queries', 'Nombre de requêtes SQL par route.'),
+                ('template_seconds', 'template_time', 'Temps de rendu des gabarits par route.')):
+            lines += [f'# HELP {prefix}_http_request_{name} {description}',
+                      f'# TYPE {prefix}_http_request_{name} summary']
+            for endpoint, stats in endpoints:
+                label = f'endpoint="{_escape(endpoint)}"'
+                value = getattr(stats, attribute)
+                value = f'{value:.6f}' if isinstance(value, float) else value
+                lines.append(f'{prefix}_http_request_{name}_sum{{{label}}} {value}')
+                lines.append(f'{prefix}_http_request_{name}_count{{{label}}} {stats.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    """
+    Échappe une valeur d'étiquette Prometheus.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def current_timing():
+    """
+    Renvoie les mesures de la requête HTTP en cours dans ce thread.
+
+    :return: RequestTiming, ou None en dehors d'une requête instrumentée.
+    """
+    return getattr(_local, 'timing', None)
+
+
+def _record_query(statement, duration):
+    """
+    Ajoute la durée d'une requête SQL aux mesures de la requête HTTP en cours (abonné de app.query_monitor).
+    """
+    timing = getattr(_local, 'timing', None)
+    if timing is not None:
+        timing.db_time += duration
+        timing.queries += 1
+
+
+def _before_render(sender, template, context, **extra):
+    """
+    Note le début du rendu d'un gabarit.
+    """
+    timing = getattr(_local, 'timing', None)
+    if timing is not None and timing.template_start is None:
+        timing.template_start = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    """
+    Ajoute la durée du rendu d'un gabarit aux mesures de la requête HTTP en cours.
+    """
+    timing = getattr(_local, 'timing', None)
+    if timing is not None and timing.template_start is not None:
+        timing.template_time += time.perf_counter() - timing.template_start
+        timing.template_start = None
+
+
+def server_timing(timing, now=None):
+    """
+    Construit la valeur de l'en-tête Server-Timing d'une requête.
+
+    :param timing: Mesures de la requête.
+    :param now: Instant de fin (time.perf_counter), par défaut l'instant présent.
+    :return: Chaîne de caractères.
+    """
+    total = ((now or time.perf_counter()) - timing.start) * 1000
+    return (f'app;dur={total:.1f}, db;dur={timing.db_time * 1000:.1f};desc="{timing.queries} requetes SQL", '
+            f'tpl;dur={timing.template_time * 1000:.1f}')
+
+
+def init_metrics(app):
+    """
+    Installe les mesures des requêtes : événements de requête Flask, de curseur SQLAlchemy et de rendu des gabarits.
+
+    :param app: Instance de l'application Flask.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    metrics = app.extensions['metrics'] = RequestMetrics(app.config.get('METRICS_LATENCY_BUCKETS',
+                                                                        DEFAULT_LATENCY_BUCKETS))
+    send_server_timing = app.debug or app.config.get('METRICS_SERVER_TIMING', False)
+
+    on_query(_record_query)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_request_timing():
+        _local.timing = RequestTiming()
+
+    @app.after_request
+    def stop_request_timing(response):
+        timing = getattr(_local, 'timing', None)
+        if timing is not None:
+            timing.status = response.status_code
+            if send_server_timing:
+                response.headers['Server-Timing'] = server_timing(timing)
+        return response
+
+    @app.teardown_request
+    def record_request_timing(error=None):
+        timing = getattr(_local, 'timing', None)
+        if timing is None:
+            return
+        _local.timing = None
+        metrics.observe(request.endpoint or 'inconnu', request.method, timing.status or 500,
+                        time.perf_counter() - timing.start, timing.db_time, timing.queries, timing.template_time)
+
+
+def metrics_text(app):
+    """
+    Renvoie les mesures de l'application au format texte de Prometheus.
+
+    :param app: Instance de l'application Flask.
+    :return: Chaîne de caractères (vide si les mesures sont désactivées et le pool non mesuré).
+    """
+    metrics = app.extensions.get('metrics')
+    text = metrics.render() if metrics is not None else ''
+
+    # Mesures du pool de connexions à la base de données (voir app/database.py).
+    pool_metrics = app.extensions.get('db_pool')
+    if pool_metrics is not None:
+        text += pool_metrics.render(METRIC_PREFIX)
+    return text
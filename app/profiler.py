@@ -0,0 +1,225 @@
+"""
+Code permettant de profiler des requêtes en production.
+
+Une requête est profilée si elle est tirée au sort (PROFILER_SAMPLE_RATE, 0 par défaut) ou si elle porte un jeton
+de profilage signé, généré depuis la page admin.profiles, dans l'en-tête X-Profile ou le paramètre '_profil'.
+Deux modes (PROFILER_MODE) :
+    - 'sampler' : un thread relève la pile de la requête toutes les PROFILER_INTERVAL secondes et produit des
+      piles agrégées (format « collapsed » de flamegraph.pl et speedscope) ;
+    - 'cprofile' : cProfile mesure tous les appels et produit un fichier pstats (snakeviz, gprof2dot).
+
+Les captures sont écrites dans PROFILER_FOLDER, qui ne conserve que les PROFILER_MAX_FILES plus récentes. Une seule
+requête est profilée à la fois par processus ; hors profilage, le coût se limite à un tirage aléatoire et à la
+lecture d'un en-tête.
+"""
+import os
+import re
+import sys
+import time
+import random
+import cProfile
+import logging
+import threading
+
+from collections import Counter
+
+from flask import current_app, request, g
+from itsdangerous import BadSignature
+
+logger = logging.getLogger(__name__)
+
+# Sel du jeton de profilage (distinct des autres usages du serializer de l'application).
+TOKEN_SALT = 'profiler'
+
+# En-tête et paramètre déclenchant le profilage d'une requête.
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '_profil'
+
+# Nom des captures : date, route, durée (ms) et extension ('folded' ou 'pstats').
+CAPTURE_PATTERN = re.compile(r'^(\d{8}-\d{6}-\d{6})_([\w.-]+)_(\d+)ms\.(folded|pstats)$')
+
+# Une seule requête profilée à la fois (cProfile et le thread d'échantillonnage sont coûteux).
+_busy = threading.Lock()
+
+
+class StackSampler:
+    """
+    Échantillonneur de la pile d'un thread : un thread secondaire relève périodiquement la pile du thread observé.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def collapsed(self):
+        """
+        Renvoie les piles au format « collapsed » : une pile par ligne, suivie du nombre d'échantillons.
+
+        :return: Chaîne de caractères.
+        """
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def profiler_folder(app=None):
+    """
+    Renvoie le dossier des captures (PROFILER_FOLDER, relatif à la racine de l'application), en le créant si
+    nécessaire.
+
+    :return: Chemin absolu du dossier.
+    """
+    app = app or current_app
+    folder = app.config.get('PROFILER_FOLDER', os.path.join('cache', 'profiles'))
+    if not os.path.isabs(folder):
+        folder = os.path.join(app.root_path, folder)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def profile_token():
+    """
+    Génère un jeton de profilage signé, valable PROFILER_TOKEN_MAX_AGE secondes.
+
+    :return: Jeton.
+    """
+    return current_app.config['serializer'].dumps('profil', salt=TOKEN_SALT)
+
+
+def _token_valid(token):
+    """
+    Vérifie un jeton de profilage.
+
+    :param token: Jeton reçu.
+    :return: True si le jeton est signé et non expiré.
+    """
+    try:
+        current_app.config['serializer'].loads(token, salt=TOKEN_SALT,
+                                               max_age=current_app.config.get('PROFILER_TOKEN_MAX_AGE', 3600))
+        return True
+    except BadSignature:
+        return False
+
+
+def list_captures():
+    """
+    Liste les captures enregistrées, de la plus récente à la plus ancienne.
+
+    :return: Liste de dictionnaires (name, date, endpoint, duration_ms, format, size).
+    """
+    folder = profiler_folder()
+    captures = []
+    for name in os.listdir(folder):
+        match = CAPTURE_PATTERN.match(name)
+        if match:
+            stamp, endpoint, duration, kind = match.groups()
+            captures.append({
+                'name': name,
+                'date': time.strftime('%d/%m/%Y %H:%M:%S', time.strptime(stamp[:15], '%Y%m%d-%H%M%S')),
+                'endpoint': endpoint,
+                'duration_ms': int(duration),
+                'format': kind,
+                'size': os.path.getsize(os.path.join(folder, name)),
+            })
+    return sorted(captures, key=lambda capture: capture['name'], reverse=True)
+
+
+def _save_capture(folder, endpoint, duration, kind, writer):
+    """
+    Écrit une capture puis supprime les plus anciennes au-delà de PROFILER_MAX_FILES.
+
+    :param folder: Dossier des captures.
+    :param endpoint: Route profilée.
+    :param duration: Durée de la requête en secondes.
+    :param kind: 'folded' ou 'pstats'.
+    :param writer: Fonction recevant le chemin du fichier à écrire.
+    """
+    now = time.time()
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now)) + f'-{int(now % 1 * 1e6):06d}'
+    endpoint = re.sub(r'[^\w.-]', '-', endpoint)
+    name = f"{stamp}_{endpoint}_{int(duration * 1000)}ms.{kind}"
+    writer(os.path.join(folder, name))
+
+    names = sorted(name for name in os.listdir(folder) if CAPTURE_PATTERN.match(name))
+    for old in names[:max(0, len(names) - current_app.config.get('PROFILER_MAX_FILES', 50))]:
+        os.remove(os.path.join(folder, old))
+
+
+def _wanted():
+    """
+    Indique si la requête en cours doit être profilée.
+    """
+    token = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_ARG)
+    if token:
+        return _token_valid(token)
+    rate = current_app.config.get('PROFILER_SAMPLE_RATE', 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def init_profiler(app):
+    """
+    Installe le profilage des requêtes tirées au sort ou portant un jeton de profilage.
+
+    :param app: Instance de l'application Flask.
+    """
+    if not app.config.get('PROFILER_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_profiler():
+        if not _wanted() or not _busy.acquire(blocking=False):
+            return
+        if app.config.get('PROFILER_MODE', 'sampler') == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), app.config.get('PROFILER_INTERVAL', 0.005))
+            profiler.start()
+        g.profiler = (profiler, time.perf_counter())
+
+    @app.teardown_request
+    def stop_profiler(error=None):
+        active = g.pop('profiler', None)
+        if active is None:
+            return
+        profiler, start = active
+        try:
+            duration = time.perf_counter() - start
+            endpoint = request.endpoint or 'inconnu'
+            folder = profiler_folder(app)
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+                _save_capture(folder, endpoint, duration, 'pstats', profiler.dump_stats)
+            else:
+                profiler.stop()
+
+                def write(path):
+                    with open(path, 'w', encoding='utf-8') as file:
+                        file.write(profiler.collapsed())
+
+                _save_capture(folder, endpoint, duration, 'folded', write)
+            logger.info("Requête %s profilée (%.0f ms).", endpoint, duration * 1000)
+        except Exception as e:
+            logger.error("Erreur lors de l'enregistrement du profil : %s", e)
+        finally:
+            _busy.release()
@@ -0,0 +1,251 @@
+"""
+Code permettant de repérer les requêtes SQL coûteuses.
+
+Trois outils branchés sur les événements de curseur de SQLAlchemy :
+    - le journal des requêtes lentes : toute requête plus longue que SLOW_QUERY_THRESHOLD secondes est journalisée
+      avec sa forme (sans les valeurs des paramètres, qui peuvent être sensibles) et la route qui l'a déclenchée ;
+    - le détecteur de N+1 : une même forme de requête (texte SQL, listes IN réduites) exécutée au moins
+      N_PLUS_ONE_THRESHOLD fois pendant une requête HTTP est signalée à la fin de celle-ci, avec le nombre
+      d'exécutions et la pile d'appels (code de l'application uniquement) qui l'a produite ;
+    - query_budget() : bloc qui échoue si le nombre de requêtes SQL exécutées dépasse un budget.
+
+Ces listeners sont les seuls à chronométrer les requêtes SQL : les autres modules (app/metrics.py) reçoivent la
+durée de chaque requête en s'abonnant avec on_query().
+"""
+import os
+import re
+import time
+import logging
+import threading
+import traceback
+
+from contextlib import contextmanager
+
+from flask import request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Seuils par défaut : durée d'une requête lente (secondes) et nombre de répétitions signalées comme N+1.
+DEFAULT_SLOW_QUERY_THRESHOLD = 0.1
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# Nombre de lignes de la pile d'appels conservées pour un N+1.
+STACK_DEPTH = 6
+
+# Clé de Connection.info contenant les débuts des requêtes SQL en cours.
+QUERY_START = 'query_monitor_start'
+
+# Listes de paramètres développées (IN (?, ?, ?) ou IN (%s, %s)) : réduites à un seul paramètre.
+_EXPANDED_PARAMETERS = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+
+# Dossier du code de l'application (app/), seul retenu dans les piles d'appels : un environnement virtuel placé à la
+# racine du dépôt (venv/) n'en fait pas partie. Les chemins sont affichés relativement à la racine du dépôt.
+_APP_FOLDER = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_local = threading.local()
+
+# Seuils de l'application (un seul jeu de listeners pour tout le processus ; None ou 0 désactive).
+_settings = {'slow': None, 'n_plus_one': None}
+
+# Fonctions appelées après chaque requête SQL avec son texte et sa durée (voir on_query()).
+_observers = []
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Exception levée lorsqu'un bloc exécute plus de requêtes SQL que son budget.
+    """
+
+
+class _RequestQueries:
+    """
+    Formes des requêtes SQL exécutées pendant la requête HTTP en cours.
+    """
+
+    __slots__ = ('counts', 'stacks')
+
+    def __init__(self):
+        self.counts = {}
+        self.stacks = {}
+
+
+def statement_shape(statement):
+    """
+    Réduit une requête SQL à sa forme : les listes de paramètres développées sont remplacées par un seul paramètre,
+    pour que deux chargements de tailles différentes aient la même forme.
+
+    :param statement: Texte SQL envoyé au curseur.
+    :return: Texte SQL normalisé.
+    """
+    return _EXPANDED_PARAMETERS.sub('(?)', ' '.join(statement.split()))
+
+
+def _app_stack():
+    """
+    Résume la pile d'appels courante aux lignes du code de l'application (hors bibliothèques et hors ce module).
+
+    :return: Liste de chaînes 'fichier:ligne fonction'.
+    """
+    lines = []
+    for frame in traceback.extract_stack()[:-3]:
+        if frame.filename.startswith(_APP_FOLDER) and frame.filename != __file__:
+            lines.append(f'{os.path.relpath(frame.filename, _ROOT_FOLDER)}:{frame.lineno} {frame.name}')
+    return lines[-STACK_DEPTH:]
+
+
+def _route():
+    """
+    Renvoie la route de la requête HTTP en cours, pour les journaux.
+    """
+    if has_request_context():
+        return f'{request.method} {request.path} ({request.endpoint})'
+    return 'hors requête HTTP'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Note le début d'une requête SQL.
+    """
+    conn.info.setdefault(QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Journalise une requête lente, compte la forme de la requête pour le détecteur de N+1 et le budget en cours, et
+    transmet sa durée aux abonnés.
+    """
+    starts = conn.info.get(QUERY_START)
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+
+    for observer in _observers:
+        observer(statement, duration)
+
+    budgets = getattr(_local, 'budgets', None)
+    if budgets:
+        for budget in budgets:
+            budget.append(statement)
+
+    threshold = _settings['slow']
+    if threshold and duration >= threshold:
+        # Seule la forme est journalisée : les paramètres peuvent contenir des mots de passe ou des adresses.
+        logger.warning("Requête SQL lente (%.0f ms) sur %s : %s", duration * 1000, _route(),
+                       statement_shape(statement))
+
+    queries = getattr(_local, 'queries', None)
+    if queries is not None:
+        shape = statement_shape(statement)
+        count = queries.counts[shape] = queries.counts.get(shape, 0) + 1
+        if count == _settings['n_plus_one']:
+            # La pile n'est capturée qu'une fois, au franchissement du seuil.
+            queries.stacks[shape] = _app_stack()
+
+
+def _handle_error(exception_context):
+    """
+    Retire le début d'une requête SQL qui a échoué : after_cursor_execute n'est pas appelé dans ce cas.
+    """
+    conn = exception_context.connection
+    if conn is None or exception_context.is_pre_ping or getattr(exception_context, 'statement', None) is None:
+        return
+    starts = conn.info.get(QUERY_START)
+    if starts:
+        starts.pop()
+
+
+def _listen():
+    """
+    Branche les listeners sur tous les moteurs SQLAlchemy (une seule fois par processus).
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+
+
+def on_query(observer):
+    """
+    Abonne une fonction à la fin de chaque requête SQL, sans ajouter de listener de curseur.
+
+    :param observer: Fonction appelée avec le texte SQL et la durée de la requête (secondes), dans le thread qui l'a
+                     exécutée.
+    """
+    _listen()
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def report_n_plus_one(queries, route):
+    """
+    Journalise les formes de requêtes répétées au-delà du seuil pendant une requête HTTP.
+
+    :param queries: Formes des requêtes de la requête HTTP.
+    :param route: Description de la route.
+    """
+    for shape, stack in queries.stacks.items():
+        logger.warning("N+1 probable sur %s : requête exécutée %s fois : %s\n    %s", route, queries.counts[shape],
+                       shape, '\n    '.join(stack) or '(pile hors application)')
+
+
+@contextmanager
+def query_budget(max_queries, label=None):
+    """
+    Vérifie qu'un bloc n'exécute pas plus de max_queries requêtes SQL.
+
+    Exemple :
+        with query_budget(3, 'liste des vidéos'):
+            client.get('/frontend/acces-videos')
+
+    :param max_queries: Nombre maximal de requêtes SQL.
+    :param label: Nom du bloc, repris dans le message d'erreur.
+    :return: Gestionnaire de contexte renvoyant la liste des requêtes exécutées (remplie au fil du bloc).
+    :raises QueryBudgetExceeded: Si le budget est dépassé.
+    """
+    _listen()
+    statements = []
+    budgets = _local.__dict__.setdefault('budgets', [])
+    budgets.append(statements)
+    try:
+        yield statements
+    finally:
+        budgets.remove(statements)
+
+    if len(statements) > max_queries:
+        shapes = {}
+        for statement in statements:
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + 1
+        details = '\n'.join(f'  {count} x {shape}' for shape, count in sorted(shapes.items(), key=lambda i: -i[1]))
+        raise QueryBudgetExceeded(f"{label or 'Bloc'} : {len(statements)} requêtes SQL pour un budget de "
+                                  f"{max_queries}.\n{details}")
+
+
+def init_query_monitor(app):
+    """
+    Installe le journal des requêtes lentes et le détecteur de N+1.
+
+    :param app: Instance de l'application Flask.
+    """
+    if not app.config.get('QUERY_MONITOR_ENABLED', True):
+        return
+
+    _settings['slow'] = app.config.get('SLOW_QUERY_THRESHOLD', DEFAULT_SLOW_QUERY_THRESHOLD)
+    _settings['n_plus_one'] = app.config.get('N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+
+    _listen()
+
+    if not _settings['n_plus_one']:
+        return
+
+    @app.before_request
+    def start_query_monitor():
+        _local.queries = _RequestQueries()
+
+    @app.teardown_request
+    def stop_query_monitor(error=None):
+        queries = getattr(_local, 'queries', None)
+        _local.queries = None
+        if queries is not None and queries.stacks:
+            report_n_plus_one(queries, _route())
@@ -0,0 +1,206 @@
+"""
+Code permettant de classer les vidéos (populaires, tendances...) à l'aide de stratégies de score interchangeables.
+
+Une stratégie attribue un score à chaque vidéo (vues totales, vitesse de progression des vues, engagement, fraîcheur).
+Un classement, défini dans la configuration RANKINGS, combine une ou plusieurs stratégies avec des poids : les scores
+de chaque stratégie sont ramenés entre 0 et 1 puis additionnés. Les classements sont calculés après chaque
+synchronisation et stockés dans la table 'video_ranking' ; les pages lisent ensuite les premières vidéos d'un
+classement en une seule requête indexée.
+
+Exemple de configuration :
+    RANKINGS = {'tendances': {'velocite': 0.6, 'engagement': 0.2, 'fraicheur': 0.2}, 'populaires': {'vues': 1}}
+"""
+import datetime
+import logging
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.video_stat import VideoStat
+from app.Models.video_ranking import VideoRanking
+
+logger = logging.getLogger(__name__)
+
+# Nombre de vidéos conservées par classement.
+RANKING_TOP_K = 50
+
+# Paramètres des stratégies, surchargeables par la configuration RANKING_PARAMS.
+DEFAULT_RANKING_PARAMS = {
+    # Fenêtre (en jours) sur laquelle la vitesse de progression des vues est mesurée.
+    'velocity_days': 7,
+    # Demi-vie (en jours) de la décroissance exponentielle liée à l'âge d'une vidéo.
+    'half_life_days': 30,
+    # Nombre de vues ajouté au dénominateur de l'engagement, pour ne pas favoriser les vidéos très peu vues.
+    'engagement_prior_views': 100,
+}
+
+# Dictionnaire des stratégies : nom -> fonction de score.
+STRATEGIES = {}
+
+
+def strategy(name):
+    """
+    Décorateur enregistrant une stratégie de score sous un nom utilisable dans la configuration.
+
+    La fonction décorée reçoit la liste des vidéos (tuples id, date de publication, vues, likes), la date du jour et
+    les paramètres, et renvoie un dictionnaire id -> score.
+
+    :param name: Nom de la stratégie.
+    :return: Décorateur.
+    """
+    def decorator(func_strategy):
+        STRATEGIES[name] = func_strategy
+        return func_strategy
+    return decorator
+
+
+@strategy('vues')
+def score_views(videos, today, params):
+    """
+    Score égal au nombre total de vues.
+    """
+    return {video_id: view_count or 0 for video_id, _, view_count, _ in videos}
+
+
+@strategy('engagement')
+def score_engagement(videos, today, params):
+    """
+    Score égal au rapport likes / vues, lissé pour les vidéos peu vues.
+    """
+    prior = params['engagement_prior_views']
+    return {video_id: (like_count or 0) / ((view_count or 0) + prior)
+            for video_id, _, view_count, like_count in videos}
+
+
+@strategy('fraicheur')
+def score_recency(videos, today, params):
+    """
+    Score égal au nombre de vues, divisé par deux à chaque demi-vie écoulée depuis la publication.
+    """
+    half_life = params['half_life_days']
+    scores = {}
+    for video_id, published_at, view_count, _ in videos:
+        age = max((today - published_at).days, 0) if published_at else 0
+        scores[video_id] = (view_count or 0) * 0.5 ** (age / half_life)
+    return scores
+
+
+@strategy('velocite')
+def score_velocity(videos, today, params):
+    """
+    Score égal au nombre moyen de vues gagnées par jour sur la fenêtre récente, d'après l'historique des statistiques.
+
+    Le premier relevé d'une vidéo contient ses vues complètes : il n'est compté comme une progression que si la
+    vidéo a été publiée le jour même ou après le début de la fenêtre.
+    """
+    start = today - datetime.timedelta(days=params['velocity_days'])
+    published = {video_id: published_at for video_id, published_at, _, _ in videos}
+
+    # Vidéos ayant un historique antérieur à la fenêtre.
+    tracked = {video_id for video_id, in db.session.query(VideoStat.video_id)
+               .filter(VideoStat.day < start).group_by(VideoStat.video_id)}
+
+    recent = {}
+    for video_id, day, views in db.session.query(VideoStat.video_id, VideoStat.day, VideoStat.views) \
+            .filter(VideoStat.day >= start).order_by(VideoStat.video_id, VideoStat.day):
+        recent.setdefault(video_id, []).append((day, views))
+
+    scores = {}
+    for video_id, rows in recent.items():
+        first_day = start
+        if video_id not in tracked:
+            published_at = published.get(video_id)
+            if published_at is None or published_at < rows[0][0]:
+                # Premier relevé d'une vidéo déjà existante : ce n'est pas une progression.
+                first_day = rows[0][0]
+                rows = rows[1:]
+        days = max((today - first_day).days, 1)
+        scores[video_id] = sum(views for _, views in rows) / days
+    return scores
+
+
+def ranking_config():
+    """
+    Lit les classements et les paramètres des stratégies dans la configuration de l'application.
+
+    :return: Tuple (classements, paramètres).
+    """
+    rankings = current_app.config.get('RANKINGS') or {}
+    params = dict(DEFAULT_RANKING_PARAMS, **(current_app.config.get('RANKING_PARAMS') or {}))
+    return rankings, params
+
+
+def combine_scores(weights, videos, today, params):
+    """
+    Calcule le score combiné d'un classement : somme pondérée des scores normalisés (entre 0 et 1) des stratégies.
+
+    :param weights: Dictionnaire nom de stratégie -> poids.
+    :param videos: Liste de tuples (id, date de publication, vues, likes).
+    :param today: Date du calcul.
+    :param params: Paramètres des stratégies.
+    :return: Dictionnaire id -> score combiné.
+    """
+    combined = {video_id: 0.0 for video_id, _, _, _ in videos}
+    for name, weight in weights.items():
+        if name not in STRATEGIES:
+            raise ValueError(f"Stratégie de classement inconnue : {name}")
+        scores = STRATEGIES[name](videos, today, params)
+        highest = max(scores.values(), default=0)
+        if highest <= 0:
+            continue
+        for video_id, score in scores.items():
+            if video_id in combined:
+                combined[video_id] += weight * max(score, 0) / highest
+    return combined
+
+
+def compute_rankings(top_k=RANKING_TOP_K, today=None):
+    """
+    Recalcule tous les classements configurés et remplace le contenu de la table 'video_ranking'.
+
+    Appelée par la tâche de synchronisation, jamais pendant une requête.
+
+    :param top_k: Nombre de vidéos conservées par classement.
+    :param today: Date du calcul, par défaut aujourd'hui.
+    :return: Dictionnaire nom du classement -> nombre de vidéos classées.
+    """
+    today = today or datetime.date.today()
+    rankings, params = ranking_config()
+    videos = db.session.query(Video.id, Video.published_at, Video.view_count, Video.like_count).all()
+
+    records = []
+    counts = {}
+    for name, weights in rankings.items():
+        scores = combine_scores(weights, videos, today, params)
+        best = sorted((item for item in scores.items() if item[1] > 0), key=lambda item: (-item[1], item[0]))
+        for rank, (video_id, score) in enumerate(best[:top_k], start=1):
+            records.append({'ranking': name, 'rank': rank, 'video_id': video_id, 'score': score})
+        counts[name] = min(len(best), top_k)
+
+    try:
+        db.session.execute(VideoRanking.__table__.delete())
+        if records:
+            db.session.execute(VideoRanking.__table__.insert(), records)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erreur lors de l'enregistrement des classements des vidéos : %s", e)
+        raise
+
+    return counts
+
+
+def get_ranked_videos(name, limit=RANKING_TOP_K):
+    """
+    Récupère les premières vidéos d'un classement précalculé, en une seule requête indexée.
+
+    :param name: Nom du classement.
+    :param limit: Nombre maximal de vidéos.
+    :return: Liste d'objets Video avec leur miniature, de la première à la dernière (vide si le classement n'a pas
+             encore été calculé).
+    """
+    return Video.query.options(joinedload(Video.thumbnail)).join(VideoRanking, VideoRanking.video_id == Video.id) \
+        .filter(VideoRanking.ranking == name) \
+        .order_by(VideoRanking.rank).limit(limit).all()
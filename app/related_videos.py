@@ -0,0 +1,186 @@
+"""
+Code permettant de précalculer les vidéos similaires à chaque vidéo, après chaque synchronisation.
+
+Chaque vidéo est représentée par un vecteur creux TF-IDF de ses tags et des racines de son titre. La similarité
+cosinus entre toutes les vidéos est calculée par blocs de lignes (produit matriciel creux puis sélection vectorisée
+des k meilleurs voisins avec NumPy), et le résultat est stocké dans la table 'related_video'. La page d'une vidéo
+lit ensuite ses voisins en une seule requête indexée, sans aucun calcul.
+"""
+import logging
+
+import numpy as np
+from scipy import sparse
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.related_video import RelatedVideo
+
+from app.search import normalize
+from app.tag_index import tag_key
+
+logger = logging.getLogger(__name__)
+
+# Nombre de vidéos similaires conservées par vidéo.
+RELATED_TOP_K = 6
+
+# Poids respectifs des tags et des mots du titre.
+TAG_WEIGHT = 1.0
+TITLE_WEIGHT = 0.5
+
+# Les caractéristiques présentes dans plus de cette proportion de vidéos sont ignorées : peu discriminantes, elles
+# rendraient aussi la matrice de similarité presque pleine.
+MAX_DOCUMENT_FREQUENCY = 0.05
+
+# En dessous de ce nombre de vidéos, aucune caractéristique n'est ignorée.
+MIN_DOCUMENT_FREQUENCY_CUTOFF = 50
+
+# Similarité minimale pour qu'une vidéo soit proposée.
+MIN_SCORE = 0.05
+
+# Nombre de lignes de la matrice de similarité calculées à la fois (borne la mémoire utilisée).
+BLOCK_SIZE = 1000
+
+
+def build_feature_matrix(rows):
+    """
+    Construit la matrice creuse vidéos x caractéristiques, pondérée TF-IDF et normalisée (norme L2).
+
+    :param rows: Itérable de tuples (id, titre, tags).
+    :return: Tuple (tableau NumPy des identifiants, matrice CSR des caractéristiques).
+    """
+    ids = []
+    features = {}
+    indices = []
+    data = []
+    indptr = [0]
+
+    for video_id, title, tags in rows:
+        ids.append(video_id)
+        row = {}
+        for name in tags or []:
+            name = tag_key(name)
+            if name:
+                row['t:' + name] = TAG_WEIGHT
+        for word in normalize(title):
+            row['w:' + word] = max(row.get('w:' + word, 0), TITLE_WEIGHT)
+
+        for feature, weight in row.items():
+            indices.append(features.setdefault(feature, len(features)))
+            data.append(weight)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(ids), len(features))
+    )
+
+    if matrix.nnz:
+        # Pondération IDF et suppression des caractéristiques trop fréquentes.
+        count = len(ids)
+        document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+        idf = np.log((1 + count) / (1 + document_frequency)).astype(np.float32) + 1
+        idf[document_frequency > max(MAX_DOCUMENT_FREQUENCY * count, MIN_DOCUMENT_FREQUENCY_CUTOFF)] = 0
+        matrix = matrix @ sparse.diags(idf)
+
+        # Normalisation L2 des lignes : le produit scalaire devient la similarité cosinus.
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        matrix = sparse.diags(1 / norms) @ matrix
+        matrix = matrix.tocsr()
+        matrix.eliminate_zeros()
+
+    return np.asarray(ids), matrix
+
+
+def top_k_neighbours(matrix, k=RELATED_TOP_K):
+    """
+    Calcule les k plus proches voisins de chaque ligne par similarité cosinus.
+
+    La matrice de similarité est calculée par blocs de lignes et reste creuse : seuls les couples de vidéos
+    partageant au moins une caractéristique sont triés, par ligne puis par score décroissant, en une seule opération
+    vectorisée par bloc.
+
+    :param matrix: Matrice CSR normalisée (une ligne par vidéo).
+    :param k: Nombre de voisins par ligne.
+    :return: Tuple (positions des voisins [n x k], scores [n x k]) triés par score décroissant. Les cases sans
+             voisin contiennent la position -1 et le score 0.
+    """
+    count = matrix.shape[0]
+    neighbours = np.full((count, k), -1, dtype=np.int64)
+    scores = np.zeros((count, k), dtype=np.float32)
+    if count == 0 or k == 0:
+        return neighbours, scores
+
+    transposed = matrix.T.tocsr()
+    for start in range(0, count, BLOCK_SIZE):
+        stop = min(start + BLOCK_SIZE, count)
+        block = (matrix[start:stop] @ transposed).tocsr()
+
+        rows = np.repeat(np.arange(stop - start), np.diff(block.indptr))
+        columns = block.indices
+        values = block.data
+
+        # Une vidéo n'est pas sa propre voisine.
+        keep = columns != rows + start
+        rows, columns, values = rows[keep], columns[keep], values[keep]
+
+        # Tri par ligne puis par score décroissant (les scores sont dans [0, 1], une seule clé suffit),
+        # puis rang de chaque valeur dans sa ligne.
+        order = np.argsort(rows + (1 - values.astype(np.float64)) / 2)
+        rows, columns, values = rows[order], columns[order], values[order]
+        first = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=stop - start))[:-1]))
+        rank = np.arange(len(rows)) - first[rows]
+
+        best = rank < k
+        neighbours[rows[best] + start, rank[best]] = columns[best]
+        scores[rows[best] + start, rank[best]] = values[best]
+
+    return neighbours, scores
+
+
+def compute_related_videos(k=RELATED_TOP_K):
+    """
+    Recalcule toutes les vidéos similaires et remplace le contenu de la table 'related_video'.
+
+    Appelée par la tâche de synchronisation, jamais pendant une requête.
+
+    :param k: Nombre de vidéos similaires par vidéo.
+    :return: Nombre de lignes enregistrées.
+    """
+    rows = db.session.query(Video.id, Video.title, Video.tags).order_by(Video.id).all()
+    ids, matrix = build_feature_matrix(rows)
+    neighbours, scores = top_k_neighbours(matrix, k)
+
+    records = []
+    for position, video_id in enumerate(ids):
+        rank = 0
+        for neighbour, score in zip(neighbours[position], scores[position]):
+            if neighbour < 0 or score < MIN_SCORE:
+                break
+            rank += 1
+            records.append({'video_id': int(video_id), 'rank': rank, 'related_id': int(ids[neighbour]),
+                            'score': float(score)})
+
+    try:
+        db.session.execute(RelatedVideo.__table__.delete())
+        if records:
+            db.session.execute(RelatedVideo.__table__.insert(), records)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erreur lors de l'enregistrement des vidéos similaires : %s", e)
+        raise
+
+    return len(records)
+
+
+def get_related_videos(video_id):
+    """
+    Récupère les vidéos similaires précalculées d'une vidéo, en une seule requête indexée.
+
+    :param video_id: Identifiant de la vidéo affichée.
+    :return: Liste d'objets Video, de la plus proche à la moins proche.
+    """
+    return Video.query.join(RelatedVideo, RelatedVideo.related_id == Video.id) \
+        .filter(RelatedVideo.video_id == video_id) \
+        .order_by(RelatedVideo.rank).all()
@@ -2,8 +2,12 @@
 Fichier permettant de créer la tâche pour la mise à jour des informations des vidéos.
 """
 import os
+import logging
+
 from apscheduler.schedulers.background import BackgroundScheduler
 
+logger = logging.getLogger(__name__)
+
 YOUTUBE_API = os.getenv('YOUTUBE_API')
 ID_CHANNEL = os.getenv('ID_CHANNEL')
 
@@ -29,15 +33,65 @@ def create_scheduler(app):
     return scheduler
 
 
+def _run_step(name, step):
+    """
+    Exécute une étape de la synchronisation : une erreur est journalisée et annule la transaction en cours, sans
+    empêcher les étapes suivantes.
+
+    :param name: Nom de l'étape (journal).
+    :param step: Fonction sans argument.
+    :return: True si l'étape a réussi.
+    """
+    from app.Models import db
+
+    try:
+        step()
+        return True
+    except Exception:
+        logger.exception("Échec de l'étape de synchronisation : %s", name)
+        db.session.rollback()
+        return False
+
+
 def scheduled_task(app):
     """
     Tâche programmée qui s'exécute avec le contexte de l'application.py.
+
+    La date de synchronisation (ETags des listes de vidéos) n'est enregistrée qu'en dernier, une fois tous les index
+    dérivés reconstruits : une page calculée pendant la synchronisation porte l'ancienne version et sera recalculée.
     :param app: Instance de l'application.py Flask.
     """
     # Utilisation du contexte d'application.py.
     with app.app_context():
         from app.videos import save_videos_to_db, YouTubeManager
+        from app.search import sync_index
+        from app.tag_index import sync_tags
+        from app.related_videos import compute_related_videos
+        from app.video_stats import capture_snapshot, downsample_stats
+        from app.ranking import compute_rankings
+        from app.conditional import mark_synced
+        from app.thumbnails import sync_thumbnails
+
+        steps = [
+            ('vidéos', lambda: save_videos_to_db(YouTubeManager().get_all_videos())),
+            # Copie locale des miniatures nouvelles ou modifiées.
+            ('miniatures', sync_thumbnails),
+            # Historisation des statistiques des vidéos et application de la rétention.
+            ('statistiques', capture_snapshot),
+            ('rétention des statistiques', downsample_stats),
+            # Précalcul des classements (populaires, tendances...).
+            ('classements', compute_rankings),
+            # Mise à jour de l'index de recherche.
+            ('index de recherche', sync_index),
+            # Mise à jour des tags normalisés et de l'index des facettes.
+            ('tags', sync_tags),
+            # Précalcul des vidéos similaires.
+            ('vidéos similaires', compute_related_videos),
+        ]
+        failed = [name for name, step in steps if not _run_step(name, step)]
 
-        yt_manager = YouTubeManager()
-        videos = yt_manager.get_all_videos()
-        save_videos_to_db(videos)
+        # Date de synchronisation utilisée par les ETags des listes de vidéos, enregistrée après toutes les étapes
+        # (les étapes réussies ont modifié les pages, même si une autre a échoué).
+        mark_synced()
+        if failed:
+            logger.warning("Synchronisation terminée avec des erreurs : %s", ', '.join(failed))
@@ -0,0 +1,460 @@
+"""
+Code permettant la recherche plein texte dans les titres et tags des vidéos, les sujets du forum et les commentaires.
+
+L'index inversé est stocké dans un fichier SQLite FTS5 indépendant de la base MySQL. Les textes sont normalisés à la
+française (minuscules, accents retirés, mots vides supprimés, racinisation légère) avant d'être indexés, et les
+résultats sont classés avec BM25. L'index est mis à jour au fil de l'eau par la synchronisation des vidéos et par
+l'écriture des sujets et des commentaires.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+
+from functools import wraps
+from contextlib import contextmanager
+
+from flask import current_app, url_for
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.subject_forum import SubjectForum
+from app.Models.comment_video import CommentVideo
+from app.Models.comment_subject import CommentSubject
+
+logger = logging.getLogger(__name__)
+
+# Types de documents indexés.
+KIND_VIDEO = 'video'
+KIND_SUBJECT = 'subject'
+KIND_COMMENT_VIDEO = 'comment_video'
+KIND_COMMENT_SUBJECT = 'comment_subject'
+
+# Poids BM25 des colonnes indexées (titre puis corps).
+BM25_WEIGHTS = (10.0, 1.0)
+
+# Nombre de lignes récupérées par aller-retour avec la base de données lors d'une reconstruction.
+INDEX_BATCH_SIZE = 1000
+
+# Mots vides français retirés des documents et des requêtes.
+STOPWORDS = frozenset("""
+    a ai aie ainsi alors au aucun aussi autre aux avec avoir c ca ce ceci cela celle celles celui ces cet cette
+    ceux chez ci comme comment d dans de des du donc elle elles en encore est et etait ete etre eu il ils j je
+    l la le les leur leurs lui m ma mais me meme mes moi mon n ne ni nos notre nous on ont ou par pas peu plus pour
+    qu quand que quel quelle quelles quels qui s sa sans se ses si son sont sur t ta te tes toi ton tous tout
+    toute toutes tres tu un une vos votre vous y
+""".split())
+
+# Suffixes retirés par la racinisation, du plus long au plus court.
+SUFFIXES = (
+    'issements', 'issement', 'atrices', 'ateurs', 'ations', 'ements', 'ement', 'ation', 'atrice', 'ateur',
+    'ances', 'ences', 'euses', 'ismes', 'istes', 'ables', 'ibles', 'ance', 'ence', 'euse', 'isme', 'iste',
+    'able', 'ible', 'ique', 'eux', 'eur', 'ees', 'ee', 'er', 'ez',
+)
+
+# Longueur minimale d'une racine.
+MIN_STEM_LENGTH = 3
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS search_doc (
+        kind TEXT NOT NULL,
+        doc_id INTEGER NOT NULL,
+        target_id INTEGER NOT NULL,
+        label TEXT NOT NULL,
+        PRIMARY KEY (kind, doc_id)
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+        title, body, tokenize = 'unicode61 remove_diacritics 2'
+    );
+    CREATE TABLE IF NOT EXISTS search_video_state (
+        doc_id INTEGER PRIMARY KEY,
+        fingerprint TEXT NOT NULL
+    );
+"""
+
+# Fichiers d'index dont le schéma a été créé par ce processus.
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def strip_accents(text):
+    """
+    Retire les accents d'un texte.
+
+    :param text: Texte d'origine.
+    :return: Texte sans accents.
+    """
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def stem(word):
+    """
+    Racinisation légère d'un mot français déjà en minuscules et sans accents.
+
+    :param word: Mot à raciniser.
+    :return: Racine du mot.
+    """
+    # Pluriels.
+    if len(word) > MIN_STEM_LENGTH + 1 and word[-1] in 'sx':
+        word = word[:-1]
+
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize(text):
+    """
+    Normalise un texte en une liste de racines (minuscules, sans accents, sans mots vides).
+
+    :param text: Texte à normaliser.
+    :return: Liste des racines.
+    """
+    if not text:
+        return []
+    tokens = TOKEN_RE.findall(strip_accents(text.lower()))
+    return [stem(token) for token in tokens if len(token) > 1 and token not in STOPWORDS]
+
+
+def index_path():
+    """
+    Renvoie le chemin du fichier de l'index de recherche.
+
+    :return: Chemin absolu du fichier SQLite.
+    """
+    path = current_app.config['SEARCH_INDEX_PATH']
+    if not os.path.isabs(path):
+        path = os.path.join(current_app.root_path, path)
+    return path
+
+
+def _ensure_schema(path):
+    """
+    Crée le schéma de l'index et active le mode WAL (conservé dans le fichier), une seule fois par processus.
+
+    Le mode WAL permet aux lectures des différents processus de se poursuivre pendant une écriture.
+
+    :param path: Chemin du fichier de l'index.
+    """
+    with _schema_lock:
+        if path in _schema_ready and os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+        _schema_ready.add(path)
+
+
+@contextmanager
+def connect():
+    """
+    Ouvre une connexion à l'index de recherche et valide la transaction en sortie.
+    """
+    path = index_path()
+    _ensure_schema(path)
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _upsert(conn, kind, doc_id, target_id, label, title, body):
+    """
+    Ajoute ou remplace un document dans l'index.
+
+    :param conn: Connexion SQLite ouverte.
+    :param kind: Type du document.
+    :param doc_id: Identifiant du document dans la base de données.
+    :param target_id: Identifiant de la vidéo ou du sujet vers lequel pointe le résultat.
+    :param label: Texte affiché dans les résultats.
+    :param title: Texte indexé avec un poids fort.
+    :param body: Texte indexé avec un poids normal.
+    """
+    row = conn.execute("SELECT rowid FROM search_doc WHERE kind = ? AND doc_id = ?", (kind, doc_id)).fetchone()
+    if row:
+        conn.execute("DELETE FROM search_fts WHERE rowid = ?", (row[0],))
+        conn.execute("UPDATE search_doc SET target_id = ?, label = ? WHERE rowid = ?", (target_id, label, row[0]))
+        rowid = row[0]
+    else:
+        rowid = conn.execute("INSERT INTO search_doc (kind, doc_id, target_id, label) VALUES (?, ?, ?, ?)",
+                             (kind, doc_id, target_id, label)).lastrowid
+    conn.execute("INSERT INTO search_fts (rowid, title, body) VALUES (?, ?, ?)",
+                 (rowid, ' '.join(normalize(title)), ' '.join(normalize(body))))
+
+
+def _video_fingerprint(title, tags):
+    """
+    Calcule l'empreinte des champs indexés d'une vidéo (titre et tags).
+
+    :return: Empreinte hexadécimale.
+    """
+    return hashlib.sha1(json.dumps([title, tags], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _remove_rowids(conn, rowids):
+    """
+    Retire des documents de l'index.
+
+    :param conn: Connexion SQLite ouverte.
+    :param rowids: Identifiants des lignes de search_doc.
+    """
+    for rowid in rowids:
+        conn.execute("DELETE FROM search_fts WHERE rowid = ?", (rowid,))
+        conn.execute("DELETE FROM search_doc WHERE rowid = ?", (rowid,))
+
+
+def _video_document(video_id, title, tags):
+    """
+    Prépare le document d'une vidéo.
+
+    :return: Tuple des arguments de _upsert après la connexion.
+    """
+    return KIND_VIDEO, video_id, video_id, title or '', title, ' '.join(tags or [])
+
+
+def _subject_document(subject_id, nom):
+    """
+    Prépare le document d'un sujet du forum.
+
+    :return: Tuple des arguments de _upsert après la connexion.
+    """
+    return KIND_SUBJECT, subject_id, subject_id, nom or '', nom, ''
+
+
+def _comment_document(kind, comment_id, target_id, content):
+    """
+    Prépare le document d'un commentaire.
+
+    :return: Tuple des arguments de _upsert après la connexion.
+    """
+    label = (content or '')[:120]
+    return kind, comment_id, target_id, label, '', content
+
+
+def _safe(func):
+    """
+    Empêche une erreur de l'index de recherche de faire échouer la requête en cours (l'erreur est journalisée).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.error("Erreur lors de la mise à jour de l'index de recherche : %s", e)
+            return None
+    return wrapper
+
+
+@_safe
+def index_video(video):
+    """
+    Indexe ou réindexe une vidéo.
+
+    :param video: Objet Video.
+    """
+    with connect() as conn:
+        _upsert(conn, *_video_document(video.id, video.title, video.tags))
+
+
+@_safe
+def index_subject(subject):
+    """
+    Indexe ou réindexe un sujet du forum.
+
+    :param subject: Objet SubjectForum.
+    """
+    with connect() as conn:
+        _upsert(conn, *_subject_document(subject.id, subject.nom))
+
+
+@_safe
+def index_comment_video(comment):
+    """
+    Indexe ou réindexe un commentaire de vidéo.
+
+    :param comment: Objet CommentVideo.
+    """
+    with connect() as conn:
+        _upsert(conn, *_comment_document(KIND_COMMENT_VIDEO, comment.id, comment.video_id, comment.comment_content))
+
+
+@_safe
+def index_comment_subject(comment):
+    """
+    Indexe ou réindexe un commentaire du forum.
+
+    :param comment: Objet CommentSubject.
+    """
+    with connect() as conn:
+        _upsert(conn, *_comment_document(KIND_COMMENT_SUBJECT, comment.id, comment.subject_id,
+                                         comment.comment_content))
+
+
+@_safe
+def remove_document(kind, doc_id):
+    """
+    Retire un document de l'index.
+
+    :param kind: Type du document (KIND_VIDEO, KIND_SUBJECT, ...).
+    :param doc_id: Identifiant du document dans la base de données.
+    """
+    with connect() as conn:
+        row = conn.execute("SELECT rowid FROM search_doc WHERE kind = ? AND doc_id = ?", (kind, doc_id)).fetchone()
+        rowids = [row[0]] if row else []
+
+        # La suppression d'un sujet supprime aussi ses commentaires (cascade).
+        if kind == KIND_SUBJECT:
+            rowids += [r[0] for r in conn.execute("SELECT rowid FROM search_doc WHERE kind = ? AND target_id = ?",
+                                                  (KIND_COMMENT_SUBJECT, doc_id))]
+
+        _remove_rowids(conn, rowids)
+        if kind == KIND_VIDEO:
+            conn.execute("DELETE FROM search_video_state WHERE doc_id = ?", (doc_id,))
+
+
+def index_videos():
+    """
+    Met à jour les vidéos de l'index dans une seule transaction (appelée après chaque synchronisation).
+
+    Seules les colonnes utiles sont lues, par lots, sans charger les objets ORM. Une vidéo n'est réindexée que si
+    l'empreinte de son titre et de ses tags a changé ; les vidéos supprimées de la base de données sont retirées de
+    l'index, avec leurs commentaires.
+
+    :return: Tuple (vidéos indexées, vidéos retirées).
+    """
+    indexed = 0
+    query = db.session.query(Video.id, Video.title, Video.tags).order_by(Video.id)
+    with connect() as conn:
+        fingerprints = dict(conn.execute("SELECT doc_id, fingerprint FROM search_video_state"))
+        seen = set()
+        for video_id, title, tags in query.yield_per(INDEX_BATCH_SIZE):
+            seen.add(video_id)
+            fingerprint = _video_fingerprint(title, tags)
+            if fingerprints.get(video_id) == fingerprint:
+                continue
+            _upsert(conn, *_video_document(video_id, title, tags))
+            conn.execute("INSERT OR REPLACE INTO search_video_state (doc_id, fingerprint) VALUES (?, ?)",
+                         (video_id, fingerprint))
+            indexed += 1
+
+        # Vidéos présentes dans l'index mais plus dans la base de données.
+        indexed_ids = {doc_id for doc_id, in conn.execute("SELECT doc_id FROM search_doc WHERE kind = ?",
+                                                          (KIND_VIDEO,))}
+        removed = (indexed_ids | fingerprints.keys()) - seen
+        for video_id in removed:
+            rowids = [r[0] for r in conn.execute(
+                "SELECT rowid FROM search_doc WHERE (kind = ? AND doc_id = ?) OR (kind = ? AND target_id = ?)",
+                (KIND_VIDEO, video_id, KIND_COMMENT_VIDEO, video_id))]
+            _remove_rowids(conn, rowids)
+            conn.execute("DELETE FROM search_video_state WHERE doc_id = ?", (video_id,))
+    if removed:
+        logger.info("%s vidéo(s) supprimée(s) retirée(s) de l'index de recherche.", len(removed))
+    return indexed, len(removed)
+
+
+def rebuild_index():
+    """
+    Reconstruit entièrement l'index de recherche à partir de la base de données.
+
+    :return: Nombre de documents indexés.
+    """
+    with connect() as conn:
+        conn.execute("DELETE FROM search_fts")
+        conn.execute("DELETE FROM search_doc")
+        conn.execute("DELETE FROM search_video_state")
+
+    count, _ = index_videos()
+    with connect() as conn:
+        for subject_id, nom in db.session.query(SubjectForum.id, SubjectForum.nom).yield_per(INDEX_BATCH_SIZE):
+            _upsert(conn, *_subject_document(subject_id, nom))
+            count += 1
+
+        comments = db.session.query(CommentVideo.id, CommentVideo.video_id, CommentVideo.comment_content)
+        for comment_id, video_id, content in comments.yield_per(INDEX_BATCH_SIZE):
+            _upsert(conn, *_comment_document(KIND_COMMENT_VIDEO, comment_id, video_id, content))
+            count += 1
+
+        comments = db.session.query(CommentSubject.id, CommentSubject.subject_id, CommentSubject.comment_content)
+        for comment_id, subject_id, content in comments.yield_per(INDEX_BATCH_SIZE):
+            _upsert(conn, *_comment_document(KIND_COMMENT_SUBJECT, comment_id, subject_id, content))
+            count += 1
+
+        conn.execute("INSERT INTO search_fts (search_fts) VALUES ('optimize')")
+    return count
+
+
+def sync_index():
+    """
+    Met à jour l'index après une synchronisation des vidéos.
+
+    L'index est reconstruit entièrement s'il est vide (premier lancement), sinon seules les vidéos modifiées ou
+    supprimées sont mises à jour : les sujets et les commentaires sont indexés au moment de leur écriture.
+
+    :return: Nombre de documents indexés.
+    """
+    with connect() as conn:
+        empty = conn.execute("SELECT 1 FROM search_doc LIMIT 1").fetchone() is None
+    return rebuild_index() if empty else index_videos()[0]
+
+
+def build_match_query(text):
+    """
+    Transforme la saisie de l'utilisateur en requête FTS5 (toutes les racines, en préfixe).
+
+    Chaque racine est placée entre guillemets : la syntaxe FTS5 saisie par l'utilisateur n'est jamais interprétée.
+
+    :param text: Texte recherché.
+    :return: Requête FTS5, ou None si aucune racine n'est exploitable.
+    """
+    stems = normalize(text)
+    if not stems:
+        return None
+    return ' '.join(f'"{s}"*' for s in dict.fromkeys(stems))
+
+
+def search(text, limit=20, offset=0):
+    """
+    Recherche les documents correspondant au texte, classés par pertinence BM25.
+
+    :param text: Texte recherché.
+    :param limit: Nombre maximal de résultats.
+    :param offset: Nombre de résultats à ignorer (pagination).
+    :return: Liste de dictionnaires {'kind', 'label', 'url', 'score'}.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT d.kind, d.target_id, d.label, bm25(search_fts, ?, ?) AS score "
+            "FROM search_fts JOIN search_doc d ON d.rowid = search_fts.rowid "
+            "WHERE search_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?",
+            (*BM25_WEIGHTS, match, limit, offset)
+        ).fetchall()
+
+    results = []
+    for kind, target_id, label, score in rows:
+        if kind in (KIND_VIDEO, KIND_COMMENT_VIDEO):
+            url = url_for('frontend.display_video', video_id=target_id)
+        else:
+            url = url_for('frontend.forum_subject', subject_id=target_id)
+        results.append({'kind': kind, 'label': label, 'url': url, 'score': -score})
+    return results
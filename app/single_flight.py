@@ -0,0 +1,130 @@
+"""
+Code permettant d'éviter qu'un même calcul coûteux soit lancé plusieurs fois en parallèle (« single-flight »).
+
+flight_lock(key) est un verrou nommé, partagé entre les threads d'un processus (threading.Lock) et entre les
+processus d'un même serveur (fcntl.flock sur un fichier de CACHE_LOCK_FOLDER). Le premier appelant calcule ; les
+autres attendent la fin du calcul puis relisent le cache, ou renoncent immédiatement (blocking=False) pour servir
+une version périmée.
+
+Un CACHE_LOCK_FOLDER relatif est résolu depuis la racine de l'application (app.root_path), comme THUMBNAIL_FOLDER.
+"""
+import os
+import time
+import hashlib
+import threading
+
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : verrou limité aux threads du processus.
+    fcntl = None
+
+# Dossier des fichiers de verrou, si la configuration CACHE_LOCK_FOLDER n'est pas disponible.
+DEFAULT_LOCK_FOLDER = os.path.join('cache', 'locks')
+
+# Intervalle (en secondes) entre deux tentatives d'acquisition d'un verrou de fichier.
+LOCK_POLL_INTERVAL = 0.01
+
+_registry_lock = threading.Lock()
+_thread_locks = {}
+
+
+def _thread_lock(key):
+    """
+    Renvoie le verrou de thread associé à une clé, en le créant si nécessaire.
+
+    :param key: Nom du verrou.
+    :return: Liste [verrou, nombre d'utilisateurs].
+    """
+    with _registry_lock:
+        entry = _thread_locks.get(key)
+        if entry is None:
+            entry = _thread_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1
+        return entry
+
+
+def _release_thread_lock(key, entry):
+    """
+    Libère une référence au verrou de thread d'une clé et l'oublie s'il n'est plus utilisé.
+
+    :param key: Nom du verrou.
+    :param entry: Entrée renvoyée par _thread_lock().
+    """
+    with _registry_lock:
+        entry[1] -= 1
+        if entry[1] == 0 and _thread_locks.get(key) is entry:
+            del _thread_locks[key]
+
+
+def _lock_path(key):
+    """
+    Calcule le chemin du fichier de verrou d'une clé.
+
+    :param key: Nom du verrou.
+    :return: Chemin du fichier.
+    """
+    folder = DEFAULT_LOCK_FOLDER
+    if has_app_context():
+        folder = current_app.config.get('CACHE_LOCK_FOLDER', folder)
+        if not os.path.isabs(folder):
+            folder = os.path.join(current_app.root_path, folder)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.lock')
+
+
+def _acquire_file(handle, blocking, deadline):
+    """
+    Pose un verrou exclusif sur un fichier ouvert.
+
+    :param handle: Fichier ouvert.
+    :param blocking: Attendre la libération du verrou si True.
+    :param deadline: Instant (time.monotonic) au-delà duquel l'attente est abandonnée, ou None.
+    :return: True si le verrou est obtenu.
+    """
+    while True:
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(LOCK_POLL_INTERVAL)
+
+
+@contextmanager
+def flight_lock(key, blocking=True, timeout=None):
+    """
+    Verrou nommé partagé entre les threads et les processus du serveur.
+
+    Exemple :
+        with flight_lock('sitemap') as acquired:
+            if acquired:
+                ...
+
+    :param key: Nom du verrou.
+    :param blocking: Attendre la libération du verrou si True ; sinon renoncer immédiatement.
+    :param timeout: Durée maximale d'attente en secondes (None : sans limite).
+    :return: Gestionnaire de contexte renvoyant True si le verrou est obtenu, False sinon.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    entry = _thread_lock(key)
+    thread_acquired = entry[0].acquire(blocking, -1 if timeout is None or not blocking else timeout)
+    acquired = thread_acquired
+    handle = None
+    try:
+        if thread_acquired and fcntl is not None:
+            handle = open(_lock_path(key), 'a+b')
+            acquired = _acquire_file(handle, blocking, deadline)
+        yield acquired
+    finally:
+        if handle is not None:
+            # La fermeture du fichier libère le verrou flock.
+            handle.close()
+        if thread_acquired:
+            entry[0].release()
+        _release_thread_lock(key, entry)
@@ -0,0 +1,251 @@
+"""
+Code permettant de générer le sitemap du blog à partir de la base de données.
+
+Le sitemap liste les pages publiques, chaque vidéo, chaque mois d'archives et chaque sujet du forum. Il est écrit en
+flux sur le disque (jamais construit entièrement en mémoire) puis servi tel quel tant que les données qui le
+composent n'ont pas changé, c'est-à-dire jusqu'à la prochaine synchronisation des vidéos ou au prochain sujet créé.
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+
+from xml.sax.saxutils import escape
+
+from flask import current_app, url_for, send_from_directory, abort
+from sqlalchemy import func
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.subject_forum import SubjectForum
+from app.Models.comment_subject import CommentSubject
+
+from app.utils_videos import MONTH_NAMES
+from app.single_flight import flight_lock
+
+# Nombre maximal d'URLs par fichier imposé par le protocole sitemap.
+SITEMAP_MAX_URLS = 50000
+
+# Nombre de lignes récupérées par aller-retour avec la base de données.
+SITEMAP_BATCH_SIZE = 1000
+
+# Pages publiques fixes du blog : uniquement des pages autorisées par robots.txt (la demande de visio ne l'est pas).
+STATIC_ENDPOINTS = (
+    'landing_page',
+    'frontend.forum',
+    'frontend.show_videos',
+    'frontend.show_popular_videos',
+    'functional.politique',
+    'functional.mentions',
+    'functional.informations',
+)
+
+URLSET_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_FOOTER = '</urlset>\n'
+INDEX_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+               '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_FOOTER = '</sitemapindex>\n'
+
+
+def sitemap_version():
+    """
+    Calcule l'empreinte des données qui composent le sitemap à l'aide de deux requêtes d'agrégation.
+
+    L'empreinte change dès qu'une vidéo est ajoutée ou supprimée par la synchronisation, ou qu'un sujet du forum
+    est créé ou supprimé.
+
+    :return: Chaîne hexadécimale identifiant la version du sitemap.
+    """
+    videos = db.session.query(func.count(Video.id), func.max(Video.id), func.max(Video.published_at)).one()
+    subjects = db.session.query(func.count(SubjectForum.id), func.max(SubjectForum.id)).one()
+    return hashlib.sha1(repr((tuple(videos), tuple(subjects))).encode('utf-8')).hexdigest()[:16]
+
+
+def iter_sitemap_entries():
+    """
+    Parcourt toutes les URLs du sitemap sans charger les objets ORM complets.
+
+    :return: Générateur de tuples (url, lastmod) où lastmod est une date ou None.
+    """
+    # Pages fixes (seulement celles enregistrées par le point d'entrée courant).
+    for endpoint in STATIC_ENDPOINTS:
+        if endpoint in current_app.view_functions:
+            yield url_for(endpoint, _external=True), None
+
+    # Mois d'archives, avec la date de la dernière vidéo publiée dans le mois.
+    months = {}
+    dates = db.session.query(Video.published_at).filter(Video.published_at.isnot(None))
+    for (published_at,) in dates.yield_per(SITEMAP_BATCH_SIZE):
+        key = (published_at.year, published_at.month)
+        if key not in months or months[key] < published_at:
+            months[key] = published_at
+    for (year, month), lastmod in sorted(months.items(), reverse=True):
+        yield url_for('frontend.show_archived_videos', month_year=f"{MONTH_NAMES[month]} {year}",
+                      _external=True), lastmod
+
+    # Vidéos.
+    videos = db.session.query(Video.id, Video.published_at).order_by(Video.id)
+    for video_id, published_at in videos.yield_per(SITEMAP_BATCH_SIZE):
+        yield url_for('frontend.display_video', video_id=video_id, _external=True), published_at
+
+    # Sujets du forum, avec la date du dernier commentaire.
+    subjects = db.session.query(SubjectForum.id, func.max(CommentSubject.comment_date)) \
+        .outerjoin(CommentSubject, CommentSubject.subject_id == SubjectForum.id) \
+        .group_by(SubjectForum.id).order_by(SubjectForum.id)
+    for subject_id, last_comment in subjects.yield_per(SITEMAP_BATCH_SIZE):
+        yield url_for('frontend.forum_subject', subject_id=subject_id, _external=True), last_comment
+
+
+def format_url(loc, lastmod=None):
+    """
+    Formate une entrée <url> du sitemap.
+
+    :param loc: URL absolue de la page.
+    :param lastmod: Date de dernière modification (date ou datetime), optionnelle.
+    :return: Fragment XML de l'entrée.
+    """
+    entry = f"  <url><loc>{escape(loc)}</loc>"
+    if lastmod is not None:
+        entry += f"<lastmod>{lastmod.strftime('%Y-%m-%d')}</lastmod>"
+    return entry + "</url>\n"
+
+
+def build_sitemap(folder):
+    """
+    Écrit le sitemap dans un dossier, en le découpant en plusieurs fichiers au-delà de SITEMAP_MAX_URLS URLs.
+
+    Avec un seul fichier, il s'agit directement de 'sitemap.xml'. Sinon, les fichiers 'sitemap-<n>.xml' sont
+    référencés par un index 'sitemap.xml'.
+
+    :param folder: Dossier (vide) dans lequel écrire les fichiers.
+    :return: Nombre de fichiers de sitemap écrits.
+    """
+    page = 0
+    count = 0
+    output = None
+
+    try:
+        for loc, lastmod in iter_sitemap_entries():
+            if output is None or count == SITEMAP_MAX_URLS:
+                if output is not None:
+                    output.write(URLSET_FOOTER)
+                    output.close()
+                page += 1
+                count = 0
+                output = open(os.path.join(folder, f"sitemap-{page}.xml"), 'w', encoding='utf-8')
+                output.write(URLSET_HEADER)
+            output.write(format_url(loc, lastmod))
+            count += 1
+    finally:
+        if output is not None:
+            output.write(URLSET_FOOTER)
+            output.close()
+
+    if page <= 1:
+        # Un seul fichier : il devient directement le sitemap.
+        if page == 1:
+            os.replace(os.path.join(folder, "sitemap-1.xml"), os.path.join(folder, "sitemap.xml"))
+        else:
+            with open(os.path.join(folder, "sitemap.xml"), 'w', encoding='utf-8') as empty:
+                empty.write(URLSET_HEADER + URLSET_FOOTER)
+        return 1
+
+    # Plusieurs fichiers : écriture de l'index.
+    with open(os.path.join(folder, "sitemap.xml"), 'w', encoding='utf-8') as index:
+        index.write(INDEX_HEADER)
+        for number in range(1, page + 1):
+            loc = url_for('sitemap_page', number=number, _external=True)
+            index.write(f"  <sitemap><loc>{escape(loc)}</loc></sitemap>\n")
+        index.write(INDEX_FOOTER)
+    return page
+
+
+def sitemap_folder():
+    """
+    Renvoie le dossier contenant la version à jour du sitemap, en la générant si nécessaire.
+
+    La génération a lieu dans un dossier temporaire renommé ensuite, ce qui permet à plusieurs processus de servir
+    le sitemap sans se gêner. Les anciennes versions sont supprimées.
+
+    :return: Chemin du dossier de la version courante.
+    """
+    root = current_app.config['SITEMAP_FOLDER']
+    if not os.path.isabs(root):
+        root = os.path.join(current_app.root_path, root)
+    os.makedirs(root, exist_ok=True)
+
+    version = sitemap_version()
+    folder = os.path.join(root, version)
+    if os.path.isdir(folder):
+        return folder
+
+    # Un seul processus génère une version donnée ; les autres attendent qu'elle soit prête.
+    with flight_lock('sitemap:' + version):
+        if not os.path.isdir(folder):
+            _generate(root, folder)
+
+    # Suppression des anciennes versions.
+    for name in os.listdir(root):
+        if name != version and not name.startswith('.'):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    return folder
+
+
+def _generate(root, folder):
+    """
+    Génère le sitemap dans un dossier temporaire puis le renomme en dossier de version.
+
+    :param root: Dossier racine du cache du sitemap.
+    :param folder: Dossier de la version à générer.
+    """
+    tmp_folder = tempfile.mkdtemp(dir=root, prefix='.build-')
+    try:
+        build_sitemap(tmp_folder)
+        os.rename(tmp_folder, folder)
+    except OSError:
+        # Un autre processus a généré la même version entre-temps.
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        if not os.path.isdir(folder):
+            raise
+    except Exception:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        raise
+
+
+def sitemap():
+    """
+    Sert le sitemap (ou l'index des sitemaps) du blog.
+
+    Returns:
+        Response: Le fichier 'sitemap.xml' de la version courante.
+    """
+    return send_from_directory(sitemap_folder(), "sitemap.xml", mimetype='application/xml')
+
+
+def sitemap_page(number):
+    """
+    Sert une partie du sitemap lorsque celui-ci est découpé par un index.
+
+    Args:
+        number (int): Numéro de la partie demandée.
+
+    Returns:
+        Response: Le fichier 'sitemap-<number>.xml' de la version courante, ou une erreur 404.
+    """
+    folder = sitemap_folder()
+    filename = f"sitemap-{number}.xml"
+    if not os.path.exists(os.path.join(folder, filename)):
+        abort(404)
+    return send_from_directory(folder, filename, mimetype='application/xml')
+
+
+def register_sitemap(app):
+    """
+    Enregistre les routes du sitemap à la racine du site.
+
+    :param app: Instance de l'application Flask.
+    """
+    app.add_url_rule('/sitemap.xml', 'sitemap', sitemap)
+    app.add_url_rule('/sitemap-<int:number>.xml', 'sitemap_page', sitemap_page)
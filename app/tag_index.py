@@ -0,0 +1,360 @@
+"""
+Code permettant de naviguer dans les vidéos par facettes (tags, mois de publication, popularité).
+
+Les tags JSON des vidéos sont normalisés dans les tables 'tag' et 'video_tag' à chaque synchronisation. Un index en
+mémoire associe ensuite à chaque valeur de facette un ensemble de bits (un entier Python dont le bit n correspond à
+la n-ième vidéo par date de publication décroissante). Un filtre combiné est une intersection de bits et le nombre
+de vidéos par facette se calcule avec int.bit_count(), sans interroger la base de données.
+"""
+import time
+import threading
+
+from itertools import islice
+
+from sqlalchemy import func
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.tag import Tag, video_tag
+from app.search import strip_accents
+
+# Délai (en secondes) entre deux vérifications de la version de l'index par un même processus.
+TAG_INDEX_REFRESH = 60
+
+# Seuils de popularité (nombre de vues) et libellés des tranches correspondantes.
+POPULARITY_BUCKETS = (
+    ('populaire', 3000),
+    ('moyenne', 1000),
+    ('confidentielle', 0),
+)
+
+# Nombre maximal de tags dont le compte est renvoyé par les facettes.
+MAX_TAG_FACETS = 50
+
+# Nombre de tags (les plus fréquents) examinés pour les facettes, afin de borner le coût d'une requête.
+MAX_TAG_CANDIDATES = 200
+
+# Longueur maximale d'un nom de tag.
+TAG_MAX_LENGTH = 100
+
+
+def normalize_tag(name):
+    """
+    Normalise le nom affiché d'un tag (minuscules, espaces superflus retirés, longueur bornée, accents conservés).
+
+    :param name: Nom du tag tel que renvoyé par YouTube.
+    :return: Nom normalisé, ou None si le tag est vide.
+    """
+    if not isinstance(name, str):
+        return None
+    name = ' '.join(name.lower().split())[:TAG_MAX_LENGTH]
+    return name or None
+
+
+def tag_key(name):
+    """
+    Calcule la clé de recherche d'un tag : son nom normalisé sans accents.
+
+    Deux tags de même clé sont un seul tag : les collations MySQL insensibles aux accents (utf8mb4_*_ci) considèrent
+    'vidéo' et 'video' comme égaux, les deux noms violeraient la contrainte d'unicité de tag.name.
+
+    :param name: Nom du tag.
+    :return: Clé du tag, ou None si le tag est vide.
+    """
+    name = normalize_tag(name)
+    return strip_accents(name) if name else None
+
+
+def _display_name(variants):
+    """
+    Choisit le nom affiché d'un tag parmi ses variantes : la plus fréquente, accentuée de préférence.
+
+    :param variants: Dictionnaire nom normalisé -> nombre de vidéos.
+    :return: Nom affiché.
+    """
+    return max(variants.items(), key=lambda item: (item[1], item[0] != strip_accents(item[0]), item[0]))[0]
+
+
+def popularity_bucket(view_count):
+    """
+    Renvoie la tranche de popularité d'une vidéo.
+
+    :param view_count: Nombre de vues.
+    :return: Libellé de la tranche.
+    """
+    for label, threshold in POPULARITY_BUCKETS:
+        if (view_count or 0) > threshold:
+            return label
+    return POPULARITY_BUCKETS[-1][0]
+
+
+def sync_tags():
+    """
+    Met à jour les tables 'tag' et 'video_tag' à partir de la colonne JSON Video.tags.
+
+    Seules les différences sont écrites : les liaisons disparues sont supprimées et les nouvelles ajoutées. Les tags
+    inconnus sont créés en une seule insertion. Un tag est identifié par sa clé (tag_key) et enregistré sous son nom
+    affiché, accents conservés : les tags de même clé sont fusionnés (liaisons remplacées, doublon supprimé) et un
+    tag dont le nom affiché a changé est renommé.
+
+    :return: Tuple (liaisons ajoutées, liaisons supprimées).
+    """
+    # Clés des tags de chaque vidéo, et variantes de nom rencontrées pour chaque clé.
+    videos = []
+    variants = {}
+    for video_id, raw_tags in db.session.query(Video.id, Video.tags):
+        keys = set()
+        for name in {normalize_tag(name) for name in (raw_tags or [])} - {None}:
+            key = tag_key(name)
+            keys.add(key)
+            counts = variants.setdefault(key, {})
+            counts[name] = counts.get(name, 0) + 1
+        videos.append((video_id, keys))
+    names = {key: _display_name(counts) for key, counts in variants.items()}
+
+    # Tags existants, par clé : le tag portant déjà le nom affiché est conservé, les autres sont des doublons.
+    tags = {}
+    duplicates = []
+    renamed = {}
+    rows = sorted(db.session.query(Tag.id, Tag.name), key=lambda row: (names.get(tag_key(row[1]), row[1]) != row[1],
+                                                                        row[0]))
+    for tag_id, name in rows:
+        key = tag_key(name)
+        if key in tags:
+            duplicates.append(tag_id)
+        else:
+            tags[key] = tag_id
+            if names.get(key, name) != name:
+                renamed[tag_id] = names[key]
+
+    current = {}
+    for video_id, tag_id in db.session.query(video_tag.c.video_id, video_tag.c.tag_id):
+        current.setdefault(video_id, set()).add(tag_id)
+
+    # Liaisons des doublons retirées avant de renommer les tags conservés (contrainte d'unicité).
+    if duplicates:
+        db.session.execute(video_tag.delete().where(video_tag.c.tag_id.in_(duplicates)))
+        db.session.execute(Tag.__table__.delete().where(Tag.id.in_(duplicates)))
+        removed = set(duplicates)
+        current = {video_id: tag_ids - removed for video_id, tag_ids in current.items()}
+    for tag_id, name in renamed.items():
+        db.session.execute(Tag.__table__.update().where(Tag.id == tag_id).values(name=name))
+
+    # Création des tags inconnus en une seule insertion.
+    new_keys = names.keys() - tags.keys()
+    if new_keys:
+        db.session.execute(Tag.__table__.insert(), [{'name': names[key]} for key in sorted(new_keys)])
+        tags.update({tag_key(name): tag_id for tag_id, name in db.session.query(Tag.id, Tag.name)
+                     if tag_key(name) in new_keys})
+
+    to_add = []
+    to_remove = []
+    for video_id, keys in videos:
+        wanted = {tags[key] for key in keys}
+        existing = current.get(video_id, set())
+        to_add += [{'video_id': video_id, 'tag_id': tag_id} for tag_id in wanted - existing]
+        to_remove += [(video_id, tag_id) for tag_id in existing - wanted]
+
+    if to_add:
+        db.session.execute(video_tag.insert(), to_add)
+    for video_id, tag_id in to_remove:
+        db.session.execute(video_tag.delete().where(video_tag.c.video_id == video_id,
+                                                    video_tag.c.tag_id == tag_id))
+    db.session.commit()
+
+    invalidate_tag_index()
+    return len(to_add), len(to_remove)
+
+
+def tag_index_version():
+    """
+    Calcule la version des données indexées à l'aide de deux requêtes d'agrégation.
+
+    :return: Tuple identifiant l'état des vidéos et des liaisons de tags.
+    """
+    videos = db.session.query(func.count(Video.id), func.max(Video.id), func.sum(Video.view_count)).one()
+    links = db.session.query(func.count()).select_from(video_tag).scalar()
+    return tuple(videos) + (links,)
+
+
+class TagIndex:
+    """
+    Index en mémoire des facettes des vidéos, sous forme d'ensembles de bits.
+
+    Attributes:
+        video_ids (list): Identifiants des vidéos, par date de publication décroissante (position = numéro de bit).
+        tags (dict): Nom du tag -> ensemble de bits des vidéos portant ce tag.
+        ranked_tags (list): Noms des tags du plus fréquent au moins fréquent.
+        months (dict): Mois 'YYYY-MM' -> ensemble de bits des vidéos publiées ce mois-là.
+        popularity (dict): Tranche de popularité -> ensemble de bits des vidéos de cette tranche.
+        all_videos (int): Ensemble de bits de toutes les vidéos.
+        version (tuple): Version des données au moment de la construction.
+    """
+
+    def __init__(self, version=None):
+        self.video_ids = []
+        self.tags = {}
+        self.names = {}
+        self.ranked_tags = []
+        self.months = {}
+        self.popularity = {}
+        self.all_videos = 0
+        self.version = version
+
+    @classmethod
+    def build(cls):
+        """
+        Construit l'index à partir de la base de données (deux requêtes, colonnes utiles uniquement).
+
+        :return: Instance de TagIndex.
+        """
+        index = cls(version=tag_index_version())
+        positions = {}
+
+        rows = db.session.query(Video.id, Video.published_at, Video.view_count) \
+            .order_by(Video.published_at.desc(), Video.id.desc())
+        for position, (video_id, published_at, view_count) in enumerate(rows):
+            bit = 1 << position
+            positions[video_id] = bit
+            index.video_ids.append(video_id)
+            if published_at is not None:
+                month = published_at.strftime("%Y-%m")
+                index.months[month] = index.months.get(month, 0) | bit
+            bucket = popularity_bucket(view_count)
+            index.popularity[bucket] = index.popularity.get(bucket, 0) | bit
+
+        index.all_videos = (1 << len(index.video_ids)) - 1
+
+        links = db.session.query(video_tag.c.video_id, Tag.name).join(Tag, Tag.id == video_tag.c.tag_id)
+        for video_id, name in links:
+            bit = positions.get(video_id)
+            if bit:
+                # Index par clé (sans accents), comme les tags demandés par filter() ; le nom affiché est conservé.
+                key = tag_key(name)
+                index.tags[key] = index.tags.get(key, 0) | bit
+                index.names.setdefault(key, name)
+
+        index.ranked_tags = sorted(index.tags, key=lambda key: (-index.tags[key].bit_count(), key))
+        return index
+
+    def filter(self, tags=(), month=None, popularity=None):
+        """
+        Calcule l'ensemble des vidéos correspondant à tous les critères (intersection).
+
+        :param tags: Noms des tags exigés.
+        :param month: Mois 'YYYY-MM', optionnel.
+        :param popularity: Tranche de popularité, optionnelle.
+        :return: Ensemble de bits des vidéos retenues.
+        """
+        mask = self.all_videos
+        for name in tags:
+            mask &= self.tags.get(tag_key(name), 0)
+        if month:
+            mask &= self.months.get(month, 0)
+        if popularity:
+            mask &= self.popularity.get(popularity, 0)
+        return mask
+
+    def facets(self, mask):
+        """
+        Compte les vidéos de chaque valeur de facette parmi un ensemble de vidéos.
+
+        Seuls les MAX_TAG_CANDIDATES tags les plus fréquents sont examinés.
+
+        :param mask: Ensemble de bits des vidéos retenues.
+        :return: Dictionnaire {'tags', 'months', 'popularity'} de dictionnaires valeur -> nombre de vidéos (tags
+                 par nom affiché).
+        """
+        tags = {}
+        for key in self.ranked_tags[:MAX_TAG_CANDIDATES]:
+            count = (self.tags[key] & mask).bit_count()
+            if count:
+                tags[self.names[key]] = count
+        top_tags = dict(sorted(tags.items(), key=lambda item: (-item[1], item[0]))[:MAX_TAG_FACETS])
+
+        months = {month: (bits & mask).bit_count() for month, bits in sorted(self.months.items(), reverse=True)}
+        popularity = {label: (self.popularity.get(label, 0) & mask).bit_count() for label, _ in POPULARITY_BUCKETS}
+
+        return {
+            'tags': top_tags,
+            'months': {month: count for month, count in months.items() if count},
+            'popularity': popularity,
+        }
+
+    def ids(self, mask, offset=0, limit=None):
+        """
+        Renvoie les identifiants des vidéos d'un ensemble, par date de publication décroissante.
+
+        :param mask: Ensemble de bits des vidéos.
+        :param offset: Nombre de vidéos à ignorer.
+        :param limit: Nombre maximal d'identifiants renvoyés.
+        :return: Liste d'identifiants de vidéos.
+        """
+        # Chaîne des bits, bit de poids faible en premier : chaque '1' est la position d'une vidéo.
+        bits = bin(mask)[:1:-1] if mask > 0 else ''
+
+        def positions():
+            position = bits.find('1')
+            while position != -1:
+                yield position
+                position = bits.find('1', position + 1)
+
+        stop = None if limit is None else offset + limit
+        return [self.video_ids[position] for position in islice(positions(), offset, stop)]
+
+    def tag_cloud(self, limit=40, levels=5):
+        """
+        Prépare le nuage de tags : les tags les plus fréquents avec un niveau de taille de 1 à levels.
+
+        :param limit: Nombre maximal de tags.
+        :param levels: Nombre de niveaux de taille.
+        :return: Liste de dictionnaires {'name', 'count', 'level'} triée par nom.
+        """
+        counts = [(self.names[key], self.tags[key].bit_count()) for key in self.ranked_tags[:limit]]
+        if not counts:
+            return []
+        highest = counts[0][1]
+        lowest = counts[-1][1]
+        spread = max(highest - lowest, 1)
+        return sorted(
+            ({'name': name, 'count': count, 'level': 1 + (count - lowest) * (levels - 1) // spread}
+             for name, count in counts),
+            key=lambda item: item['name']
+        )
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_tag_index():
+    """
+    Renvoie l'index des facettes du processus courant, reconstruit si les données ont changé.
+
+    La version des données n'est vérifiée qu'une fois toutes les TAG_INDEX_REFRESH secondes : entre deux
+    vérifications, les requêtes de facettes ne touchent pas à la base de données.
+
+    :return: Instance de TagIndex.
+    """
+    global _index, _checked_at
+
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < TAG_INDEX_REFRESH:
+        return _index
+
+    with _lock:
+        if _index is None or now - _checked_at >= TAG_INDEX_REFRESH:
+            if _index is None or _index.version != tag_index_version():
+                _index = TagIndex.build()
+            _checked_at = now
+    return _index
+
+
+def invalidate_tag_index():
+    """
+    Force la reconstruction de l'index des facettes du processus courant au prochain accès.
+    """
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,80 @@
+"""
+Code permettant de conserver sur disque le bytecode des gabarits Jinja compilés.
+
+Passenger démarre régulièrement de nouveaux processus : sans cache, chacun analyse et compile tous les gabarits
+à leur première utilisation. Avec FileSystemBytecodeCache, la compilation n'a lieu qu'une fois par version d'un
+gabarit, et la commande 'flask precompile-templates' la fait au moment du déploiement. Les gabarits peuvent en
+outre être chargés au démarrage du processus (JINJA_PRELOAD_TEMPLATES) : la première requête est alors aussi
+rapide que les suivantes.
+"""
+import os
+import time
+import logging
+
+import click
+from jinja2 import FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(app):
+    """
+    Liste les gabarits de l'application (fichiers HTML et Jinja uniquement).
+
+    :param app: Instance de l'application Flask.
+    :return: Liste triée des noms de gabarits.
+    """
+    return sorted(name for name in app.jinja_env.list_templates()
+                  if name.endswith(('.html', '.jinja2', '.xml', '.txt')))
+
+
+def precompile_templates(app):
+    """
+    Compile tous les gabarits et enregistre leur bytecode dans le cache.
+
+    :param app: Instance de l'application Flask.
+    :return: Tuple (nombre de gabarits chargés, liste de tuples (nom, erreur) des gabarits invalides).
+    """
+    loaded = 0
+    errors = []
+    for name in template_names(app):
+        try:
+            app.jinja_env.get_template(name)
+            loaded += 1
+        except Exception as e:
+            errors.append((name, e))
+    return loaded, errors
+
+
+def init_template_cache(app):
+    """
+    Configure le cache de bytecode des gabarits, la commande de précompilation et le préchargement éventuel.
+
+    :param app: Instance de l'application Flask.
+    """
+    folder = app.config.get('JINJA_BYTECODE_CACHE_FOLDER')
+    if folder:
+        if not os.path.isabs(folder):
+            folder = os.path.join(app.root_path, folder)
+        os.makedirs(folder, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(folder, '%s.cache')
+
+    @app.cli.command('precompile-templates')
+    def precompile_templates_command():
+        """
+        Compile tous les gabarits et remplit le cache de bytecode (à lancer à chaque déploiement).
+        """
+        start = time.perf_counter()
+        loaded, errors = precompile_templates(app)
+        for name, error in errors:
+            click.echo(f"Erreur dans le gabarit {name} : {error}", err=True)
+        click.echo(f"{loaded} gabarits compilés en {time.perf_counter() - start:.2f} s.")
+        if errors:
+            raise SystemExit(1)
+
+    if app.config.get('JINJA_PRELOAD_TEMPLATES'):
+        start = time.perf_counter()
+        loaded, errors = precompile_templates(app)
+        for name, error in errors:
+            logger.error("Erreur dans le gabarit %s : %s", name, error)
+        logger.info("%s gabarits préchargés en %.3f s.", loaded, time.perf_counter() - start)
@@ -0,0 +1,199 @@
+"""
+Code permettant de conserver localement les miniatures des vidéos.
+
+Après chaque synchronisation, la miniature de chaque vidéo nouvelle ou modifiée (Video.embed_url) est téléchargée,
+recadrée en 16:9 (YouTube ajoute des bandes noires aux miniatures 4:3), puis réencodée en WebP dans plusieurs
+largeurs (THUMBNAIL_WIDTHS). Les fichiers sont nommés d'après l'empreinte du contenu téléchargé et servis par la
+route frontend.thumbnail_file avec une mise en cache « immutable » : les pages ne dépendent plus du CDN de YouTube
+et le navigateur choisit la taille adaptée à l'écran (srcset).
+"""
+import io
+import os
+import re
+import hashlib
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import current_app
+from PIL import Image
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.video_thumbnail import VideoThumbnail
+
+logger = logging.getLogger(__name__)
+
+# Largeurs (en pixels) des fichiers WebP produits, si THUMBNAIL_WIDTHS est absent.
+DEFAULT_THUMBNAIL_WIDTHS = (320, 480, 640)
+
+# Format conservé : celui des lecteurs vidéo.
+ASPECT_RATIO = 16 / 9
+
+# Nom des fichiers servis : empreinte du contenu et largeur.
+FILENAME_PATTERN = re.compile(r'^([0-9a-f]{20})-(\d+)\.webp$')
+
+
+def thumbnail_folder():
+    """
+    Renvoie le dossier des miniatures (THUMBNAIL_FOLDER, relatif à la racine de l'application), en le créant si
+    nécessaire.
+
+    :return: Chemin absolu du dossier.
+    """
+    folder = current_app.config['THUMBNAIL_FOLDER']
+    if not os.path.isabs(folder):
+        folder = os.path.join(current_app.root_path, folder)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def thumbnail_filename(digest, width):
+    """
+    Calcule le nom du fichier d'une miniature.
+
+    :param digest: Empreinte du contenu téléchargé.
+    :param width: Largeur en pixels.
+    :return: Nom du fichier.
+    """
+    return f'{digest}-{width}.webp'
+
+
+def crop_to_ratio(image, ratio=ASPECT_RATIO):
+    """
+    Recadre une image au centre pour obtenir le rapport largeur / hauteur demandé.
+
+    :param image: Image PIL.
+    :param ratio: Rapport largeur / hauteur.
+    :return: Image PIL recadrée.
+    """
+    width, height = image.size
+    if width / height > ratio:
+        new_width = round(height * ratio)
+        left = (width - new_width) // 2
+        return image.crop((left, 0, left + new_width, height))
+    new_height = round(width / ratio)
+    top = (height - new_height) // 2
+    return image.crop((0, top, width, top + new_height))
+
+
+def encode_variants(data, widths, quality=80):
+    """
+    Recadre une image en 16:9 et l'encode en WebP dans chaque largeur inférieure ou égale à celle de l'original
+    (l'image n'est jamais agrandie, sauf si elle est plus petite que toutes les largeurs demandées).
+
+    :param data: Contenu de l'image téléchargée.
+    :param widths: Largeurs souhaitées.
+    :param quality: Qualité WebP (0 à 100).
+    :return: Dictionnaire {largeur: contenu WebP}.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = crop_to_ratio(source.convert('RGB'))
+    widths = sorted(set(widths))
+    kept = [width for width in widths if width <= image.width] or widths[:1]
+
+    variants = {}
+    for width in kept:
+        height = round(width / ASPECT_RATIO)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, 'WEBP', quality=quality, method=4)
+        variants[width] = buffer.getvalue()
+    return variants
+
+
+def fetch_thumbnail(url, folder, widths, quality=80, timeout=10):
+    """
+    Télécharge une miniature et enregistre ses versions WebP (sans accès à la base de données : appelée depuis
+    plusieurs threads).
+
+    :param url: URL de la miniature.
+    :param folder: Dossier de destination.
+    :param widths: Largeurs souhaitées.
+    :param quality: Qualité WebP.
+    :param timeout: Délai maximal du téléchargement, en secondes.
+    :return: Tuple (empreinte, liste des largeurs enregistrées).
+    """
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    digest = hashlib.sha256(response.content).hexdigest()[:20]
+
+    existing = [width for width in sorted(set(widths))
+                if os.path.exists(os.path.join(folder, thumbnail_filename(digest, width)))]
+    if existing:
+        # Même contenu déjà traité (autre vidéo ou miniature revenue à une version précédente).
+        return digest, existing
+
+    saved = []
+    for width, content in encode_variants(response.content, widths, quality).items():
+        path = os.path.join(folder, thumbnail_filename(digest, width))
+        # Écriture dans un fichier temporaire puis renommage : un fichier servi n'est jamais incomplet.
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(content)
+        os.replace(temporary, path)
+        saved.append(width)
+    return digest, saved
+
+
+def purge_unused_files(folder):
+    """
+    Supprime les fichiers qui ne correspondent plus à aucune miniature enregistrée.
+
+    :param folder: Dossier des miniatures.
+    :return: Nombre de fichiers supprimés.
+    """
+    used = {digest for digest, in db.session.query(VideoThumbnail.digest)}
+    removed = 0
+    for name in os.listdir(folder):
+        match = FILENAME_PATTERN.match(name)
+        if match and match.group(1) not in used:
+            os.remove(os.path.join(folder, name))
+            removed += 1
+    return removed
+
+
+def sync_thumbnails():
+    """
+    Télécharge les miniatures des vidéos nouvelles ou dont l'URL a changé depuis le dernier passage, puis supprime
+    les fichiers devenus inutiles. Une miniature inaccessible est ignorée (la carte utilise alors l'URL de YouTube) et
+    sera retentée à la prochaine synchronisation.
+
+    :return: Nombre de miniatures enregistrées.
+    """
+    config = current_app.config
+    folder = thumbnail_folder()
+    widths = config.get('THUMBNAIL_WIDTHS', DEFAULT_THUMBNAIL_WIDTHS)
+
+    pending = [(video.id, video.thumbnail_url) for video in Video.query.all()
+               if video.thumbnail is None or video.thumbnail.source_url != video.thumbnail_url]
+    if not pending:
+        purge_unused_files(folder)
+        return 0
+
+    def fetch(url):
+        try:
+            return fetch_thumbnail(url, folder, widths, config.get('THUMBNAIL_QUALITY', 80),
+                                   config.get('THUMBNAIL_TIMEOUT', 10))
+        except Exception as e:
+            logger.warning("Miniature %s non récupérée : %s", url, e)
+            return None
+
+    # Téléchargements en parallèle ; l'écriture en base reste dans le thread courant.
+    with ThreadPoolExecutor(max_workers=config.get('THUMBNAIL_WORKERS', 4)) as executor:
+        results = list(executor.map(fetch, [url for _, url in pending]))
+
+    stored = 0
+    for (video_id, url), result in zip(pending, results):
+        if result is None:
+            continue
+        digest, saved = result
+        db.session.merge(VideoThumbnail(video_id=video_id, source_url=url, digest=digest,
+                                        widths=','.join(str(width) for width in saved)))
+        stored += 1
+    db.session.commit()
+
+    purge_unused_files(folder)
+    logger.info("%s miniatures enregistrées sur %s à mettre à jour.", stored, len(pending))
+    return stored
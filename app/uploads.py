@@ -0,0 +1,218 @@
+"""
+Code permettant d'enregistrer les fichiers téléchargés (pièces jointes des demandes de chat, photos de profil) en
+flux continu : le fichier est écrit morceau par morceau dans un fichier temporaire pendant que son empreinte est
+calculée, puis dédupliqué selon son contenu. Le redimensionnement des images se fait en arrière-plan.
+
+Le type réel du fichier (signature des premiers octets, et contenu de l'archive pour un .docx) doit correspondre à
+son extension.
+
+Aucune route n'enregistre encore de fichier : les formulaires de photo de profil (forms.py) et la colonne
+ChatRequest.attachment n'ont pas de vue. save_upload() est le point d'entrée à utiliser lorsqu'elles seront
+ajoutées ; Fonctions_Admin/verif_uploads.py en vérifie le comportement.
+"""
+import os
+import hashlib
+import logging
+import zipfile
+import tempfile
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from app.extensions import allowed_file
+
+# Taille des morceaux lus dans le flux du fichier (64 Ko).
+CHUNK_SIZE = 64 * 1024
+
+# Signatures (magic bytes) des types de fichiers acceptés.
+MAGIC_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'\xff\xd8\xff': 'jpg',
+    b'%PDF-': 'pdf',
+    b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1': 'doc',
+    # Archive ZIP : n'est acceptée que si c'est un document Word (voir is_docx()).
+    b'PK\x03\x04': 'zip',
+}
+
+# Type réel attendu pour chaque extension autorisée.
+EXTENSION_KINDS = {'png': 'png', 'jpg': 'jpg', 'jpeg': 'jpg', 'pdf': 'pdf', 'doc': 'doc', 'docx': 'docx'}
+
+# Types de fichiers considérés comme des images à redimensionner.
+IMAGE_KINDS = {'png', 'jpg'}
+
+# Largeurs générées pour les images téléchargées.
+IMAGE_WIDTHS = (128, 512)
+
+# Nombre de threads dédiés au redimensionnement et nombre maximal de tâches en attente.
+RESIZE_WORKERS = 2
+RESIZE_MAX_PENDING = 8
+
+_resize_executor = ThreadPoolExecutor(max_workers=RESIZE_WORKERS, thread_name_prefix='upload-resize')
+_resize_slots = threading.BoundedSemaphore(RESIZE_MAX_PENDING)
+
+logger = logging.getLogger(__name__)
+
+
+def sniff_kind(head):
+    """
+    Détermine le type réel d'un fichier à partir de ses premiers octets.
+
+    :param head: Premiers octets du fichier.
+    :return: Extension correspondant au type détecté, ou None si le type n'est pas reconnu.
+    """
+    for signature, kind in MAGIC_SIGNATURES.items():
+        if head.startswith(signature):
+            return kind
+    return None
+
+
+def is_docx(path):
+    """
+    Vérifie qu'une archive ZIP est un document Word : elle doit contenir '[Content_Types].xml' et le dossier 'word/'.
+
+    :param path: Chemin de l'archive.
+    :return: True si l'archive est un document Word.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+    return '[Content_Types].xml' in names and any(name.startswith('word/') for name in names)
+
+
+def save_upload(file_storage, subfolder='', max_size=None):
+    """
+    Enregistre un fichier téléchargé sans jamais le charger entièrement en mémoire.
+
+    Le flux est copié par morceaux de CHUNK_SIZE dans un fichier temporaire du dossier de destination, l'empreinte
+    SHA-256 est calculée au fil de l'eau et la taille est vérifiée à chaque morceau. Le fichier final est nommé
+    d'après son empreinte : deux envois identiques ne sont donc stockés qu'une seule fois.
+
+    :param file_storage: Objet FileStorage (request.files ou FileField de WTForms).
+    :param subfolder: Sous-dossier de UPLOAD_FOLDER dans lequel ranger le fichier.
+    :param max_size: Taille maximale en octets, par défaut MAX_CONTENT_LENGTH.
+    :return: Chemin relatif du fichier enregistré (par rapport à UPLOAD_FOLDER).
+    :raises ValueError: Si l'extension n'est pas autorisée ou ne correspond pas au contenu du fichier.
+    :raises RequestEntityTooLarge: Si le fichier dépasse la taille maximale.
+    """
+    if not file_storage or not allowed_file(file_storage.filename or ''):
+        raise ValueError("Ce type de fichier n'est pas autorisé.")
+    expected = EXTENSION_KINDS.get(file_storage.filename.rsplit('.', 1)[1].lower())
+    if expected is None:
+        raise ValueError("Ce type de fichier n'est pas autorisé.")
+
+    if max_size is None:
+        max_size = current_app.config.get('MAX_CONTENT_LENGTH')
+
+    destination = os.path.join(current_app.config['UPLOAD_FOLDER'], subfolder)
+    os.makedirs(destination, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    kind = None
+
+    # Écriture du flux morceau par morceau dans un fichier temporaire du même dossier (rename atomique ensuite).
+    fd, tmp_path = tempfile.mkstemp(dir=destination, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                # Vérification du contenu réel sur le premier morceau.
+                if size == 0:
+                    kind = sniff_kind(chunk)
+                    if kind is None:
+                        raise ValueError("Le contenu du fichier ne correspond à aucun type autorisé.")
+                    if kind != expected and not (kind == 'zip' and expected == 'docx'):
+                        raise ValueError("Le contenu du fichier ne correspond pas à son extension.")
+
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise RequestEntityTooLarge()
+
+                digest.update(chunk)
+                tmp_file.write(chunk)
+
+        if size == 0:
+            raise ValueError("Le fichier est vide.")
+
+        # Une archive ZIP n'est acceptée que si elle contient bien un document Word.
+        if kind == 'zip':
+            if not is_docx(tmp_path):
+                raise ValueError("Le contenu du fichier ne correspond pas à son extension.")
+            kind = 'docx'
+
+        filename = f"{digest.hexdigest()}.{kind}"
+        final_path = os.path.join(destination, filename)
+
+        # Déduplication : si le même contenu existe déjà, le fichier temporaire est abandonné.
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, final_path)
+            if kind in IMAGE_KINDS:
+                schedule_resize(final_path)
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return os.path.join(subfolder, filename)
+
+
+def schedule_resize(path):
+    """
+    Confie le redimensionnement d'une image au pool de threads, sans bloquer le thread de la requête.
+
+    Si trop de redimensionnements sont déjà en attente, l'image est conservée telle quelle.
+
+    :param path: Chemin de l'image d'origine.
+    :return: Future du redimensionnement, ou None si le pool est saturé.
+    """
+    if not _resize_slots.acquire(blocking=False):
+        logger.warning("Pool de redimensionnement saturé, image conservée sans miniatures : %s", path)
+        return None
+
+    future = _resize_executor.submit(resize_image, path)
+    future.add_done_callback(lambda _: _resize_slots.release())
+    return future
+
+
+def resize_image(path, widths=IMAGE_WIDTHS):
+    """
+    Génère les miniatures d'une image pour chaque largeur demandée.
+
+    Les miniatures sont nommées '<empreinte>_<largeur>.<extension>' à côté de l'image d'origine.
+
+    :param path: Chemin de l'image d'origine.
+    :param widths: Largeurs des miniatures à générer.
+    :return: Liste des chemins des miniatures générées.
+    """
+    from PIL import Image
+
+    root, ext = os.path.splitext(path)
+    outputs = []
+    try:
+        for width in widths:
+            output = f"{root}_{width}{ext}"
+            if os.path.exists(output):
+                outputs.append(output)
+                continue
+
+            with Image.open(path) as image:
+                # Décodage JPEG directement à taille réduite pour limiter la mémoire.
+                image.draft('RGB', (width, width))
+                image.thumbnail((width, width))
+                image.save(output)
+            outputs.append(output)
+    except Exception as e:
+        logger.error("Erreur lors du redimensionnement de %s : %s", path, e)
+
+    return outputs
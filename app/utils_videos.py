@@ -3,8 +3,17 @@ Code permettant de récupérer les vidéos selon le mois courant, les plus popul
 qui sont du mois précédent.
 """
 from datetime import datetime, date
+
+from sqlalchemy.orm import joinedload
+
 from app.Models.videos import Video
 
+# Dictionnaire des noms de mois utilisés pour les archives.
+MONTH_NAMES = {
+    1: "Janvier", 2: "Février", 3: "Mars", 4: "Avril", 5: "Mai", 6: "Juin",
+    7: "Juillet", 8: "Août", 9: "Septembre", 10: "Octobre", 11: "Novembre", 12: "Décembre"
+}
+
 
 # Fonction qui affiche les vidéos du mois courant.
 def current_month_videos(videos):
@@ -48,11 +57,6 @@ def archived_videos(videos):
     """
     # Création du dictionnaire des archives vidéos.
     archives = {}
-    # Dictionnaire pour les noms de mois.
-    month_abbr = {
-        1: "Janvier", 2: "Février", 3: "Mars", 4: "Avril", 5: "Mai", 6: "Juin",
-        7: "Juillet", 8: "Août", 9: "Septembre", 10: "Octobre", 11: "Novembre", 12: "Décembre"
-    }
 
     # Récupération du mois et de l'année courants au format 'YYYY-MMM'.
     now = datetime.now()
@@ -73,7 +77,7 @@ def archived_videos(videos):
 
         # Formatage pour obtenir le mois et l'année au format 'YYYY-MMM'.
         year = dt_object.year
-        month = month_abbr[dt_object.month]
+        month = MONTH_NAMES[dt_object.month]
         video_month = f"{month} {year}"
 
         if video_month != current_month:
@@ -87,10 +91,10 @@ def archived_videos(videos):
 
 def get_videos_from_db():
     """
-    Récupère les vidéos depuis la base de données.
+    Récupère les vidéos depuis la base de données, avec leur miniature (affichée sur chaque carte).
 
     :return: Liste des vidéos.
     """
     # Interrogation de la base de données et gestion des vidéos par date de publication décroissante.
-    return Video.query.order_by(Video.published_at.desc()).all()
+    return Video.query.options(joinedload(Video.thumbnail)).order_by(Video.published_at.desc()).all()
 
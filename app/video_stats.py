@@ -0,0 +1,208 @@
+"""
+Code permettant d'historiser les statistiques des vidéos (vues, likes, commentaires) à chaque synchronisation.
+
+La table 'video' ne contient que les compteurs courants. À chaque synchronisation, la différence entre ces compteurs
+et la somme de l'historique est ajoutée à la ligne du jour de la table 'video_stat' (une ligne par vidéo et par jour,
+uniquement si un compteur a changé). Pour borner le volume, les lignes journalières plus anciennes que
+DAILY_RETENTION_DAYS sont regroupées par semaine, et les lignes hebdomadaires plus anciennes que
+WEEKLY_RETENTION_DAYS par mois. Comme seules des variations sont stockées, ces regroupements conservent les totaux :
+la courbe perd en résolution dans le passé, jamais en exactitude.
+"""
+import datetime
+import logging
+
+from sqlalchemy import func
+
+from app.Models import db
+from app.Models.videos import Video
+from app.Models.video_stat import VideoStat
+
+logger = logging.getLogger(__name__)
+
+# Durées des périodes (en jours), stockées dans la colonne 'period'.
+PERIOD_DAY = 1
+PERIOD_WEEK = 7
+PERIOD_MONTH = 30
+
+# Ancienneté (en jours) au-delà de laquelle les lignes journalières sont regroupées par semaine.
+DAILY_RETENTION_DAYS = 90
+
+# Ancienneté (en jours) au-delà de laquelle les lignes hebdomadaires sont regroupées par mois.
+WEEKLY_RETENTION_DAYS = 730
+
+# Compteurs historisés : (colonne de la table 'video', colonne de la table 'video_stat').
+COUNTERS = (
+    ('view_count', 'views'),
+    ('like_count', 'likes'),
+    ('comment_count', 'comments'),
+)
+
+
+def week_start(day):
+    """
+    Renvoie le lundi de la semaine d'une date.
+
+    :param day: Date.
+    :return: Date du lundi.
+    """
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def month_start(day):
+    """
+    Renvoie le premier jour du mois d'une date.
+
+    :param day: Date.
+    :return: Date du premier jour du mois.
+    """
+    return day.replace(day=1)
+
+
+def _merge(rows, period):
+    """
+    Ajoute des variations aux lignes existantes de 'video_stat', ou crée les lignes manquantes.
+
+    :param rows: Dictionnaire (video_id, jour) -> tuple (vues, likes, commentaires).
+    :param period: Durée de la période des lignes créées.
+    """
+    if not rows:
+        return
+
+    existing = {
+        (stat.video_id, stat.day): stat
+        for stat in VideoStat.query.filter(VideoStat.day.in_({day for _, day in rows}))
+    }
+
+    inserts = []
+    for (video_id, day), (views, likes, comments) in rows.items():
+        stat = existing.get((video_id, day))
+        if stat is not None:
+            stat.views += views
+            stat.likes += likes
+            stat.comments += comments
+        else:
+            inserts.append({'video_id': video_id, 'day': day, 'period': period,
+                            'views': views, 'likes': likes, 'comments': comments})
+    if inserts:
+        db.session.execute(VideoStat.__table__.insert(), inserts)
+
+
+def capture_snapshot(day=None):
+    """
+    Enregistre les variations des compteurs de toutes les vidéos depuis le dernier relevé.
+
+    Les compteurs courants sont comparés à la somme de l'historique de chaque vidéo (une requête d'agrégation) : le
+    premier relevé d'une vidéo enregistre donc ses compteurs complets. Plusieurs relevés le même jour s'additionnent
+    dans la même ligne.
+
+    :param day: Date du relevé, par défaut aujourd'hui.
+    :return: Nombre de vidéos dont au moins un compteur a changé.
+    """
+    day = day or datetime.date.today()
+
+    totals = {
+        video_id: (views, likes, comments)
+        for video_id, views, likes, comments in db.session.query(
+            VideoStat.video_id, func.sum(VideoStat.views), func.sum(VideoStat.likes), func.sum(VideoStat.comments)
+        ).group_by(VideoStat.video_id)
+    }
+
+    rows = {}
+    columns = [getattr(Video, name) for name, _ in COUNTERS]
+    for video_id, *current in db.session.query(Video.id, *columns):
+        previous = totals.get(video_id, (0, 0, 0))
+        delta = tuple((value or 0) - int(before or 0) for value, before in zip(current, previous))
+        if any(delta):
+            rows[(video_id, day)] = delta
+
+    try:
+        _merge(rows, PERIOD_DAY)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erreur lors de l'enregistrement des statistiques des vidéos : %s", e)
+        raise
+
+    return len(rows)
+
+
+def _roll_up(source_period, cutoff, bucket, target_period):
+    """
+    Regroupe les lignes d'une période antérieures à une date en lignes d'une période plus longue.
+
+    :param source_period: Durée de la période des lignes regroupées.
+    :param cutoff: Date limite (exclue), alignée sur le début d'une période cible.
+    :param bucket: Fonction renvoyant le premier jour de la période cible d'une date.
+    :param target_period: Durée de la période des lignes créées.
+    :return: Nombre de lignes regroupées.
+    """
+    old = db.session.query(VideoStat.video_id, VideoStat.day, VideoStat.views, VideoStat.likes,
+                           VideoStat.comments) \
+        .filter(VideoStat.period == source_period, VideoStat.day < cutoff).all()
+    if not old:
+        return 0
+
+    rows = {}
+    for video_id, day, views, likes, comments in old:
+        key = (video_id, bucket(day))
+        total = rows.get(key, (0, 0, 0))
+        rows[key] = (total[0] + views, total[1] + likes, total[2] + comments)
+
+    db.session.execute(VideoStat.__table__.delete().where(VideoStat.period == source_period,
+                                                          VideoStat.day < cutoff))
+    _merge(rows, target_period)
+    return len(old)
+
+
+def downsample_stats(today=None):
+    """
+    Applique la politique de rétention : jours regroupés par semaine, puis semaines regroupées par mois.
+
+    Les dates limites sont alignées sur un début de semaine ou de mois, afin qu'une période ne soit jamais
+    regroupée en partie seulement.
+
+    :param today: Date de référence, par défaut aujourd'hui.
+    :return: Tuple (lignes journalières regroupées, lignes hebdomadaires regroupées).
+    """
+    today = today or datetime.date.today()
+
+    try:
+        daily = _roll_up(PERIOD_DAY, week_start(today - datetime.timedelta(days=DAILY_RETENTION_DAYS)),
+                         week_start, PERIOD_WEEK)
+        weekly = _roll_up(PERIOD_WEEK, month_start(today - datetime.timedelta(days=WEEKLY_RETENTION_DAYS)),
+                          month_start, PERIOD_MONTH)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Erreur lors du regroupement des statistiques des vidéos : %s", e)
+        raise
+
+    return daily, weekly
+
+
+def get_video_curve(video_id, since=None):
+    """
+    Renvoie la courbe des compteurs d'une vidéo, en valeurs cumulées.
+
+    :param video_id: Identifiant de la vidéo.
+    :param since: Date de début optionnelle ; les variations antérieures servent de point de départ.
+    :return: Liste de dictionnaires {'date', 'period', 'views', 'likes', 'comments'} par date croissante.
+    """
+    totals = [0, 0, 0]
+    query = VideoStat.query.filter(VideoStat.video_id == video_id)
+
+    if since is not None:
+        before = db.session.query(func.sum(VideoStat.views), func.sum(VideoStat.likes),
+                                  func.sum(VideoStat.comments)) \
+            .filter(VideoStat.video_id == video_id, VideoStat.day < since).one()
+        totals = [int(value or 0) for value in before]
+        query = query.filter(VideoStat.day >= since)
+
+    curve = []
+    for stat in query.order_by(VideoStat.day):
+        totals[0] += stat.views
+        totals[1] += stat.likes
+        totals[2] += stat.comments
+        curve.append({'date': stat.day.isoformat(), 'period': stat.period,
+                      'views': totals[0], 'likes': totals[1], 'comments': totals[2]})
+    return curve
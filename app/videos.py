@@ -3,26 +3,33 @@ Fichier permettant de gérer la mise à jour des vidéos de la chaîne.
 """
 # -*- coding: utf-8 -*-
 
-from app.Models.videos import Video
+from app.Models.videos import Video, DEFAULT_THUMBNAIL_URL
 from app import db
+from app.utils_videos import MONTH_NAMES
 
 from googleapiclient.discovery import build
 from sqlalchemy.exc import IntegrityError
 
 from dotenv import load_dotenv
 import os
-import locale
+import re
+import logging
 from datetime import datetime, date
 
-# Définir la locale en français
-locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
-
 # Chargement des variables d'environnement
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 YOUTUBE_API = os.getenv('YOUTUBE_API')
 ID_CHANNEL = os.getenv('ID_CHANNEL')
 
+# Durée ISO 8601 renvoyée par l'API (contentDetails.duration), ex. 'PT1H2M3S' ou 'P1DT2H'.
+DURATION_PATTERN = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+# Miniatures proposées par l'API, par ordre de préférence ('standard' : 640 x 480, réduite localement en WebP).
+THUMBNAIL_SIZES = ('standard', 'high', 'medium', 'default')
+
 
 class YouTubeManager:
     """
@@ -79,6 +86,7 @@ class YouTubeManager:
         video_details = video_response['items'][0]
         published_at_display, published_at_db = self.format_date(
             video_details['snippet'].get('publishedAt', 'Date inconnue'))
+        duration = self.parse_duration(video_details.get('contentDetails', {}).get('duration'))
         return {
             'video_id': video_id,
             'title': video_details['snippet']['title'],
@@ -87,9 +95,25 @@ class YouTubeManager:
             'view_count': int(video_details['statistics'].get('viewCount', 0)),
             'like_count': int(video_details['statistics'].get('likeCount', 0)),
             'comment_count': int(video_details['statistics'].get('commentCount', 0)),
-            'tags': video_details['snippet'].get('tags', [])
+            'tags': video_details['snippet'].get('tags', []),
+            'duration': duration,
+            'duration_display': self.format_duration(duration),
+            'thumbnail_url': self.thumbnail_url(video_id, video_details['snippet'].get('thumbnails', {}))
         }
 
+    @staticmethod
+    def thumbnail_url(video_id, thumbnails):
+        """
+        Choisit la miniature des cartes des vidéos (la plus grande jusqu'à 640 px, réduite ensuite localement).
+        :param video_id: ID de la vidéo
+        :param thumbnails: Miniatures renvoyées par l'API (snippet.thumbnails)
+        :return: URL de la miniature
+        """
+        for size in THUMBNAIL_SIZES:
+            if thumbnails.get(size, {}).get('url'):
+                return thumbnails[size]['url']
+        return DEFAULT_THUMBNAIL_URL.format(video_id=video_id)
+
     @staticmethod
     def format_date(published_at):
         """
@@ -108,12 +132,40 @@ class YouTubeManager:
         else:
             return 'Date inconnue', None
 
-        # Pour l'affichage en français.
-        formatted_date = dt_object.strftime("%d %B %Y")
+        # Pour l'affichage en français (sans setlocale, qui modifie tout le processus et n'est pas sûr entre threads).
+        formatted_date = f"{dt_object.day:02d} {MONTH_NAMES[dt_object.month].lower()} {dt_object.year}"
         # Pour la base de données
         date_for_db = dt_object.date()
         return formatted_date, date_for_db
 
+    @staticmethod
+    def parse_duration(duration):
+        """
+        Convertit une durée ISO 8601 de l'API YouTube en secondes.
+        :param duration: Durée (ex. 'PT4M13S'), ou None.
+        :return: Nombre de secondes, ou None si la durée est absente ou invalide.
+        """
+        match = DURATION_PATTERN.match(duration or '')
+        if not match or not duration.strip('PT'):
+            return None
+        days, hours, minutes, seconds = (int(value or 0) for value in match.groups())
+        return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+    @staticmethod
+    def format_duration(seconds):
+        """
+        Formate une durée pour l'affichage : 'm:ss', ou 'h:mm:ss' au-delà d'une heure.
+        :param seconds: Nombre de secondes, ou None.
+        :return: Chaîne de caractères, ou None si la durée est inconnue ou nulle (direct, avant-première).
+        """
+        if not seconds:
+            return None
+        hours, rest = divmod(seconds, 3600)
+        minutes, seconds = divmod(rest, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes}:{seconds:02d}"
+
 
 def save_videos_to_db(videos):
     """
@@ -131,6 +183,10 @@ def save_videos_to_db(videos):
                 existing_video.like_count = video['like_count']
                 existing_video.comment_count = video['comment_count']
                 existing_video.tags = video['tags']
+                existing_video.embed_url = video.get('thumbnail_url')
+                existing_video.published_at_display = video.get('published_at_display')
+                existing_video.duration = video.get('duration')
+                existing_video.duration_display = video.get('duration_display')
             else:
                 # Créer une nouvelle entrée
                 new_video = Video(
@@ -140,10 +196,14 @@ def save_videos_to_db(videos):
                     view_count=video['view_count'],
                     like_count=video['like_count'],
                     comment_count=video['comment_count'],
-                    tags=video['tags']
+                    tags=video['tags'],
+                    embed_url=video.get('thumbnail_url'),
+                    published_at_display=video.get('published_at_display'),
+                    duration=video.get('duration'),
+                    duration_display=video.get('duration_display')
                 )
                 db.session.add(new_video)
         db.session.commit()
     except IntegrityError as e:
         db.session.rollback()
-        print(f"Error occurred: {e}")
+        logger.error("Erreur lors de l'enregistrement des vidéos : %s", e)
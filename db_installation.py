@@ -1,18 +1,23 @@
 """
-Fichier permettant d'installer les tables de données de la base PostGreSQL.
-"""
+Fichier permettant d'installer les tables de données de la base configurée par DATABASE_URL (SQLite, MySQL ou
+PostgreSQL), et de mettre à jour une base existante : les colonnes ajoutées aux modèles depuis sa création sont
+ajoutées à ses tables. Équivalent de la commande 'flask init-db'.
 
-from app.Models import db
+À lancer à chaque déploiement, avant de redémarrer l'application :
+    python db_installation.py
+"""
 
 from app import create_app
+from app.database import create_schema
 
 app = create_app()
 
 # L'installation des tables de données dans un contexte d'application.py.
 with app.app_context():
 
-    # Création de toutes les tables à partir de leur classe.
-    db.create_all()
+    # Création des tables manquantes à partir de leur classe, puis des colonnes manquantes des tables existantes.
+    created, added = create_schema()
 
-print("Félicitations, toutes vos tables ont été installées.")
+print(f"Félicitations, toutes vos tables ont été installées ({len(created)} table(s) créée(s), {len(added)} "
+      f"colonne(s) ajoutée(s)).")
 
@@ -2,7 +2,6 @@
 Fichier principal de l'application.py du blog de Titi
 """
 import os
-import locale
 
 from flask import render_template, send_from_directory
 
@@ -10,12 +9,11 @@ from app import create_app
 
 
 from app.utils_videos import get_videos_from_db
+from app.cache import cached_view
+from app.conditional import conditional_view, video_list_version
 
 from app.scheduler import scheduled_task
 
-# Configurer la localisation en français
-locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
-
 app = create_app()
 
 
@@ -44,6 +42,8 @@ def page_not_found(error):
 
 # Route menant à la page d'accueil.
 @app.route("/")
+@conditional_view(video_list_version)
+@cached_view(tags=('video', 'video_ranking', 'video_thumbnail'))
 def landing_page():
     """
     Fonction qui renvoie la page d'accueil.
@@ -51,11 +51,12 @@ def landing_page():
     :return: frontend/accueil.html
     """
     from app.utils_videos import current_month_videos, popular_videos, archived_videos
+    from app.ranking import get_ranked_videos
 
     # Récupération et filtrage des vidéos
     videos = get_videos_from_db()
     current_month = current_month_videos(videos)
-    popular = popular_videos(videos)
+    popular = get_ranked_videos(app.config['POPULAR_RANKING']) or popular_videos(videos)
     archived = archived_videos(videos)
 
     return render_template(
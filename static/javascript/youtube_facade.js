@@ -0,0 +1,50 @@
+// Remplacement des façades YouTube (templates/macros/youtube.html) par le lecteur au clic.
+
+// Domaines contactés par le lecteur : la connexion est préparée au survol d'une façade.
+const YOUTUBE_ORIGINS = ['https://www.youtube.com', 'https://www.google.com', 'https://i.ytimg.com'];
+let youtubeWarmed = false;
+
+
+function warmYoutubeConnections() {
+    // Ajouter une seule fois les indications preconnect vers les domaines du lecteur.
+    if (youtubeWarmed) {
+        return;
+    }
+    youtubeWarmed = true;
+    YOUTUBE_ORIGINS.forEach(function(origin) {
+        const link = document.createElement('link');
+        link.rel = 'preconnect';
+        link.href = origin;
+        document.head.appendChild(link);
+    });
+}
+
+
+function playYoutubeFacade(facade) {
+    // Créer l'iframe du lecteur, lancée automatiquement, à la place de la miniature.
+    const iframe = document.createElement('iframe');
+    iframe.src = `https://www.youtube.com/embed/${encodeURIComponent(facade.dataset.videoId)}?autoplay=1`;
+    iframe.title = facade.dataset.title || 'Vidéo YouTube';
+    iframe.allow = 'accelerometer; autoplay; encrypted-media; gyroscope; picture-in-picture';
+    iframe.allowFullscreen = true;
+    iframe.setAttribute('frameborder', '0');
+    facade.classList.add('youtube-facade-active');
+    facade.replaceChildren(iframe);
+    iframe.focus();
+}
+
+
+// Un seul gestionnaire pour toute la page : les façades ajoutées après le chargement (carrousels) sont couvertes.
+document.addEventListener('pointerover', function(event) {
+    if (event.target.closest && event.target.closest('.youtube-facade')) {
+        warmYoutubeConnections();
+    }
+});
+
+document.addEventListener('click', function(event) {
+    const facade = event.target.closest && event.target.closest('.youtube-facade:not(.youtube-facade-active)');
+    if (facade) {
+        event.preventDefault();
+        playYoutubeFacade(facade);
+    }
+});